@@ -1,12 +1,259 @@
 import discord
 import time
 from discord.ext import commands
-from utils.database import load, save
+from utils.database import storage_io, user_store
 import config
-from difflib import get_close_matches
+from utils.assets import assets
+from utils.search import card_index
+from utils.slash import sync_commands
+
+
+@assets.embed("admin:help")
+def _admin_help():
+    embed = discord.Embed(
+        title="🛠️ Admin Command Help",
+        description=(
+            "These commands are **admin-only** (checked via `config.ADMINS`).\n"
+            "Use them carefully, they directly modify player data."
+        ),
+        color=0xE67E22
+    )
+    embed.add_field(
+        name="➕ ls add",
+        value=(
+            "`ls add <type> <amount> [@user] ...`\n"
+            "Types: `yen`, `pulls`, `reset`, `ticket`, `item`, `card`, `frag`, `chest`\n"
+            "Examples:\n"
+            "• `ls add yen 100000 @user`\n"
+            "• `ls add card 1 @user Mira Kim` (fuzzy card search)\n"
+            "• `ls add frag 10 @user Mira` (fragments by card name)\n"
+            "• `ls add ticket 3 @user boss_ticket`\n"
+            "• `ls add chest 2 @user raid_chest_1`"
+        ),
+        inline=False
+    )
+
+    embed.add_field(
+        name="➖ ls remove / ls rem",
+        value=(
+            "`ls remove <type> <amount> [@user] ...`\n"
+            "Types: `yen`, `pulls`, `reset`, `ticket`, `item`, `frag`, `chest`\n"
+            "Examples:\n"
+            "• `ls remove yen 50000 @user`\n"
+            "• `ls rem frag 5 @user Mira`\n"
+            "• `ls rem ticket 1 @user boss_ticket`"
+        ),
+        inline=False
+    )
+
+    embed.add_field(
+        name="⚙️ ls set",
+        value=(
+            "`ls set <type> <value> [@user]`\n"
+            "Types: `yen`, `pulls`, `wins`, `streak`, `reset`\n"
+            "Examples:\n"
+            "• `ls set yen 250000 @user`\n"
+            "• `ls set pulls 12 @user`\n"
+            "• `ls set wins 50 @user`"
+        ),
+        inline=False
+    )
+
+    embed.add_field(
+        name="🧹 ls wipe",
+        value="`ls wipe [@user]` – Delete ALL stored data for a user.",
+        inline=False
+    )
+
+    embed.add_field(
+        name="🔄 ls reset",
+        value=(
+            "`ls reset <type> [@user]`\n"
+            "Types: `cooldown`, `pulls`, `streak`\n"
+            "Examples:\n"
+            "• `ls reset cooldown @user`\n"
+            "• `ls reset pulls @user`"
+        ),
+        inline=False
+    )
+
+    embed.add_field(
+        name="👤 ls userinfo / ls uinfo",
+        value="`ls userinfo [@user]` – Show a quick overview of a user's stored data.",
+        inline=False
+    )
+
+    embed.add_field(
+        name="💾 ls storage / ls iostats",
+        value="`ls storage` – Save queue depth, write times, unsaved users and records written per command.",
+        inline=False
+    )
+
+    embed.add_field(
+        name="🔄 ls sync",
+        value="`ls sync` – Push the slash commands to Discord now (startup only syncs when they changed).",
+        inline=False
+    )
+
+    embed.add_field(
+        name="👑 ls patreonadd / ls pa",
+        value="`ls patreonadd <user_id> [tier]` – Add Patreon status to a user (Admin only).",
+        inline=False
+    )
+
+    embed.add_field(
+        name="❌ ls patreonremove / ls pr",
+        value="`ls patreonremove <user_id>` – Remove Patreon status from a user (Admin only).",
+        inline=False
+    )
+
+    embed.add_field(
+        name="📋 ls patreonlist / ls pl",
+        value="`ls patreonlist` – List all current patrons (Admin only).",
+        inline=False
+    )
+
+    embed.add_field(
+        name="👑 ls patreon",
+        value="`ls patreon` – Interactive Patreon information and tiers.",
+        inline=False
+    )
+    return embed
+
+
+def _tier_embed(title, color, description, footer=None):
+    embed = discord.Embed(title=title, description=description, color=color)
+    if footer:
+        embed.set_footer(text=footer)
+    return embed
+
+
+@assets.embed("patreon:copy_tier")
+def _patreon_copy_tier():
+    return _tier_embed("🥉 Copy Tier - $5/month", 0xC0C0C0, """
+**Perfect for starting supporters!**
+
+**Perks:**
+• +2 extra gacha pulls (14 total)
+• +50% daily bonus rewards
+• Special Copy badge in chat
+• Priority support
+• Access to supporter-only channels
+
+**Ideal for:** Casual players who want a small boost
+""", "Upgrade anytime! Benefits stack with higher tiers.")
+
+
+@assets.embed("patreon:ui_tier")
+def _patreon_ui_tier():
+    return _tier_embed("🥈 UI Tier - $10/month", 0x9B59B6, """
+**Great value for dedicated players!**
+
+**Perks:**
+• +5 extra gacha pulls (17 total)
+• +100% daily bonus rewards (2x)
+• Exclusive UI-only cards
+• Special UI badge in chat
+• Priority support
+• Access to supporter-only channels
+• Monthly exclusive card drop
+
+**Ideal for:** Regular players who want significant benefits
+""", "Best value tier! Includes all Copy perks.")
 
-USERS_FILE = "data/users.json"
-CARDS_FILE = "data/cards.json"
+
+@assets.embed("patreon:tui_tier")
+def _patreon_tui_tier():
+    return _tier_embed("🥇 TUI Tier - $20/month", 0xF1C40F, """
+**Ultimate experience for top supporters!**
+
+**Perks:**
+• +10 extra gacha pulls (22 total)
+• +200% daily bonus rewards (3x)
+• Exclusive TUI-only legendary cards
+• Special TUI badge in chat
+• VIP priority support
+• Access to supporter-only channels
+• Weekly exclusive card drops
+• Custom role color
+• Early access to new features
+
+**Ideal for:** Dedicated players who want the best experience
+""", "Premium tier! Includes all previous perks.")
+
+
+@assets.embed("patreon:how_to_get")
+def _patreon_how_to_get():
+    return _tier_embed("🔗 How to Become a Patron", 0x3498DB, """
+**Getting your Patreon perks is easy!**
+
+**Steps:**
+1. **Subscribe on Patreon** (link coming soon)
+2. **Get your Discord User ID** (right-click your profile → Copy ID)
+3. **Contact an admin** with your User ID
+4. **Receive your perks** instantly!
+
+**Or ask in #support channel for help!**
+
+**Current Admins:** Contact server moderators for assistance.
+""")
+
+
+@assets.embed("patreon:tiers")
+def _patreon_tiers():
+    embed = discord.Embed(
+        title="👑 Patreon Support Tiers",
+        description="Support our server and get amazing benefits!\n\n**All subscriptions last 30 days** and can be renewed anytime.",
+        color=0xF1C40F
+    )
+
+    embed.add_field(
+        name="🎯 Why Support Us?",
+        value="• Help keep the bot running 24/7\n• Get exclusive perks and benefits\n• Support development of new features\n• Join an amazing community",
+        inline=False
+    )
+
+    embed.add_field(
+        name="⏰ Subscription Details",
+        value="• **Duration:** 30 days\n• **Auto-renewal:** Manual (contact admin)\n• **Upgrades:** Pro-rated credit available\n• **Downgrades:** Takes effect next cycle",
+        inline=False
+    )
+
+    embed.set_footer(text="Click the buttons below to explore each tier!")
+    embed.set_thumbnail(
+        url="https://media.tenor.com/2RoDo8pZt6wAAAAC/black-clover-mobile-summon.gif")
+    return embed
+
+
+class PatreonView(discord.ui.View):
+    """Tier buttons for ls patreon; the pages are prebuilt assets."""
+
+    def __init__(self):
+        super().__init__(timeout=180)
+
+    @discord.ui.button(label="Copy Tier", style=discord.ButtonStyle.secondary, emoji="🥉")
+    async def copy_tier(self, interaction: discord.Interaction, button: discord.ui.Button):
+        embed = assets.get("patreon:copy_tier")
+        await interaction.response.edit_message(embed=embed, view=self)
+
+    @discord.ui.button(label="UI Tier", style=discord.ButtonStyle.primary, emoji="🥈")
+    async def ui_tier(self, interaction: discord.Interaction, button: discord.ui.Button):
+        embed = assets.get("patreon:ui_tier")
+        await interaction.response.edit_message(embed=embed, view=self)
+
+    @discord.ui.button(label="TUI Tier", style=discord.ButtonStyle.success, emoji="🥇")
+    async def tui_tier(self, interaction: discord.Interaction, button: discord.ui.Button):
+        embed = assets.get("patreon:tui_tier")
+        await interaction.response.edit_message(embed=embed, view=self)
+
+    @discord.ui.button(label="How to Get", style=discord.ButtonStyle.secondary, emoji="🔗")
+    async def how_to_get(self, interaction: discord.Interaction, button: discord.ui.Button):
+        embed = assets.get("patreon:how_to_get")
+        await interaction.response.edit_message(embed=embed, view=self)
+
+    @discord.ui.button(label="Close", style=discord.ButtonStyle.danger, emoji="❌")
+    async def close(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.edit_message(view=None)
 
 
 class Admin(commands.Cog):
@@ -16,63 +263,12 @@ class Admin(commands.Cog):
     async def cog_check(self, ctx):
         return ctx.author.id in config.ADMINS
 
-    def ensure_user(self, users, uid):
-        """Ensure user exists in database"""
-        if uid not in users:
-            users[uid] = {
-                "yen": 0,
-                "cards": [],
-                "fragments": {},
-                "unlocked": [],
-                "pulls": 12,
-                "chests": {},
-                "tickets": {},
-                "equipment": {},
-                "wins": 0,
-                "streak": 0,
-                "reset_tokens": 0
-            }
-        return users[uid]
 
-    def find_card(self, cards_db, search_name: str):
-        """Fuzzy find a card by name from cards.json.
-
-        Tries exact match, then substring, then fuzzy match using difflib.
-        Returns the card dict or None.
-        """
+    def find_card(self, search_name: str):
+        """Best catalog card for a typed name (shared search rules), or None."""
         if not search_name:
             return None
-
-        search = search_name.lower().strip()
-        if not search:
-            return None
-
-        # 1. Exact (case-insensitive)
-        for card in cards_db.values():
-            if card.get("name", "").lower() == search:
-                return card
-
-        # 2. Substring contains
-        partial_matches = [
-            card for card in cards_db.values()
-            if search in card.get("name", "").lower()
-        ]
-        if len(partial_matches) == 1:
-            return partial_matches[0]
-        if len(partial_matches) > 1:
-            # Pick the closest by fuzzy score
-            names = [c.get("name", "") for c in partial_matches]
-            best = get_close_matches(search_name, names, n=1, cutoff=0.0)
-            if best:
-                return next((c for c in partial_matches if c.get("name") == best[0]), partial_matches[0])
-
-        # 3. Fuzzy across all names
-        all_names = [c.get("name", "") for c in cards_db.values()]
-        best = get_close_matches(search_name, all_names, n=1, cutoff=0.6)
-        if best:
-            return next((c for c in cards_db.values() if c.get("name") == best[0]), None)
-
-        return None
+        return card_index().best(search_name)
 
     @commands.command(name="add")
     async def add(self, ctx, type: str, amount: int, member: discord.Member = None):
@@ -80,9 +276,8 @@ class Admin(commands.Cog):
         if member is None:
             member = ctx.author
 
-        users = load(USERS_FILE)
         uid = str(member.id)
-        user = self.ensure_user(users, uid)
+        user = user_store.ensure(uid)
 
         embed = discord.Embed(color=0x2ECC71)
         embed.set_author(
@@ -154,8 +349,7 @@ class Admin(commands.Cog):
             if not card_name:
                 return await ctx.send("❌ Specify card name. Usage: `ls add card <amount> @user <card_name>`")
 
-            cards_db = load(CARDS_FILE)
-            card_data = self.find_card(cards_db, card_name)
+            card_data = self.find_card(card_name)
             if not card_data:
                 return await ctx.send(f"❌ Card '{card_name}' not found in database!")
 
@@ -193,8 +387,7 @@ class Admin(commands.Cog):
             if not card_name:
                 return await ctx.send("❌ Specify card name. Usage: `ls add frag <amount> @user <card_name>`")
 
-            cards_db = load(CARDS_FILE)
-            card_data = self.find_card(cards_db, card_name)
+            card_data = self.find_card(card_name)
             if not card_data:
                 return await ctx.send(f"❌ Card '{card_name}' not found in database!")
 
@@ -227,7 +420,7 @@ class Admin(commands.Cog):
             )
             return await ctx.send(embed=embed)
 
-        save(USERS_FILE, users)
+        user_store.mark_dirty(uid)
         await ctx.send(embed=embed)
 
     @commands.command(name="remove", aliases=["rem"])
@@ -236,7 +429,7 @@ class Admin(commands.Cog):
         if member is None:
             member = ctx.author
 
-        users = load(USERS_FILE)
+        users = user_store.load()
         uid = str(member.id)
         if uid not in users:
             return await ctx.send(f"❌ {member.display_name} has no data.")
@@ -294,8 +487,7 @@ class Admin(commands.Cog):
             if not card_name:
                 return await ctx.send("❌ Specify card name. Usage: `ls remove frag <amount> @user <card_name>`")
 
-            cards_db = load(CARDS_FILE)
-            card_data = self.find_card(cards_db, card_name)
+            card_data = self.find_card(card_name)
             if not card_data:
                 return await ctx.send(f"❌ Card '{card_name}' not found in database!")
 
@@ -319,7 +511,7 @@ class Admin(commands.Cog):
         else:
             return await ctx.send("❌ Invalid type. Use: yen, pulls, reset, ticket, item, frag, chest")
 
-        save(USERS_FILE, users)
+        user_store.mark_dirty(uid)
         await ctx.send(embed=embed)
 
     @commands.command(name="set")
@@ -328,9 +520,8 @@ class Admin(commands.Cog):
         if member is None:
             member = ctx.author
 
-        users = load(USERS_FILE)
         uid = str(member.id)
-        user = self.ensure_user(users, uid)
+        user = user_store.ensure(uid)
 
         embed = discord.Embed(color=0x3498DB)
         embed.set_author(
@@ -360,7 +551,7 @@ class Admin(commands.Cog):
         else:
             return await ctx.send("❌ Invalid type. Use: yen, pulls, wins, streak, reset")
 
-        save(USERS_FILE, users)
+        user_store.mark_dirty(uid)
         await ctx.send(embed=embed)
 
     @commands.command(name="wipe")
@@ -369,12 +560,12 @@ class Admin(commands.Cog):
         if member is None:
             member = ctx.author
 
-        users = load(USERS_FILE)
+        users = user_store.load()
         uid = str(member.id)
 
         if uid in users:
             del users[uid]
-            save(USERS_FILE, users)
+            user_store.mark_dirty(uid)
             embed = discord.Embed(
                 title="🗑️ Data Wiped",
                 description=f"All data for **{member.mention}** has been wiped.",
@@ -396,7 +587,7 @@ class Admin(commands.Cog):
         if member is None:
             member = ctx.author
 
-        users = load(USERS_FILE)
+        users = user_store.load()
         uid = str(member.id)
         if uid not in users:
             return await ctx.send(f"❌ {member.display_name} has no data.")
@@ -421,7 +612,7 @@ class Admin(commands.Cog):
         else:
             return await ctx.send("❌ Invalid type. Use: cooldown, pulls, streak")
 
-        save(USERS_FILE, users)
+        user_store.mark_dirty(uid)
         await ctx.send(embed=embed)
 
     @commands.command(name="give")
@@ -435,7 +626,7 @@ class Admin(commands.Cog):
         if member is None:
             member = ctx.author
 
-        users = load(USERS_FILE)
+        users = user_store.load()
         uid = str(member.id)
         user = users.get(uid, {})
 
@@ -467,109 +658,62 @@ class Admin(commands.Cog):
 
         await ctx.send(embed=embed)
 
-    @commands.command(name="adminhelp", aliases=["ahelp"])
-    async def admin_help(self, ctx):
-        """Show admin-only command help. Usage: ls adminhelp"""
+    @commands.command(name="storage", aliases=["iostats"])
+    async def storage(self, ctx):
+        """Show background save stats. Usage: ls storage"""
+        stats = storage_io.stats()
         embed = discord.Embed(
-            title="🛠️ Admin Command Help",
-            description=(
-                "These commands are **admin-only** (checked via `config.ADMINS`).\n"
-                "Use them carefully, they directly modify player data."
-            ),
-            color=0xE67E22
+            title="💾 Storage",
+            color=0x5865F2
         )
         embed.set_author(
             name=f"Admin: {ctx.author.display_name}", icon_url=ctx.author.display_avatar.url)
-
-        embed.add_field(
-            name="➕ ls add",
-            value=(
-                "`ls add <type> <amount> [@user] ...`\n"
-                "Types: `yen`, `pulls`, `reset`, `ticket`, `item`, `card`, `frag`, `chest`\n"
-                "Examples:\n"
-                "• `ls add yen 100000 @user`\n"
-                "• `ls add card 1 @user Mira Kim` (fuzzy card search)\n"
-                "• `ls add frag 10 @user Mira` (fragments by card name)\n"
-                "• `ls add ticket 3 @user boss_ticket`\n"
-                "• `ls add chest 2 @user raid_chest_1`"
-            ),
-            inline=False
-        )
-
-        embed.add_field(
-            name="➖ ls remove / ls rem",
-            value=(
-                "`ls remove <type> <amount> [@user] ...`\n"
-                "Types: `yen`, `pulls`, `reset`, `ticket`, `item`, `frag`, `chest`\n"
-                "Examples:\n"
-                "• `ls remove yen 50000 @user`\n"
-                "• `ls rem frag 5 @user Mira`\n"
-                "• `ls rem ticket 1 @user boss_ticket`"
-            ),
-            inline=False
-        )
-
-        embed.add_field(
-            name="⚙️ ls set",
-            value=(
-                "`ls set <type> <value> [@user]`\n"
-                "Types: `yen`, `pulls`, `wins`, `streak`, `reset`\n"
-                "Examples:\n"
-                "• `ls set yen 250000 @user`\n"
-                "• `ls set pulls 12 @user`\n"
-                "• `ls set wins 50 @user`"
-            ),
-            inline=False
-        )
-
-        embed.add_field(
-            name="🧹 ls wipe",
-            value="`ls wipe [@user]` – Delete ALL stored data for a user.",
-            inline=False
-        )
-
-        embed.add_field(
-            name="🔄 ls reset",
-            value=(
-                "`ls reset <type> [@user]`\n"
-                "Types: `cooldown`, `pulls`, `streak`\n"
-                "Examples:\n"
-                "• `ls reset cooldown @user`\n"
-                "• `ls reset pulls @user`"
-            ),
-            inline=False
-        )
-
+        embed.add_field(name="📥 Queued Files",
+                        value=f"`{stats['queue_depth']}`", inline=True)
+        embed.add_field(name="✍️ Writes",
+                        value=f"`{stats['writes']:,}`", inline=True)
+        embed.add_field(name="🔗 Merged Saves",
+                        value=f"`{stats['coalesced']:,}`", inline=True)
         embed.add_field(
-            name="👤 ls userinfo / ls uinfo",
-            value="`ls userinfo [@user]` – Show a quick overview of a user's stored data.",
-            inline=False
+            name="⏱️ Write Time",
+            value=(f"Last: `{stats['last_write_ms']} ms`\n"
+                   f"Avg: `{stats['avg_write_ms']} ms`\n"
+                   f"Max: `{stats['max_write_ms']} ms`"),
+            inline=True
         )
+        embed.add_field(name="👤 Unsaved Users",
+                        value=f"`{user_store.dirty}`", inline=True)
 
-        embed.add_field(
-            name="👑 ls patreonadd / ls pa",
-            value="`ls patreonadd <user_id> [tier]` – Add Patreon status to a user (Admin only).",
-            inline=False
-        )
-
-        embed.add_field(
-            name="❌ ls patreonremove / ls pr",
-            value="`ls patreonremove <user_id>` – Remove Patreon status from a user (Admin only).",
-            inline=False
-        )
+        # Commands that rewrite the most records they didn't change
+        worst = sorted(user_store.command_stats.items(),
+                       key=lambda item: item[1]["written"] - item[1]["changed"], reverse=True)[:5]
+        if worst:
+            embed.add_field(
+                name="🧮 Records Written / Changed",
+                value="\n".join(
+                    f"`ls {name}` ×{s['calls']}: {s['written']} / {s['changed']} ({s['fields']} fields)"
+                    for name, s in worst),
+                inline=False
+            )
 
-        embed.add_field(
-            name="📋 ls patreonlist / ls pl",
-            value="`ls patreonlist` – List all current patrons (Admin only).",
-            inline=False
-        )
+        await ctx.send(embed=embed)
 
-        embed.add_field(
-            name="👑 ls patreon",
-            value="`ls patreon` – Interactive Patreon information and tiers.",
-            inline=False
-        )
+    @commands.command(name="sync")
+    async def sync(self, ctx):
+        """Push the slash commands to Discord now. Usage: ls sync"""
+        try:
+            synced = await sync_commands(self.bot.tree, force=True)
+        except Exception as e:
+            await ctx.send(f"❌ Failed to sync slash commands: {e}")
+            return
+        await ctx.send(f"✅ Synced `{synced}` slash commands.")
 
+    @commands.command(name="adminhelp", aliases=["ahelp"])
+    async def admin_help(self, ctx):
+        """Show admin-only command help. Usage: ls adminhelp"""
+        embed = assets.get("admin:help")
+        embed.set_author(
+            name=f"Admin: {ctx.author.display_name}", icon_url=ctx.author.display_avatar.url)
         await ctx.send(embed=embed)
 
     @commands.command(name="patreonadd", aliases=["pa"])
@@ -609,13 +753,10 @@ class Admin(commands.Cog):
                 return
 
             # Store Patreon info in user data
-            users = load(USERS_FILE)
             uid = str(user_id)
+            user = user_store.ensure(uid)
 
-            if uid not in users:
-                users[uid] = {}
-
-            users[uid]["patreon"] = {
+            user["patreon"] = {
                 "tier": tier,
                 "name": tier_info["name"],
                 "added_at": int(time.time()),
@@ -626,13 +767,13 @@ class Admin(commands.Cog):
 
             # Apply perks immediately
             if tier == "1":
-                users[uid]["max_pulls"] = 14  # +2 extra pulls
+                user["max_pulls"] = 14  # +2 extra pulls
             elif tier == "2":
-                users[uid]["max_pulls"] = 17  # +5 extra pulls
+                user["max_pulls"] = 17  # +5 extra pulls
             elif tier == "3":
-                users[uid]["max_pulls"] = 22  # +10 extra pulls
+                user["max_pulls"] = 22  # +10 extra pulls
 
-            save(USERS_FILE, users)
+            user_store.mark_dirty(uid)
 
             # Try to assign Discord role if role_id is set
             guild = ctx.guild
@@ -678,7 +819,7 @@ class Admin(commands.Cog):
                 return
 
             # Remove Patreon info from user data
-            users = load(USERS_FILE)
+            users = user_store.load()
             uid = str(user_id)
 
             if uid in users and "patreon" in users[uid]:
@@ -688,7 +829,7 @@ class Admin(commands.Cog):
                 # Reset max pulls to default
                 users[uid]["max_pulls"] = 12
 
-                save(USERS_FILE, users)
+                user_store.mark_dirty(uid)
 
                 embed = discord.Embed(
                     title="❌ Patreon Status Removed",
@@ -707,10 +848,9 @@ class Admin(commands.Cog):
     async def patreon_list(self, ctx):
         """List all current patrons"""
 
-        users = load(USERS_FILE)
         patrons = []
 
-        for uid, user_data in users.items():
+        for uid, user_data in user_store.scan():
             if "patreon" in user_data:
                 user = self.bot.get_user(int(uid))
                 if user:
@@ -739,18 +879,17 @@ class Admin(commands.Cog):
 
         await ctx.send(embed=embed)
 
-    def check_patreon_expiration(self, users):
+    def check_patreon_expiration(self):
         """Check and remove expired Patreon subscriptions"""
         now = int(time.time())
-        expired_users = []
+        expired_users = [uid for uid, user_data in user_store.scan()
+                         if "patreon" in user_data and user_data["patreon"]["expires_at"] <= now]
 
-        for uid, user_data in users.items():
-            if "patreon" in user_data:
-                if user_data["patreon"]["expires_at"] <= now:
-                    expired_users.append(uid)
-                    # Remove Patreon status
-                    del user_data["patreon"]
-                    user_data["max_pulls"] = 12  # Reset to default
+        for uid in expired_users:
+            user_data = user_store.get(uid)
+            # Remove Patreon status
+            user_data.pop("patreon", None)
+            user_data["max_pulls"] = 12  # Reset to default
 
         return expired_users
 
@@ -759,136 +898,11 @@ class Admin(commands.Cog):
         """Interactive Patreon information command"""
 
         # Check for expired subscriptions
-        users = load(USERS_FILE)
-        expired = self.check_patreon_expiration(users)
+        expired = self.check_patreon_expiration()
         if expired:
-            save(USERS_FILE, users)
-
-        # Create interactive Patreon info view
-        class PatreonView(discord.ui.View):
-            def __init__(self):
-                super().__init__(timeout=180)
-
-            @discord.ui.button(label="Copy Tier", style=discord.ButtonStyle.secondary, emoji="🥉")
-            async def copy_tier(self, interaction: discord.Interaction, button: discord.ui.Button):
-                embed = discord.Embed(
-                    title="🥉 Copy Tier - $5/month",
-                    color=0xC0C0C0
-                )
-                embed.description = """
-**Perfect for starting supporters!**
-                
-**Perks:**
-• +2 extra gacha pulls (14 total)
-• +50% daily bonus rewards
-• Special Copy badge in chat
-• Priority support
-• Access to supporter-only channels
-                
-**Ideal for:** Casual players who want a small boost
-"""
-                embed.set_footer(
-                    text="Upgrade anytime! Benefits stack with higher tiers.")
-                await interaction.response.edit_message(embed=embed, view=self)
-
-            @discord.ui.button(label="UI Tier", style=discord.ButtonStyle.primary, emoji="🥈")
-            async def ui_tier(self, interaction: discord.Interaction, button: discord.ui.Button):
-                embed = discord.Embed(
-                    title="🥈 UI Tier - $10/month",
-                    color=0x9B59B6
-                )
-                embed.description = """
-**Great value for dedicated players!**
-
-**Perks:**
-• +5 extra gacha pulls (17 total)
-• +100% daily bonus rewards (2x)
-• Exclusive UI-only cards
-• Special UI badge in chat
-• Priority support
-• Access to supporter-only channels
-• Monthly exclusive card drop
-                
-**Ideal for:** Regular players who want significant benefits
-"""
-                embed.set_footer(
-                    text="Best value tier! Includes all Copy perks.")
-                await interaction.response.edit_message(embed=embed, view=self)
-
-            @discord.ui.button(label="TUI Tier", style=discord.ButtonStyle.success, emoji="🥇")
-            async def tui_tier(self, interaction: discord.Interaction, button: discord.ui.Button):
-                embed = discord.Embed(
-                    title="🥇 TUI Tier - $20/month",
-                    color=0xF1C40F
-                )
-                embed.description = """
-**Ultimate experience for top supporters!**
-
-**Perks:**
-• +10 extra gacha pulls (22 total)
-• +200% daily bonus rewards (3x)
-• Exclusive TUI-only legendary cards
-• Special TUI badge in chat
-• VIP priority support
-• Access to supporter-only channels
-• Weekly exclusive card drops
-• Custom role color
-• Early access to new features
-                
-**Ideal for:** Dedicated players who want the best experience
-"""
-                embed.set_footer(
-                    text="Premium tier! Includes all previous perks.")
-                await interaction.response.edit_message(embed=embed, view=self)
-
-            @discord.ui.button(label="How to Get", style=discord.ButtonStyle.link, emoji="🔗")
-            async def how_to_get(self, interaction: discord.Interaction, button: discord.ui.Button):
-                embed = discord.Embed(
-                    title="🔗 How to Become a Patron",
-                    color=0x3498DB
-                )
-                embed.description = """
-**Getting your Patreon perks is easy!**
-
-**Steps:**
-1. **Subscribe on Patreon** (link coming soon)
-2. **Get your Discord User ID** (right-click your profile → Copy ID)
-3. **Contact an admin** with your User ID
-4. **Receive your perks** instantly!
-
-**Or ask in #support channel for help!**
-
-**Current Admins:** Contact server moderators for assistance.
-"""
-                await interaction.response.edit_message(embed=embed, view=self)
-
-            @discord.ui.button(label="Close", style=discord.ButtonStyle.danger, emoji="❌")
-            async def close(self, interaction: discord.Interaction, button: discord.ui.Button):
-                await interaction.response.edit_message(view=None)
-
-        # Main Patreon info embed
-        embed = discord.Embed(
-            title="👑 Patreon Support Tiers",
-            description="Support our server and get amazing benefits!\n\n**All subscriptions last 30 days** and can be renewed anytime.",
-            color=0xF1C40F
-        )
-
-        embed.add_field(
-            name="🎯 Why Support Us?",
-            value="• Help keep the bot running 24/7\n• Get exclusive perks and benefits\n• Support development of new features\n• Join an amazing community",
-            inline=False
-        )
-
-        embed.add_field(
-            name="⏰ Subscription Details",
-            value="• **Duration:** 30 days\n• **Auto-renewal:** Manual (contact admin)\n• **Upgrades:** Pro-rated credit available\n• **Downgrades:** Takes effect next cycle",
-            inline=False
-        )
-
-        embed.set_footer(text="Click the buttons below to explore each tier!")
-        embed.set_thumbnail(
-            url="https://media.tenor.com/2RoDo8pZt6wAAAAC/black-clover-mobile-summon.gif")
+            user_store.mark_dirty(*expired)
 
+        embed = assets.get("patreon:tiers")
         await ctx.send(embed=embed, view=PatreonView())
 
 
@@ -1,34 +1,33 @@
 import discord
 import random
-from difflib import get_close_matches
+import config
+from discord import app_commands
 from discord.ext import commands
 from discord.ui import View, Button, button
-from utils.database import load, save
+from utils import autocomplete
+from utils.battle_engine import BossFight, Duel
+from utils.database import asave, load, user_store
+from utils.catalog import catalog
 from utils.game_math import compute_stats
+from utils.matchmaking import MatchIndex
+from utils.odds import simulate_duel
+from utils.search import boss_index, find_name
+from utils.factions import factions
+from utils.teams import team_cache
 
-USERS_FILE = "data/users.json"
-CARDS_FILE = "data/cards.json"
 GANGS_FILE = "data/gangs.json"
-RARITIES_FILE = "data/rarities.json"
-BOSS_FILE = "data/bosses.json"
 
 
 class BattleView(View):
     """Interactive battle view with card selection buttons"""
 
-    def __init__(self, ctx, my_team, en_team, target, ensure_user_func):
+    def __init__(self, ctx, my_team, en_team, target):
         super().__init__(timeout=300)
         self.ctx = ctx
         self.my_team = my_team
         self.en_team = en_team
         self.target = target
-        self.ensure_user = ensure_user_func
-        self.turn = 0
-        self.max_turns = 15
-        self.my_team_battle = [{"name": c["name"], "atk": c["atk"],
-                                "hp": c["hp"], "max_hp": c["max_hp"]} for c in my_team]
-        self.en_team_battle = [{"name": c["name"], "atk": c["atk"],
-                                "hp": c["hp"], "max_hp": c["max_hp"]} for c in en_team]
+        self.battle = Duel(my_team, en_team, max_turns=15)
         self.log = []
         self.battle_active = True
         self.msg = None
@@ -48,66 +47,40 @@ class BattleView(View):
 
     async def process_attack(self, interaction, card_index):
         """Process an attack from selected card"""
-        if card_index < 0 or card_index >= len(self.my_team_battle):
+        mine, theirs = self.battle.sides
+        if card_index < 0 or card_index >= len(mine.members):
             await interaction.response.send_message("❌ Invalid card selection!", ephemeral=True)
             return
 
-        attacker = self.my_team_battle[card_index]
-        if attacker['hp'] <= 0:
+        if not mine.members[card_index].alive:
             await interaction.response.send_message("❌ This card is already defeated!", ephemeral=True)
             return
 
-        # Find alive enemy
-        p2_alive = [c for c in self.en_team_battle if c['hp'] > 0]
-        if not p2_alive:
+        if not theirs.alive:
             await interaction.response.defer()
             await self.end_battle(True)
             return
 
-        # Attack
-        defender = random.choice(p2_alive)
-        dmg = int(attacker['atk'] * (0.8 + random.random() * 0.4))
-        defender['hp'] = max(0, defender['hp'] - dmg)
-        hp_percent = int((defender['hp'] / defender['max_hp'])
-                         * 100) if defender['max_hp'] > 0 else 0
-        self.log.append(
-            f"🔵 **{attacker['name']}** → **{defender['name']}** `{dmg}` dmg ({hp_percent}% HP)")
-
-        # Enemy counter-attack
-        p1_alive = [c for c in self.my_team_battle if c['hp'] > 0]
-        if p1_alive and any(c['hp'] > 0 for c in self.en_team_battle):
-            enemy_atk = random.choice(
-                [c for c in self.en_team_battle if c['hp'] > 0])
-            my_def = random.choice(p1_alive)
-            enemy_dmg = int(enemy_atk['atk'] * (0.8 + random.random() * 0.4))
-            my_def['hp'] = max(0, my_def['hp'] - enemy_dmg)
-            my_hp_percent = int(
-                (my_def['hp'] / my_def['max_hp']) * 100) if my_def['max_hp'] > 0 else 0
+        for event in self.battle.attack(card_index):
+            icon = "🔵" if event.actor.side == 0 else "🔴"
             self.log.append(
-                f"🔴 **{enemy_atk['name']}** → **{my_def['name']}** `{enemy_dmg}` dmg ({my_hp_percent}% HP)")
+                f"{icon} **{event.actor.name}** → **{event.target.name}** `{event.amount}` dmg ({event.target.hp_percent}% HP)")
 
-        self.turn += 1
-
-        # Check win conditions
-        p1_alive = [c for c in self.my_team_battle if c['hp'] > 0]
-        p2_alive = [c for c in self.en_team_battle if c['hp'] > 0]
-
-        if not p1_alive or not p2_alive or self.turn >= self.max_turns:
+        if self.battle.finished:
             await interaction.response.defer()
-            await self.end_battle(any(c['hp'] > 0 for c in self.my_team_battle))
+            await self.end_battle(self.battle.side_a_won)
         else:
             # Update embed
             await self.update_battle_embed(interaction)
 
     async def update_battle_embed(self, interaction):
         """Update battle embed with current state"""
-        p1_alive = [c for c in self.my_team_battle if c['hp'] > 0]
-        p2_alive = [c for c in self.en_team_battle if c['hp'] > 0]
+        mine, theirs = self.battle.sides
 
         embed = discord.Embed(
             title="⚔️ Battle in Progress!",
             description=(
-                f"**Turn {self.turn}**\n\n"
+                f"**Turn {self.battle.turn}**\n\n"
                 f"🔵 **{self.ctx.author.display_name}'s Team** 🆚 🔴 **{self.target.display_name}'s Team**"
             ),
             color=0xF1C40F
@@ -119,12 +92,12 @@ class BattleView(View):
         embed.set_thumbnail(url=self.target.display_avatar.url)
 
         my_team_text = "\n".join([
-            f"• **{c['name']}** (Strength: {c['atk']} | Health: {c['hp']}/{c['max_hp']})"
-            for c in self.my_team_battle
+            f"• **{c.name}** (Strength: {c.atk} | Health: {c.hp}/{c.max_hp})"
+            for c in mine.members
         ])
         en_team_text = "\n".join([
-            f"• **{c['name']}** (Strength: {c['atk']} | Health: {c['hp']}/{c['max_hp']})"
-            for c in self.en_team_battle
+            f"• **{c.name}** (Strength: {c.atk} | Health: {c.hp}/{c.max_hp})"
+            for c in theirs.members
         ])
 
         embed.add_field(
@@ -153,45 +126,36 @@ class BattleView(View):
         winner = self.ctx.author if p1_win else self.target
 
         # Update stats and grant EXP rewards
-        users = load(USERS_FILE)
-        author_user = self.ensure_user(users, str(self.ctx.author.id))
-        target_user = self.ensure_user(users, str(self.target.id))
-
-        if p1_win:
-            author_user["wins"] = author_user.get("wins", 0) + 1
-            author_user["streak"] = author_user.get("streak", 0) + 1
-            target_user["streak"] = 0
-        else:
-            target_user["wins"] = target_user.get("wins", 0) + 1
-            target_user["streak"] = target_user.get("streak", 0) + 1
-            author_user["streak"] = 0
-
-        # Get card names for both teams
-        winner_cards = [c["name"] for c in (
-            self.my_team_battle if p1_win else self.en_team_battle)]
-        loser_cards = [c["name"] for c in (
-            self.en_team_battle if p1_win else self.my_team_battle)]
+        async with user_store.transaction(self.ctx.author.id, self.target.id):
+            author_user = user_store.ensure(str(self.ctx.author.id))
+            target_user = user_store.ensure(str(self.target.id))
+
+            if p1_win:
+                author_user["wins"] = author_user.get("wins", 0) + 1
+                author_user["streak"] = author_user.get("streak", 0) + 1
+                target_user["streak"] = 0
+            else:
+                target_user["wins"] = target_user.get("wins", 0) + 1
+                target_user["streak"] = target_user.get("streak", 0) + 1
+                author_user["streak"] = 0
 
-        # Grant EXP rewards using our new system
-        winner_id = self.ctx.author.id if p1_win else self.target.id
-        loser_id = self.target.id if p1_win else self.ctx.author.id
+            # Get card names for both teams
+            mine, theirs = self.battle.sides
+            winner_cards = [c.name for c in (mine if p1_win else theirs).members]
+            loser_cards = [c.name for c in (theirs if p1_win else mine).members]
 
-        rewards = self._grant_battle_rewards(
-            winner_id, loser_id, winner_cards, loser_cards)
+            # Grant EXP rewards using our new system
+            winner_id = self.ctx.author.id if p1_win else self.target.id
+            loser_id = self.target.id if p1_win else self.ctx.author.id
 
-        save(USERS_FILE, users)
+            rewards = self.ctx.cog._grant_battle_rewards(
+                winner_id, loser_id, winner_cards, loser_cards)
 
         # Gang EXP reward for winner, if in a gang
         try:
-            gangs = load(GANGS_FILE)
-            winner_id_str = str(winner.id)
-            winner_gang = None
-            winner_gid = None
-            for gid, g in gangs.items():
-                if winner_id_str in g.get("members", []):
-                    winner_gid = gid
-                    winner_gang = g
-                    break
+            winner_gid = factions.gang_of(winner.id)
+            gangs = load(GANGS_FILE) if winner_gid is not None else {}
+            winner_gang = gangs.get(winner_gid)
 
             gang_exp_awarded = 0
             if winner_gang is not None:
@@ -200,7 +164,7 @@ class BattleView(View):
                 gang_exp_awarded = random.randint(20, 50)
                 winner_gang["exp"] += gang_exp_awarded
                 gangs[winner_gid] = winner_gang
-                save(GANGS_FILE, gangs)
+                await asave(GANGS_FILE, gangs)
         except Exception:
             gang_exp_awarded = 0
 
@@ -208,7 +172,7 @@ class BattleView(View):
         result_embed = discord.Embed(
             title=f"🏆 {winner.display_name} Wins!",
             description=(
-                f"**Battle lasted {self.turn} turns**\n"
+                f"**Battle lasted {self.battle.turn} turns**\n"
                 "\n**Highlights:**\n" + "\n".join(self.log[:10])
             ),
             color=0x2ECC71 if p1_win else 0xE74C3C
@@ -231,14 +195,14 @@ class BattleView(View):
             )
 
         if p1_win:
-            remaining = [c['name'] for c in self.my_team_battle if c['hp'] > 0]
+            remaining = [c.name for c in self.battle.sides[0].members if c.alive]
             result_embed.add_field(
                 name="🔵 Remaining Team",
                 value=", ".join(remaining) if remaining else "None",
                 inline=True
             )
         else:
-            remaining = [c['name'] for c in self.en_team_battle if c['hp'] > 0]
+            remaining = [c.name for c in self.battle.sides[1].members if c.alive]
             result_embed.add_field(
                 name="🔴 Remaining Team",
                 value=", ".join(remaining) if remaining else "None",
@@ -270,6 +234,13 @@ class CardAttackButton(Button):
 class Combat(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.matchmaking = MatchIndex(self._team_power, self._fight_uids)
+        user_store.subscribe(self.matchmaking.mark_stale)
+        factions.subscribe(self.matchmaking.mark_stale)
+
+    def cog_unload(self):
+        user_store.unsubscribe(self.matchmaking.mark_stale)
+        factions.unsubscribe(self.matchmaking.mark_stale)
 
     def _get_gang_multiplier(self, uid: int) -> float:
         """Return stat multiplier based on user's gang/crew level.
@@ -279,42 +250,8 @@ class Combat(commands.Cog):
         - crew: level = exp // 150_000
         Multiplier = 1 + (level * 0.02).
         """
-        try:
-            gangs = load(GANGS_FILE)
-        except Exception:
-            return 1.0
-
-        uid_str = str(uid)
-        for _, g in gangs.items():
-            if uid_str in g.get("members", []):
-                exp = int(g.get("exp", 0))
-                gtype = g.get("type", "gang")
-                threshold = 50000 if gtype == "gang" else 150000
-                level = exp // threshold if threshold > 0 else 0
-                return 1.0 + (level * 0.02)
-
-        return 1.0
-
-    def ensure_user(self, users, uid):
-        """Ensure user exists in database"""
-        if uid not in users:
-            users[uid] = {
-                "yen": 0,
-                "cards": [],
-                "fragments": {},
-                "unlocked": [],
-                "pulls": 12,
-                "chests": {},
-                "tickets": {},
-                "equipment": {},
-                "wins": 0,
-                "streak": 0,
-                "last_pull_regen_ts": 0,
-                "last_claim_ts": 0,
-                "reset_tokens": 0,
-                "team": []
-            }
-        return users[uid]
+        return factions.multiplier(uid)
+
 
     def _add_card_exp(self, user, card_name, exp_amount):
         """Add experience to a card and handle leveling up"""
@@ -332,10 +269,13 @@ class Combat(commands.Cog):
                 card['level'] = new_level
 
                 # Recalculate stats based on new level
-                base_stats = compute_stats(card)
-                card['atk'] = base_stats['atk'] + (new_level - 1) * 2
-                card['hp'] = base_stats['hp'] + (new_level - 1) * 5
-                card['max_hp'] = card['hp']
+                base = catalog.card_by_name(card_name)
+                if base:
+                    base_stats = compute_stats(base, new_level, card.get(
+                        'aura', 0), card.get('equipped_item_id'))
+                    card['atk'] = base_stats['attack'] + (new_level - 1) * 2
+                    card['hp'] = base_stats['health'] + (new_level - 1) * 5
+                    card['max_hp'] = card['hp']
 
                 return new_level > current_level
         return False
@@ -356,10 +296,9 @@ class Combat(commands.Cog):
 
     def _grant_battle_rewards(self, winner_id, loser_id, winner_cards, loser_cards):
         """Grant EXP rewards after battle"""
-        users = load(USERS_FILE)
 
         # Winner rewards
-        winner = self.ensure_user(users, str(winner_id))
+        winner = user_store.ensure(str(winner_id))
         winner_account_leveled = self._add_account_exp(
             winner, random.randint(10, 20))
 
@@ -368,15 +307,17 @@ class Combat(commands.Cog):
             if self._add_card_exp(winner, card_name, random.randint(10, 30)):
                 card_levelups.append(card_name)
 
-        # Loser rewards
-        loser = self.ensure_user(users, str(loser_id))
-        loser_account_leveled = self._add_account_exp(
-            loser, random.randint(5, 10))
+        # Loser rewards (raids have no loser)
+        loser_account_leveled = False
+        if loser_id is not None:
+            loser = user_store.ensure(str(loser_id))
+            loser_account_leveled = self._add_account_exp(
+                loser, random.randint(5, 10))
 
-        for card_name in loser_cards:
-            self._add_card_exp(loser, card_name, random.randint(5, 10))
+            for card_name in loser_cards:
+                self._add_card_exp(loser, card_name, random.randint(5, 10))
 
-        save(USERS_FILE, users)
+        user_store.mark_dirty(*(uid for uid in (winner_id, loser_id) if uid is not None))
 
         return {
             'winner_account_leveled': winner_account_leveled,
@@ -389,99 +330,23 @@ class Combat(commands.Cog):
 
         Prefers the saved team (user['team']) of card names, up to 4.
         Falls back to the first 4 owned cards if no team is set.
+        Served from the shared team cache; repeat fights don't recompute stats.
         """
-        users = load(USERS_FILE)
-        cards_db = load(CARDS_FILE)
-        user = self.ensure_user(users, str(uid))
-        # Ensure team key exists for older data
-        user.setdefault("team", [])
-        save(USERS_FILE, users)  # Save if new user was created / upgraded
-
-        user_cards = user.get("cards", [])
-        if not user_cards:
-            return []
+        return team_cache.get(uid, self._get_gang_multiplier(uid))
 
-        # Helper: find first card object by name from user's owned cards
-        def find_owned_card_by_name(name: str):
-            for c in user_cards:
-                if c.get('name') == name:
-                    return c
-            return None
+    def _team_power(self, uid):
+        """Matchmaking score: total atk + hp of the team get_team() would field."""
+        team = team_cache.get(uid, self._get_gang_multiplier(uid))
+        return sum(c["atk"] + c["hp"] for c in team)
 
-        # Gang/crew level multiplier
-        mult = self._get_gang_multiplier(uid)
-
-        team_data = []
-        team_names = user.get("team", [])
-
-        # 1. Use saved team names if present
-        if team_names:
-            for name in team_names[:4]:
-                owned = find_owned_card_by_name(name)
-                if not owned:
-                    continue
-                base = next((v for v in cards_db.values() if v.get(
-                    'name') == owned.get('name')), None)
-                if not base:
-                    continue
-                stats = compute_stats(base, owned.get('level', 1), owned.get(
-                    'aura', 0), owned.get('equipped_item_id'))
-                atk = int(stats['attack'] * mult)
-                hp = int(stats['health'] * mult)
-                team_data.append({
-                    "name": owned['name'],
-                    "atk": atk,
-                    "hp": hp,
-                    "max_hp": hp
-                })
-
-        # 2. Fallback: if no valid team entries, use first 4 owned cards
-        if not team_data:
-            for c in user_cards[:4]:
-                base = next((v for v in cards_db.values()
-                            if v.get('name') == c.get('name')), None)
-                if not base:
-                    continue
-                stats = compute_stats(base, c.get('level', 1), c.get(
-                    'aura', 0), c.get('equipped_item_id'))
-                atk = int(stats['attack'] * mult)
-                hp = int(stats['health'] * mult)
-                team_data.append({
-                    "name": c['name'],
-                    "atk": atk,
-                    "hp": hp,
-                    "max_hp": hp
-                })
-
-        return team_data
+    def _fight_uids(self):
+        return [uid for uid, _ in user_store.scan() if uid.isdigit()]
 
     def _fuzzy_find_owned_card_name(self, user, search_name: str):
-        """Fuzzy search for an owned card name in user's collection."""
+        """Best match for `search_name` among the user's owned card names, or None."""
         if not search_name:
             return None
-        cards = user.get("cards", [])
-        owned_names = [c.get("name", "") for c in cards]
-        if not owned_names:
-            return None
-
-        # Exact (case insensitive)
-        lower = search_name.lower().strip()
-        for n in owned_names:
-            if n.lower() == lower:
-                return n
-
-        # Substring
-        partial = [n for n in owned_names if lower in n.lower()]
-        if len(partial) == 1:
-            return partial[0]
-        if len(partial) > 1:
-            best = get_close_matches(search_name, partial, n=1, cutoff=0.0)
-            if best:
-                return best[0]
-
-        # Fuzzy across all names
-        best = get_close_matches(search_name, owned_names, n=1, cutoff=0.6)
-        return best[0] if best else None
+        return find_name({c.get("name", "") for c in user.get("cards", [])}, search_name)
 
     async def start_battle(self, ctx, target: discord.Member):
         """Shared battle setup for challenge/fight commands."""
@@ -501,10 +366,8 @@ class Combat(commands.Cog):
             )
             return await ctx.send(embed=embed)
 
-        users = load(USERS_FILE)
         my_team = self.get_team(ctx.author.id)
         en_team = self.get_team(target.id)
-        save(USERS_FILE, users)  # Save in case new users were created
 
         if not my_team:
             embed = discord.Embed(
@@ -559,7 +422,7 @@ class Combat(commands.Cog):
             text="Click a card button to attack with that card!")
 
         # Create battle view with buttons
-        view = BattleView(ctx, my_team, en_team, target, self.ensure_user)
+        view = BattleView(ctx, my_team, en_team, target)
         msg = await ctx.send(embed=init_embed, view=view)
         view.msg = msg
 
@@ -576,49 +439,55 @@ class Combat(commands.Cog):
 
         await self.start_battle(ctx, target)
 
-    @commands.command(name="fight")
-    async def fight(self, ctx):
-        """Find a random player and start a fight. Usage: ls fight"""
-        guild = ctx.guild
-        if guild is None:
+    @commands.command(name="odds", aliases=["winrate"])
+    async def odds(self, ctx, target: discord.Member = None):
+        """Estimate your chances against a player without fighting. Usage: ls odds @user"""
+        if not target or target.bot or target.id == ctx.author.id:
             embed = discord.Embed(
-                title="❌ Guild Only",
-                description="You can only use `ls fight` inside a server.",
+                title="❌ Invalid Target",
+                description="Please mention another **real player**!\nUsage: `ls odds @user`",
                 color=0xE74C3C
             )
             return await ctx.send(embed=embed)
 
-        users = load(USERS_FILE)
-        candidate_members = []
-        for uid_str in users.keys():
-            try:
-                uid = int(uid_str)
-            except ValueError:
-                continue
-            if uid == ctx.author.id:
-                continue
-            member = guild.get_member(uid)
-            if not member or member.bot:
-                continue
-            if self.get_team(uid):
-                candidate_members.append(member)
-
-        if not candidate_members:
+        my_team = self.get_team(ctx.author.id)
+        en_team = self.get_team(target.id)
+        if not my_team or not en_team:
             embed = discord.Embed(
-                title="❌ No Opponents Found",
-                description="No suitable opponents found. Other players must have at least one card to fight.",
+                title="❌ No Team",
+                description="Both players need cards to compare teams! Use `ls pull` to get characters.",
                 color=0xE74C3C
             )
             return await ctx.send(embed=embed)
 
-        target = random.choice(candidate_members)
-        await self.start_battle(ctx, target)
+        result = simulate_duel(my_team, en_team)
+        embed = discord.Embed(
+            title="🎲 Battle Odds",
+            description=f"**{ctx.author.display_name}** 🆚 **{target.display_name}**",
+            color=0x2ECC71 if result.win_rate >= 0.5 else 0xE74C3C
+        )
+        embed.set_author(name="Player vs Player Battle",
+                         icon_url=ctx.author.display_avatar.url)
+        embed.set_thumbnail(url=target.display_avatar.url)
+        embed.add_field(name="🏆 Win Chance",
+                        value=f"`{result.win_rate:.1%}`", inline=True)
+        embed.add_field(name="⏱️ Average Length",
+                        value=f"`{result.avg_turns:.1f}` turns", inline=True)
+        embed.add_field(
+            name="💥 Your Damage",
+            value=(f"Low: `{result.damage['p10']:,}`\n"
+                   f"Typical: `{result.damage['p50']:,}`\n"
+                   f"High: `{result.damage['p90']:,}`"),
+            inline=True
+        )
+        embed.set_footer(
+            text=f"Simulated {result.battles:,} battles in {result.elapsed_ms:.0f} ms. Use `ls challenge` to fight for real!")
+        await ctx.send(embed=embed)
 
     @commands.command(name="team", aliases=["teamview", "myteam"])
     async def team_view(self, ctx):
         """View your active team. Usage: ls team"""
-        users = load(USERS_FILE)
-        user = self.ensure_user(users, str(ctx.author.id))
+        user = user_store.ensure(str(ctx.author.id))
         user.setdefault("team", [])
         cards = user.get("cards", [])
 
@@ -648,87 +517,6 @@ class Combat(commands.Cog):
                          icon_url=ctx.author.display_avatar.url)
         await ctx.send(embed=embed)
 
-    @commands.command(name="teamadd")
-    async def team_add(self, ctx, *, card_name: str = None):
-        """Add a card to your active team (max 4). Usage: ls teamadd <card name>"""
-        if not card_name:
-            return await ctx.send("❌ Usage: `ls teamadd <card name>`")
-
-        users = load(USERS_FILE)
-        user = self.ensure_user(users, str(ctx.author.id))
-        user.setdefault("team", [])
-
-        if len(user["team"]) >= 4:
-            return await ctx.send("❌ Your team is already full (max 4 cards). Use `ls teamremove` to free a slot.")
-
-        owned_name = self._fuzzy_find_owned_card_name(user, card_name)
-        if not owned_name:
-            return await ctx.send(f"❌ You don't own any card matching: **{card_name}**")
-
-        if owned_name in user["team"]:
-            return await ctx.send(f"❌ **{owned_name}** is already in your team.")
-
-        user["team"].append(owned_name)
-        save(USERS_FILE, users)
-
-        embed = discord.Embed(
-            title="✅ Team Updated",
-            description=f"**{owned_name}** has been added to your team.",
-            color=0x2ECC71
-        )
-        embed.set_author(name=ctx.author.display_name,
-                         icon_url=ctx.author.display_avatar.url)
-        await ctx.send(embed=embed)
-
-    @commands.command(name="teamremove")
-    async def team_remove(self, ctx, *, card_name: str = None):
-        """Remove a card from your active team. Usage: ls teamremove <card name>"""
-        if not card_name:
-            return await ctx.send("❌ Usage: `ls teamremove <card name>` or `ls teamremoveall`")
-
-        users = load(USERS_FILE)
-        user = self.ensure_user(users, str(ctx.author.id))
-        user.setdefault("team", [])
-
-        if not user["team"]:
-            return await ctx.send("❌ You have no cards in your team.")
-
-        owned_name = self._fuzzy_find_owned_card_name(user, card_name)
-        if not owned_name or owned_name not in user["team"]:
-            return await ctx.send(f"❌ **{card_name}** is not in your current team.")
-
-        user["team"] = [n for n in user["team"] if n != owned_name]
-        save(USERS_FILE, users)
-
-        embed = discord.Embed(
-            title="✅ Team Updated",
-            description=f"**{owned_name}** has been removed from your team.",
-            color=0xE67E22
-        )
-        embed.set_author(name=ctx.author.display_name,
-                         icon_url=ctx.author.display_avatar.url)
-        await ctx.send(embed=embed)
-
-    @commands.command(name="teamremoveall", aliases=["teamclear"])
-    async def team_remove_all(self, ctx):
-        """Remove all cards from your active team. Usage: ls teamremoveall"""
-        users = load(USERS_FILE)
-        user = self.ensure_user(users, str(ctx.author.id))
-        user.setdefault("team", [])
-
-        if not user["team"]:
-            return await ctx.send("ℹ️ Your team is already empty. Battles will use your first 4 cards by default.")
-
-        user["team"] = []
-        save(USERS_FILE, users)
-
-        embed = discord.Embed(
-            title="✅ Team Cleared",
-            description="Your active team has been cleared. Battles will now use your first 4 owned cards by default.",
-            color=0xE74C3C
-        )
-        return await ctx.send(embed=embed)
-
     @commands.command(name="fight")
     async def fight(self, ctx):
         """Find a random player and start a fight. Usage: ls fight"""
@@ -741,22 +529,12 @@ class Combat(commands.Cog):
             )
             return await ctx.send(embed=embed)
 
-        users = load(USERS_FILE)
-        candidate_members = []
-        for uid_str in users.keys():
-            try:
-                uid = int(uid_str)
-            except ValueError:
-                continue
-            if uid == ctx.author.id:
-                continue
-            member = guild.get_member(uid)
-            if not member or member.bot:
-                continue
-            if self.get_team(uid):
-                candidate_members.append(member)
-
-        if not candidate_members:
+        # Prefer someone of similar team power; falls back to anyone in the server
+        target_id = self.matchmaking.pick(
+            guild, ctx.author.id, band=config.FIGHT_POWER_BAND)
+        target = guild.get_member(target_id) if target_id else None
+
+        if target is None:
             embed = discord.Embed(
                 title="❌ No Opponents Found",
                 description="No suitable opponents found. Other players must have at least one card to fight.",
@@ -764,14 +542,24 @@ class Combat(commands.Cog):
             )
             return await ctx.send(embed=embed)
 
-    @commands.command(name="teamadd")
+        await self.start_battle(ctx, target)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        self.matchmaking.member_joined(member)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        self.matchmaking.member_left(member)
+
+    @commands.hybrid_command(name="teamadd")
+    @app_commands.autocomplete(card_name=autocomplete.owned_cards)
     async def team_add(self, ctx, *, card_name: str = None):
         """Add a card to your active team (max 4). Usage: ls teamadd <card name>"""
         if not card_name:
             return await ctx.send("❌ Usage: `ls teamadd <card name>`")
 
-        users = load(USERS_FILE)
-        user = self.ensure_user(users, str(ctx.author.id))
+        user = user_store.ensure(str(ctx.author.id))
         user.setdefault("team", [])
 
         if len(user["team"]) >= 4:
@@ -785,7 +573,7 @@ class Combat(commands.Cog):
             return await ctx.send(f"❌ **{owned_name}** is already in your team.")
 
         user["team"].append(owned_name)
-        save(USERS_FILE, users)
+        user_store.mark_dirty(ctx.author.id)
 
         embed = discord.Embed(
             title="✅ Team Updated",
@@ -802,8 +590,7 @@ class Combat(commands.Cog):
         if not card_name:
             return await ctx.send("❌ Usage: `ls teamremove <card name>` or `ls teamremoveall`")
 
-        users = load(USERS_FILE)
-        user = self.ensure_user(users, str(ctx.author.id))
+        user = user_store.ensure(str(ctx.author.id))
         user.setdefault("team", [])
 
         if not user["team"]:
@@ -814,7 +601,7 @@ class Combat(commands.Cog):
             return await ctx.send(f"❌ **{card_name}** is not in your current team.")
 
         user["team"] = [n for n in user["team"] if n != owned_name]
-        save(USERS_FILE, users)
+        user_store.mark_dirty(ctx.author.id)
 
         embed = discord.Embed(
             title="✅ Team Updated",
@@ -828,15 +615,14 @@ class Combat(commands.Cog):
     @commands.command(name="teamremoveall", aliases=["teamclear"])
     async def team_remove_all(self, ctx):
         """Remove all cards from your active team. Usage: ls teamremoveall"""
-        users = load(USERS_FILE)
-        user = self.ensure_user(users, str(ctx.author.id))
+        user = user_store.ensure(str(ctx.author.id))
         user.setdefault("team", [])
 
         if not user["team"]:
             return await ctx.send("ℹ️ Your team is already empty. Battles will use your first 4 cards by default.")
 
         user["team"] = []
-        save(USERS_FILE, users)
+        user_store.mark_dirty(ctx.author.id)
 
         embed = discord.Embed(
             title="✅ Team Cleared",
@@ -852,8 +638,7 @@ class Combat(commands.Cog):
         """Boss raid team management. Usage: ls brt <subcommand>"""
         if ctx.invoked_subcommand is None:
             # Show the team by default
-            users = load(USERS_FILE)
-            user = self.ensure_user(users, str(ctx.author.id))
+            user = user_store.ensure(str(ctx.author.id))
             user.setdefault("boss_raid_team", [])
             cards = user.get("cards", [])
 
@@ -890,8 +675,7 @@ class Combat(commands.Cog):
         if not card_name:
             return await ctx.send("❌ Usage: `ls brt add <card name>`")
 
-        users = load(USERS_FILE)
-        user = self.ensure_user(users, str(ctx.author.id))
+        user = user_store.ensure(str(ctx.author.id))
         user.setdefault("boss_raid_team", [])
 
         print(f"DEBUG: Trying to add card: {card_name}")
@@ -911,7 +695,7 @@ class Combat(commands.Cog):
             return await ctx.send(f"❌ **{owned_name}** is already in your boss raid team.")
 
         user["boss_raid_team"].append(owned_name)
-        save(USERS_FILE, users)
+        user_store.mark_dirty(ctx.author.id)
         print(f"DEBUG: Added {owned_name} to boss raid team")
 
         embed = discord.Embed(
@@ -929,8 +713,7 @@ class Combat(commands.Cog):
         if not card_name:
             return await ctx.send("❌ Usage: `ls brt remove <card name>`")
 
-        users = load(USERS_FILE)
-        user = self.ensure_user(users, str(ctx.author.id))
+        user = user_store.ensure(str(ctx.author.id))
         user.setdefault("boss_raid_team", [])
 
         if not user["boss_raid_team"]:
@@ -942,7 +725,7 @@ class Combat(commands.Cog):
 
         user["boss_raid_team"] = [
             n for n in user["boss_raid_team"] if n != owned_name]
-        save(USERS_FILE, users)
+        user_store.mark_dirty(ctx.author.id)
 
         embed = discord.Embed(
             title="✅ Boss Raid Team Updated",
@@ -956,8 +739,7 @@ class Combat(commands.Cog):
     @boss_raid_team.command(name="view")
     async def brt_view(self, ctx):
         """View your boss raid team. Usage: ls brt view"""
-        users = load(USERS_FILE)
-        user = self.ensure_user(users, str(ctx.author.id))
+        user = user_store.ensure(str(ctx.author.id))
         user.setdefault("boss_raid_team", [])
         cards = user.get("cards", [])
 
@@ -987,31 +769,8 @@ class Combat(commands.Cog):
                          icon_url=ctx.author.display_avatar.url)
         await ctx.send(embed=embed)
 
-    def _fuzzy_find_owned_card_name(self, user, search_name):
-        """Find owned card by name with fuzzy matching"""
-        cards = user.get("cards", [])
-        card_names = [card.get('name', '') for card in cards]
-
-        search_lower = search_name.lower()
-
-        # Exact match first
-        for name in card_names:
-            if name.lower() == search_lower:
-                return name
-
-        # Partial match
-        matches = [name for name in card_names if search_lower in name.lower()]
-        if len(matches) == 1:
-            return matches[0]
-        if len(matches) > 1:
-            # Use difflib for fuzzy matching
-            from difflib import get_close_matches
-            best = get_close_matches(search_name, matches, n=1, cutoff=0.6)
-            return best[0] if best else None
-
-        return None
-
-    @commands.command(name="bossraid")
+    @commands.hybrid_command(name="bossraid")
+    @app_commands.autocomplete(boss_name=autocomplete.bosses)
     async def raid(self, ctx, *, boss_name: str = None):
         """Start a boss raid using a specific ticket. Usage: ls bossraid <boss_name>"""
         print(f"DEBUG: Received boss_name: '{boss_name}'")
@@ -1019,48 +778,28 @@ class Combat(commands.Cog):
         if not boss_name:
             return await ctx.send("❌ Usage: `ls bossraid <boss_name>`\nExample: `ls bossraid Zack Lee`\n\nAvailable bosses: Zack Lee, Vasco, Eli Jang, Jake Kim, OG Daniel, Johan Seong, Jinyeong Park, Daniel Park (SB), James Lee, Goo Kim, Shingen Yamazaki, Gapryong Kim, Gun Park")
 
-        users = load(USERS_FILE)
-        user = self.ensure_user(users, str(ctx.author.id))
+        user = user_store.ensure(str(ctx.author.id))
 
-        # Load boss data
-        try:
-            bosses = load(BOSS_FILE)
-        except Exception:
+        bosses = catalog.bosses
+        if not bosses:
             return await ctx.send("❌ Could not load boss data!")
 
         # Check if boss exists
         boss_key = None
 
-        # Try exact key match first
+        # Exact key, then the shared name search (exact name, prefix, substring, typo)
         if boss_name in bosses:
             boss_key = boss_name
         else:
-            # Try exact name match
-            for key, data in bosses.items():
-                if data['name'].lower() == boss_name.lower():
-                    boss_key = key
-                    break
-
-            # If still not found, try fuzzy matching
+            boss_key = boss_index().best(boss_name)
             if not boss_key:
-                available_names = [bosses[key]['name']
-                                   for key in bosses.keys()]
-                from difflib import get_close_matches
-                name_close_matches = get_close_matches(
-                    boss_name, available_names, n=1, cutoff=0.6)
-                if name_close_matches:
-                    # Find the key for this name
-                    for key, name in zip(bosses.keys(), available_names):
-                        if name == name_close_matches[0]:
-                            boss_key = key
-                            break
-                else:
-                    embed = discord.Embed(
-                        title="❌ Boss Not Found",
-                        description=f"Boss '**{boss_name}**' not found!\n\nAvailable bosses: {', '.join(available_names)}",
-                        color=0xE74C3C
-                    )
-                    return await ctx.send(embed=embed)
+                available_names = [data['name'] for data in bosses.values()]
+                embed = discord.Embed(
+                    title="❌ Boss Not Found",
+                    description=f"Boss '**{boss_name}**' not found!\n\nAvailable bosses: {', '.join(available_names)}",
+                    color=0xE74C3C
+                )
+                return await ctx.send(embed=embed)
 
         if not boss_key:
             embed = discord.Embed(
@@ -1222,13 +961,13 @@ class Combat(commands.Cog):
         message = await ctx.send(embed=embed, view=view)
         view.message = message
 
-    @commands.command(name="kill")
+    @commands.hybrid_command(name="kill")
+    @app_commands.autocomplete(killer=autocomplete.owned_fragments, victim=autocomplete.owned_fragments)
     async def kill_command(self, ctx, killer: str = None, victim: str = None, amount: str = None):
         """Kill fragments to gain aura points. Usage: ls kill <killer> <victim> <number/all>"""
         print(
             f"DEBUG: Kill command called with killer={killer}, victim={victim}, amount={amount}")
-        users = load(USERS_FILE)
-        user = self.ensure_user(users, str(ctx.author.id))
+        user = user_store.ensure(str(ctx.author.id))
         fragments = user.get("fragments", {})
         print(f"DEBUG: User fragments: {fragments}")
 
@@ -1310,16 +1049,13 @@ class Combat(commands.Cog):
                 return await ctx.send(embed=embed)
 
             # Get victim card data to determine rarity
-            cards_db = load(CARDS_FILE)
-            victim_base = next((c for c in cards_db.values()
-                               if c.get('name') == victim_fragment), None)
+            victim_base = catalog.card_by_name(victim_fragment)
             if not victim_base:
                 return await ctx.send("❌ Could not find victim card data!")
 
             # Get aura drop value based on rarity
-            rarities = load(RARITIES_FILE)
             rarity = victim_base.get('rarity', 'C')
-            rarity_info = rarities.get(rarity, {})
+            rarity_info = catalog.rarity(rarity)
             aura_per_kill = rarity_info.get('aura_drop', 5)
 
             # Calculate total aura gained
@@ -1345,7 +1081,7 @@ class Combat(commands.Cog):
                 user['aura_balance'] += total_aura
 
             user['fragments'] = fragments
-            save(USERS_FILE, users)
+            user_store.mark_dirty(ctx.author.id)
 
             # Create result embed
             embed = discord.Embed(
@@ -1382,26 +1118,8 @@ class Combat(commands.Cog):
             await ctx.send(embed=embed)
 
     def _find_fragment(self, fragments, search_name):
-        """Find fragment by name with fuzzy matching"""
-        search_lower = search_name.lower()
-
-        # Exact match first
-        for name in fragments.keys():
-            if name.lower() == search_lower and fragments[name] > 0:
-                return name
-
-        # Partial match
-        matches = [name for name in fragments.keys()
-                   if search_lower in name.lower() and fragments[name] > 0]
-        if len(matches) == 1:
-            return matches[0]
-        if len(matches) > 1:
-            # Use difflib for fuzzy matching
-            from difflib import get_close_matches
-            best = get_close_matches(search_name, matches, n=1, cutoff=0.6)
-            return best[0] if best else None
-
-        return None
+        """Best match for `search_name` among fragments the user has (count > 0), or None."""
+        return find_name((name for name, count in fragments.items() if count > 0), search_name)
 
 
 class BossTicketView(View):
@@ -1429,8 +1147,7 @@ class BossTicketView(View):
             return
 
         # Consume the host's ticket
-        users = load(USERS_FILE)
-        user = self.ensure_user(users, str(self.host.id))
+        user = user_store.ensure(str(self.host.id))
         tickets = user.get("tickets", {})
 
         # Try to consume ticket using multiple formats
@@ -1455,7 +1172,7 @@ class BossTicketView(View):
             if tickets[ticket_key] <= 0:
                 del tickets[ticket_key]
             user["tickets"] = tickets
-            save(USERS_FILE, users)
+            user_store.mark_dirty(self.host.id)
             print(f"DEBUG: Consumed 1 {ticket_key} ticket")
         else:
             print(f"DEBUG: No ticket found to consume!")
@@ -1573,8 +1290,7 @@ class BossTicketView(View):
             return
 
         # Check if user has boss raid team
-        users = load(USERS_FILE)
-        user = self.ensure_user(users, str(interaction.user.id))
+        user = user_store.ensure(str(interaction.user.id))
         boss_raid_team = user.get("boss_raid_team", [])
 
         if not boss_raid_team:
@@ -1686,44 +1402,28 @@ class BossRaidView(View):
         self.ctx = ctx
         self.boss = boss
         self.all_players = all_players  # List of (player, cards) tuples
-        self.boss_hp = boss['hp']
-        self.boss_max_hp = boss['hp']
-        self.turn = 0
-        self.max_turns = 20
-        self.player_teams_battle = []
+        self.players = {player.id: player for player, _ in all_players}
+        self.battle = BossFight(
+            boss, [(player.id, cards) for player, cards in all_players], max_turns=20)
         self.log = []
         self.raid_active = True
-        self.player_turns = {}  # Track which player's turn it is
-
-        # Initialize battle data for each player
-        for player, cards in all_players:
-            self.player_teams_battle.append({
-                'player': player,
-                'cards': [{"name": c["name"], "atk": c["atk"], "hp": c["hp"], "max_hp": c["max_hp"]} for c in cards]
-            })
-            # All players can act initially
-            self.player_turns[player.id] = True
-
-    def get_player_cards(self, player_id):
-        """Get a player's cards in battle"""
-        for team_data in self.player_teams_battle:
-            if team_data['player'].id == player_id:
-                return team_data['cards']
-        return []
+
+    @property
+    def current_player(self):
+        """Player whose turn it is (first player who hasn't acted this round)"""
+        return self.players.get(self.battle.current)
 
     def get_alive_cards(self, player_id):
         """Get a player's alive cards"""
-        cards = self.get_player_cards(player_id)
-        return [c for c in cards if c['hp'] > 0]
+        return self.battle.alive_cards(player_id)
 
     def create_card_button(self, card, player):
         """Create a button for a specific card"""
-        label = f"⚔️ {card['name']}"
-        custom_id = f"card_{player.id}_{card['name']}"
+        label = f"⚔️ {card.name}"
+        custom_id = f"card_{player.id}_{card.name}"
 
         # Disable button if card is dead or player already acted
-        disabled = card['hp'] <= 0 or not self.player_turns.get(
-            player.id, False)
+        disabled = not card.alive or player.id in self.battle.acted
 
         return Button(label=label, style=discord.ButtonStyle.primary, custom_id=custom_id, disabled=disabled, row=0)
 
@@ -1731,13 +1431,7 @@ class BossRaidView(View):
         """Update view buttons to show only current player's cards"""
         self.clear_items()
 
-        # Find current player (first player who hasn't acted)
-        current_player = None
-        for player, _ in self.all_players:
-            if self.player_turns.get(player.id, False):
-                current_player = player
-                break
-
+        current_player = self.current_player
         if not current_player:
             return  # No valid player turn
 
@@ -1761,121 +1455,88 @@ class BossRaidView(View):
 
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
         """Only allow the current player to interact"""
-        current_player = None
-        for player, _ in self.all_players:
-            if self.player_turns.get(player.id, False):
-                current_player = player
-                break
-
+        current_player = self.current_player
         if current_player and interaction.user.id == current_player.id:
             return True
 
         await interaction.response.send_message("It's not your turn!", ephemeral=True)
         return False
 
+    def log_events(self, events):
+        """Turn engine events into battle log lines"""
+        defending = bool(events) and events[0].kind == "defend"
+        for event in events:
+            if event.kind == "defend":
+                self.log.append(
+                    f"🛡️ **{self.players[event.actor].display_name}**'s team takes a defensive stance!")
+            elif event.kind == "heal":
+                self.log.append(
+                    f"💚 **{self.players[event.actor.owner].display_name}'s {event.actor.name}** heals for `{event.amount}` HP!")
+            elif event.kind == "pass":
+                self.log.append(
+                    f"⏭️ **{self.players[event.actor].display_name}** ends their turn!")
+            elif event.actor is self.battle.boss:
+                target = f"**{self.players[event.target.owner].display_name}'s {event.target.name}**"
+                if defending:
+                    self.log.append(
+                        f"🛡️ **{self.boss['name']}** deals `{event.amount}` reduced damage to {target}!")
+                else:
+                    self.log.append(
+                        f"💀 **{self.boss['name']}** deals `{event.amount}` damage to {target}!")
+            else:
+                self.log.append(
+                    f"⚔️ **{self.players[event.actor.owner].display_name}'s {event.actor.name}** deals `{event.amount}` damage to **{self.boss['name']}**!")
+
     async def handle_card_attack(self, interaction: discord.Interaction, player, card_name):
         """Handle card attack"""
         if not self.raid_active:
             await interaction.response.send_message("The raid has ended!", ephemeral=True)
             return
 
-        player_cards = self.get_alive_cards(player.id)
-        attacker = next(
-            (c for c in player_cards if c['name'] == card_name), None)
-
-        if not attacker:
+        events = self.battle.attack(player.id, card_name)
+        if events is None:
             await interaction.response.send_message("Card not found or defeated!", ephemeral=True)
             return
 
-        # Attack boss
-        dmg = int(attacker['atk'] * (0.8 + random.random() * 0.4))
-        self.boss_hp = max(0, self.boss_hp - dmg)
-
-        self.log.append(
-            f"⚔️ **{player.display_name}'s {attacker['name']}** deals `{dmg}` damage to **{self.boss['name']}**!")
-
-        # Boss counter-attacks random player
-        if self.boss_hp > 0:
-            all_alive_cards = []
-            for team_data in self.player_teams_battle:
-                for card in team_data['cards']:
-                    if card['hp'] > 0:
-                        all_alive_cards.append((team_data['player'], card))
-
-            if all_alive_cards:
-                target_player, target_card = random.choice(all_alive_cards)
-                boss_dmg = int(self.boss['atk'] *
-                               (0.9 + random.random() * 0.3))
-                target_card['hp'] = max(0, target_card['hp'] - boss_dmg)
-                self.log.append(
-                    f"💀 **{self.boss['name']}** deals `{boss_dmg}` damage to **{target_player.display_name}'s {target_card['name']}**!")
-
-        # End player's turn
-        self.player_turns[player.id] = False
-
+        self.log_events(events)
         await self.process_turn(interaction)
 
     async def process_turn(self, interaction):
-        """Process turn logic and check for win/lose conditions"""
-        self.turn += 1
-
-        # Check if boss is defeated
-        if self.boss_hp <= 0:
-            await self.end_raid(True)
-            return
-
-        # Check if all players are defeated
-        all_alive = False
-        for team_data in self.player_teams_battle:
-            for card in team_data['cards']:
-                if card['hp'] > 0:
-                    all_alive = True
-                    break
-            if all_alive:
-                break
-
-        if not all_alive or self.turn >= self.max_turns:
-            await self.end_raid(False)
+        """Check for win/lose conditions after an action"""
+        if self.battle.finished:
+            await self.end_raid(self.battle.victory)
             return
 
-        # Reset turns for next round
-        if all(not acted for acted in self.player_turns.values()):
-            for player_id in self.player_turns:
-                self.player_turns[player_id] = True
-
         await self.update_raid_display(interaction)
 
     async def update_raid_display(self, interaction):
         """Update the raid display"""
         self.update_view_buttons()
+        boss = self.battle.boss
 
         embed = discord.Embed(
             title=f"🐉 Boss Raid: {self.boss['name']}",
-            description=f"Turn `{self.turn}`/`{self.max_turns}`",
+            description=f"Turn `{self.battle.turn}`/`{self.battle.max_turns}`",
             color=0xDC143C
         )
 
         # Boss HP
-        boss_hp_percent = (self.boss_hp / self.boss_max_hp) * 100
+        boss_hp_percent = (boss.hp / boss.max_hp) * 100
         embed.add_field(
             name=f"🐉 {self.boss['name']} HP",
-            value=f"`{self.boss_hp}`/`{self.boss_max_hp}` ({boss_hp_percent:.1f}%)",
+            value=f"`{boss.hp}`/`{boss.max_hp}` ({boss_hp_percent:.1f}%)",
             inline=False
         )
 
         # Show all players' teams
-        for team_data in self.player_teams_battle:
-            player = team_data['player']
-            cards = team_data['cards']
-
+        for player, _ in self.all_players:
+            turn_status = "⏸️" if player.id in self.battle.acted else "🔄"
             team_status = []
-            for card in cards:
-                hp_percent = (card['hp'] / card['max_hp']) * 100
-                status = "💀" if card['hp'] <= 0 else "✅"
-                turn_status = "🔄" if self.player_turns.get(
-                    player.id, False) else "⏸️"
+            for card in self.battle.cards[player.id]:
+                hp_percent = (card.hp / card.max_hp) * 100
+                status = "✅" if card.alive else "💀"
                 team_status.append(
-                    f"{status}{turn_status} **{card['name']}**: `{card['hp']}`/`{card['max_hp']}` ({hp_percent:.1f}%)")
+                    f"{status}{turn_status} **{card.name}**: `{card.hp}`/`{card.max_hp}` ({hp_percent:.1f}%)")
 
             embed.add_field(
                 name=f"🃏 {player.display_name}'s Team",
@@ -1884,12 +1545,7 @@ class BossRaidView(View):
             )
 
         # Current turn indicator
-        current_player = None
-        for player, _ in self.all_players:
-            if self.player_turns.get(player.id, False):
-                current_player = player
-                break
-
+        current_player = self.current_player
         if current_player:
             embed.add_field(
                 name="🎯 Current Turn",
@@ -1916,13 +1572,7 @@ class BossRaidView(View):
             await interaction.response.send_message("The raid has ended!", ephemeral=True)
             return
 
-        # Find current player
-        current_player = None
-        for player, _ in self.all_players:
-            if self.player_turns.get(player.id, False):
-                current_player = player
-                break
-
+        current_player = self.current_player
         if not current_player or interaction.user.id != current_player.id:
             await interaction.response.send_message("It's not your turn!", ephemeral=True)
             return
@@ -1932,81 +1582,33 @@ class BossRaidView(View):
         if custom_id.startswith('card_'):
             # Card attack
             parts = custom_id.split('_')
-            player_id = int(parts[1])
             card_name = '_'.join(parts[2:])  # Handle card names with spaces
 
             await self.handle_card_attack(interaction, current_player, card_name)
 
         elif custom_id == 'defend':
-            # Defend action
-            self.log.append(
-                f"🛡️ **{current_player.display_name}**'s team takes a defensive stance!")
-
             # Boss attacks with reduced damage
-            if self.boss_hp > 0:
-                all_alive_cards = []
-                for team_data in self.player_teams_battle:
-                    for card in team_data['cards']:
-                        if card['hp'] > 0:
-                            all_alive_cards.append((team_data['player'], card))
-
-                if all_alive_cards:
-                    target_player, target_card = random.choice(all_alive_cards)
-                    boss_dmg = int(self.boss['atk'] *
-                                   (0.5 + random.random() * 0.2))
-                    target_card['hp'] = max(0, target_card['hp'] - boss_dmg)
-                    self.log.append(
-                        f"🛡️ **{self.boss['name']}** deals `{boss_dmg}` reduced damage to **{target_player.display_name}'s {target_card['name']}**!")
-
-            self.player_turns[current_player.id] = False
+            self.log_events(self.battle.defend(current_player.id))
             await self.process_turn(interaction)
 
         elif custom_id == 'heal':
-            # Heal action
-            alive_cards = self.get_alive_cards(current_player.id)
-            if not alive_cards:
+            # Heal a random alive card; boss still attacks
+            events = self.battle.heal(current_player.id)
+            if events is None:
                 await interaction.response.send_message("No alive cards to heal!", ephemeral=True)
                 return
-
-            target_card = random.choice(alive_cards)
-            heal_amount = int(target_card['max_hp'] * 0.3)
-            target_card['hp'] = min(
-                target_card['max_hp'], target_card['hp'] + heal_amount)
-            self.log.append(
-                f"💚 **{current_player.display_name}'s {target_card['name']}** heals for `{heal_amount}` HP!")
-
-            # Boss still attacks
-            if self.boss_hp > 0:
-                all_alive_cards = []
-                for team_data in self.player_teams_battle:
-                    for card in team_data['cards']:
-                        if card['hp'] > 0:
-                            all_alive_cards.append((team_data['player'], card))
-
-                if all_alive_cards:
-                    target_player, target_card = random.choice(all_alive_cards)
-                    boss_dmg = int(self.boss['atk'] *
-                                   (0.9 + random.random() * 0.3))
-                    target_card['hp'] = max(0, target_card['hp'] - boss_dmg)
-                    self.log.append(
-                        f"💀 **{self.boss['name']}** deals `{boss_dmg}` damage to **{target_player.display_name}'s {target_card['name']}**!")
-
-            self.player_turns[current_player.id] = False
+            self.log_events(events)
             await self.process_turn(interaction)
 
         elif custom_id == 'end_turn':
             # End turn without action
-            self.log.append(
-                f"⏭️ **{current_player.display_name}** ends their turn!")
-            self.player_turns[current_player.id] = False
+            self.log_events(self.battle.pass_turn(current_player.id))
             await self.process_turn(interaction)
 
     async def end_raid(self, victory):
         """End the boss raid"""
         self.raid_active = False
 
-        users = load(USERS_FILE)
-
         if victory:
             # Victory rewards for all players
             embed = discord.Embed(
@@ -2016,7 +1618,7 @@ class BossRaidView(View):
             )
 
             for player, original_cards in self.all_players:
-                user = self.ensure_user(users, str(player.id))
+                user = user_store.ensure(str(player.id))
 
                 # Random reward
                 rewards = random.choice([
@@ -2038,17 +1640,13 @@ class BossRaidView(View):
                     user['chests']['common'] += 1
 
                 # Grant EXP rewards for surviving cards
-                team_data = next(
-                    (td for td in self.player_teams_battle if td['player'].id == player.id), None)
-                if team_data:
-                    winner_cards = [c["name"]
-                                    for c in team_data['cards'] if c['hp'] > 0]
-                    if winner_cards:
-                        battle_rewards = self._grant_battle_rewards(
-                            player.id, 0, winner_cards, [])
-                        if battle_rewards['card_levelups']:
-                            embed.add_field(name=f"⭐ {player.display_name}'s Level Ups!", value=", ".join(
-                                battle_rewards['card_levelups']), inline=False)
+                winner_cards = [c.name for c in self.battle.alive_cards(player.id)]
+                if winner_cards:
+                    battle_rewards = self.ctx.cog._grant_battle_rewards(
+                        player.id, None, winner_cards, [])
+                    if battle_rewards['card_levelups']:
+                        embed.add_field(name=f"⭐ {player.display_name}'s Level Ups!", value=", ".join(
+                            battle_rewards['card_levelups']), inline=False)
         else:
             embed = discord.Embed(
                 title="💀 Boss Raid Defeated",
@@ -2056,7 +1654,7 @@ class BossRaidView(View):
                 color=0xE74C3C
             )
 
-        save(USERS_FILE, users)
+        user_store.mark_dirty(*(player.id for player, _ in self.all_players))
 
         # Disable all buttons
         for child in self.children:
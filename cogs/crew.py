@@ -1,14 +1,16 @@
 import discord
 import time
 import random
+from discord import app_commands
 from discord.ext import commands
 from discord.ui import View, Button
-from utils.database import load, save
-from utils.game_math import compute_stats
-import config
+from utils import autocomplete
+from utils.battle_engine import Duel
+from utils.database import asave, load, user_store
+from utils.factions import factions, territory_key
+from utils.teams import team_cache
 
 CREWS_FILE = "data/crews.json"
-USERS_FILE = "data/users.json"
 GANGS_FILE = "data/gangs.json"
 WHITETIGER_FILE = "data/whitetiger.json"
 
@@ -16,20 +18,14 @@ WHITETIGER_FILE = "data/whitetiger.json"
 class CaptureBattleView(View):
     """Interactive battle UI for territory capture with clean vertical layout"""
 
-    def __init__(self, ctx, my_team, en_team, defender_name, ensure_user_func, on_end_callback):
+    def __init__(self, ctx, my_team, en_team, defender_name, on_end_callback):
         super().__init__(timeout=300)
         self.ctx = ctx
         self.my_team = my_team
         self.en_team = en_team
         self.defender_name = defender_name
-        self.ensure_user = ensure_user_func
         self.on_end = on_end_callback
-        self.turn = 0
-        self.max_turns = 15
-        self.my_team_battle = [{"name": c["name"], "atk": c["atk"],
-                                "hp": c["hp"], "max_hp": c["max_hp"]} for c in my_team]
-        self.en_team_battle = [{"name": c["name"], "atk": c["atk"],
-                                "hp": c["hp"], "max_hp": c["max_hp"]} for c in en_team]
+        self.battle = Duel(my_team, en_team, max_turns=15)
         self.log = []
         self.battle_active = True
         self.msg = None
@@ -53,70 +49,49 @@ class CaptureBattleView(View):
         return True
 
     async def process_attack(self, interaction, card_index):
-        if card_index < 0 or card_index >= len(self.my_team_battle):
+        mine, theirs = self.battle.sides
+        if card_index < 0 or card_index >= len(mine.members):
             await interaction.response.send_message("❌ Invalid card selection!", ephemeral=True)
             return
 
-        attacker = self.my_team_battle[card_index]
-        if attacker['hp'] <= 0:
+        if not mine.members[card_index].alive:
             await interaction.response.send_message("❌ This card is already defeated!", ephemeral=True)
             return
 
-        p2_alive = [c for c in self.en_team_battle if c['hp'] > 0]
-        if not p2_alive:
+        if not theirs.alive:
             await interaction.response.defer()
             await self.end_battle(True)
             return
 
-        d = random.choice(p2_alive)
-        dmg = int(attacker['atk'] * (0.8 + random.random() * 0.4))
-        d['hp'] = max(0, d['hp'] - dmg)
-        hp_percent = int((d['hp'] / d['max_hp']) *
-                         100) if d['max_hp'] > 0 else 0
-        self.log.append(
-            f"🔵 **{attacker['name']}** → **{d['name']}** `{dmg}` dmg ({hp_percent}% HP)")
-
-        p1_alive = [c for c in self.my_team_battle if c['hp'] > 0]
-        if p1_alive and any(c['hp'] > 0 for c in self.en_team_battle):
-            e = random.choice([c for c in self.en_team_battle if c['hp'] > 0])
-            t = random.choice(p1_alive)
-            edmg = int(e['atk'] * (0.8 + random.random() * 0.4))
-            t['hp'] = max(0, t['hp'] - edmg)
-            thp_percent = int((t['hp'] / t['max_hp']) *
-                              100) if t['max_hp'] > 0 else 0
+        for event in self.battle.attack(card_index):
+            icon = "🔵" if event.actor.side == 0 else "🔴"
             self.log.append(
-                f"🔴 **{e['name']}** → **{t['name']}** `{edmg}` dmg ({thp_percent}% HP)")
+                f"{icon} **{event.actor.name}** → **{event.target.name}** `{event.amount}` dmg ({event.target.hp_percent}% HP)")
 
-        self.turn += 1
-
-        p1_alive = [c for c in self.my_team_battle if c['hp'] > 0]
-        p2_alive = [c for c in self.en_team_battle if c['hp'] > 0]
-
-        if not p1_alive or not p2_alive or self.turn >= self.max_turns:
+        if self.battle.finished:
             await interaction.response.defer()
-            await self.end_battle(any(c['hp'] > 0 for c in self.my_team_battle))
+            await self.end_battle(self.battle.side_a_won)
         else:
             await self.update_battle_embed(interaction)
 
     async def update_battle_embed(self, interaction):
-        p1_alive = [c for c in self.my_team_battle if c['hp'] > 0]
-        p2_alive = [c for c in self.en_team_battle if c['hp'] > 0]
+        mine, theirs = self.battle.sides
 
         embed = discord.Embed(
             title="⚔️ Territory Battle",
-            description=f"**Turn {self.turn}**\n\n🔵 **{self.ctx.author.display_name}** vs 🔴 **{self.defender_name}**",
+            description=f"**Turn {self.battle.turn}**\n\n🔵 **{self.ctx.author.display_name}** vs 🔴 **{self.defender_name}**",
             color=0xF1C40F
         )
         embed.set_author(name="Territory Capture",
                          icon_url=self.ctx.author.display_avatar.url)
 
         my_team_text = "\n".join([
-            f"• **{c['name']}** (Str: {c['atk']} | HP: {c['hp']}/{c['max_hp']})"
-            for c in self.my_team_battle
+            f"• **{c.name}** (Str: {c.atk} | HP: {c.hp}/{c.max_hp})"
+            for c in mine.members
         ])
         en_team_text = "\n".join([
-            f"• **{c['name']}** (Str: {c['atk']} | HP: {c['hp']}/{c['max_hp']})"
-            for c in self.en_team_battle
+            f"• **{c.name}** (Str: {c.atk} | HP: {c.hp}/{c.max_hp})"
+            for c in theirs.members
         ])
 
         embed.add_field(name="🔵 Your Team", value=my_team_text, inline=False)
@@ -161,47 +136,25 @@ class CaptureAttackButton(Button):
 class Crew(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        # (factions.territory_version, embed): rebuilt only after territories change hands
+        self._map = None
 
-    def ensure_user(self, users, uid):
-        """Ensure user exists in database"""
-        if uid not in users:
-            users[uid] = {
-                "yen": 0,
-                "cards": [],
-                "fragments": {},
-                "unlocked": [],
-                "pulls": 12,
-                "chests": {},
-                "tickets": {},
-                "equipment": {},
-                "wins": 0,
-                "streak": 0,
-                "last_pull_regen_ts": 0,
-                "last_claim_ts": 0,
-                "reset_tokens": 0,
-                "crew_name": None
-            }
-        return users[uid]
 
     def get_gang_for_user(self, uid):
-        """Find gang (if any) for a user by scanning gangs.json."""
-        try:
-            gangs = load(GANGS_FILE)
-        except Exception:
+        """Find gang (if any) for a user via the faction index."""
+        gid = factions.gang_of(uid)
+        if gid is None:
             return None, None
-        uid_str = str(uid)
-        for gid, g in gangs.items():
-            if uid_str in g.get("members", []):
-                return gid, g
-        return None, None
+        gang = load(GANGS_FILE).get(gid)
+        return (gid, gang) if gang is not None else (None, None)
 
     def get_crew(self, uid):
-        """Get crew that user belongs to (existing helper, kept)."""
-        crews = load(CREWS_FILE)
-        for cid, crew in crews.items():
-            if str(uid) in crew.get('members', []):
-                return cid, crew
-        return None, None
+        """Get crew that user belongs to"""
+        cid = factions.crew_of(uid)
+        if cid is None:
+            return None, None
+        crew = load(CREWS_FILE).get(cid)
+        return (cid, crew) if crew is not None else (None, None)
 
     def _get_player_faction(self, uid):
         """Return ('gang' or 'crew', id, data) for the player's faction, preferring gang if in both."""
@@ -219,120 +172,20 @@ class Crew(commands.Cog):
         This mirrors the logic from the Combat cog: prefer user['team'] names, fall back to first 4 cards.
         Returns a list of dicts: {name, atk, hp, max_hp}.
         """
-        users = load(USERS_FILE)
-        cards_db = load(config.CARDS_FILE) if hasattr(
-            config, "CARDS_FILE") else load("data/cards.json")
-        uid_str = str(uid)
-        user = users.get(uid_str)
-        if not user:
-            return []
-
-        user.setdefault("cards", [])
-        user.setdefault("team", [])
-
-        owned_cards = user.get("cards", [])
-        if not owned_cards:
-            return []
-
-        def find_owned_card_by_name(name: str):
-            for c in owned_cards:
-                if c.get("name") == name:
-                    return c
-            return None
-
-        team_data = []
-        team_names = user.get("team", [])
-
-        if team_names:
-            for name in team_names[:4]:
-                owned = find_owned_card_by_name(name)
-                if not owned:
-                    continue
-                base = next((v for v in cards_db.values() if v.get(
-                    "name") == owned.get("name")), None)
-                if not base:
-                    continue
-                stats = compute_stats(base, owned.get("level", 1), owned.get(
-                    "aura", 0), owned.get("equipped_item_id"))
-                atk = int(stats["attack"])
-                hp = int(stats["health"])
-                team_data.append(
-                    {"name": owned["name"], "atk": atk, "hp": hp, "max_hp": hp})
-
-        if not team_data:
-            for c in owned_cards[:4]:
-                base = next((v for v in cards_db.values()
-                            if v.get("name") == c.get("name")), None)
-                if not base:
-                    continue
-                stats = compute_stats(base, c.get("level", 1), c.get(
-                    "aura", 0), c.get("equipped_item_id"))
-                atk = int(stats["attack"])
-                hp = int(stats["health"])
-                team_data.append(
-                    {"name": c["name"], "atk": atk, "hp": hp, "max_hp": hp})
-
-        return team_data
-
-    def get_crew(self, uid):
-        """Get crew that user belongs to"""
-        crews = load(CREWS_FILE)
-        for cid, crew in crews.items():
-            if str(uid) in crew.get('members', []):
-                return cid, crew
-        return None, None
+        return team_cache.get(uid)
 
     def _simulate_simple_battle(self, atk_team, def_team):
         """Run a simple turn-based battle between two teams.
 
         Returns (attacker_won: bool, log_lines: list[str]).
         """
-        atk = [{"name": c["name"], "atk": c["atk"], "hp": c["hp"],
-                "max_hp": c.get("max_hp", c["hp"])} for c in atk_team]
-        deff = [{"name": c["name"], "atk": c["atk"], "hp": c["hp"],
-                 "max_hp": c.get("max_hp", c["hp"])} for c in def_team]
+        battle = Duel(atk_team, def_team, max_turns=20)
         log = []
-        turn = 0
-        max_turns = 20
-
-        while turn < max_turns and any(c["hp"] > 0 for c in atk) and any(c["hp"] > 0 for c in deff):
-            turn += 1
-            atk_alive = [c for c in atk if c["hp"] > 0]
-            def_alive = [c for c in deff if c["hp"] > 0]
-            if not atk_alive or not def_alive:
-                break
-
-            a = random.choice(atk_alive)
-            d = random.choice(def_alive)
-            dmg = int(a["atk"] * (0.8 + random.random() * 0.4))
-            d["hp"] = max(0, d["hp"] - dmg)
-            hp_percent = int((d["hp"] / d["max_hp"]) *
-                             100) if d["max_hp"] > 0 else 0
-            log.append(
-                f"🔵 {a['name']} → {d['name']} `{dmg}` dmg ({hp_percent}% HP)")
-
-            def_alive = [c for c in deff if c["hp"] > 0]
-            atk_alive = [c for c in atk if c["hp"] > 0]
-            if not def_alive or not atk_alive:
-                break
-
-            e = random.choice(def_alive)
-            t = random.choice(atk_alive)
-            edmg = int(e["atk"] * (0.8 + random.random() * 0.4))
-            t["hp"] = max(0, t["hp"] - edmg)
-            thp_percent = int((t["hp"] / t["max_hp"]) *
-                              100) if t["max_hp"] > 0 else 0
+        for event in battle.run():
+            icon = "🔵" if event.actor.side == 0 else "🔴"
             log.append(
-                f"🔴 {e['name']} → {t['name']} `{edmg}` dmg ({thp_percent}% HP)")
-
-        atk_alive = any(c["hp"] > 0 for c in atk)
-        def_alive = any(c["hp"] > 0 for c in deff)
-
-        if atk_alive and not def_alive:
-            return True, log
-        if def_alive and not atk_alive:
-            return False, log
-        return atk_alive, log
+                f"{icon} {event.actor.name} → {event.target.name} `{event.amount}` dmg ({event.target.hp_percent}% HP)")
+        return battle.side_a_won, log
 
     @commands.command(name="crew")
     async def crew(self, ctx, action: str = None, *, arg: str = ""):
@@ -391,12 +244,12 @@ class Crew(commands.Cog):
             }
 
             crews[cid] = new_crew
-            save(CREWS_FILE, crews)
+            await asave(CREWS_FILE, crews)
 
-            users = load(USERS_FILE)
-            user = self.ensure_user(users, str(ctx.author.id))
+            users = user_store.load()
+            user = user_store.ensure(str(ctx.author.id))
             user["crew_name"] = arg
-            save(USERS_FILE, users)
+            user_store.mark_dirty(ctx.author.id)
 
             embed = discord.Embed(
                 title="✅ Crew Created!",
@@ -491,12 +344,12 @@ class Crew(commands.Cog):
             crew['members'].remove(str(ctx.author.id))
             crews = load(CREWS_FILE)
             crews[cid] = crew
-            save(CREWS_FILE, crews)
+            await asave(CREWS_FILE, crews)
 
-            users = load(USERS_FILE)
+            users = user_store.load()
             if str(ctx.author.id) in users:
                 users[str(ctx.author.id)]["crew_name"] = None
-            save(USERS_FILE, users)
+            user_store.mark_dirty(ctx.author.id)
 
             embed = discord.Embed(
                 title="✅ Left Crew",
@@ -505,7 +358,8 @@ class Crew(commands.Cog):
             )
             await ctx.send(embed=embed)
 
-    @commands.command(name="capture")
+    @commands.hybrid_command(name="capture")
+    @app_commands.autocomplete(territory_name=autocomplete.territories)
     async def capture(self, ctx, *, territory_name: str = None):
         """Fight to capture a territory for your gang or crew. Usage: ls capture <territory_name>"""
         if not territory_name:
@@ -520,35 +374,11 @@ class Crew(commands.Cog):
             )
             return await ctx.send(embed=embed)
 
-        gangs = load(GANGS_FILE)
-        crews = load(CREWS_FILE)
         territory_name_clean = territory_name.strip()
-        owner_type = None
-        owner_id = None
+        owner_type, owner_id = factions.territory_owner(territory_name_clean)
         owner = None
-
-        for gid, g in gangs.items():
-            terrs = g.get("territories", [])
-            for t in terrs:
-                if str(t).lower() == territory_name_clean.lower():
-                    owner_type = "gang"
-                    owner_id = gid
-                    owner = g
-                    break
-            if owner:
-                break
-
-        if not owner:
-            for cid, c in crews.items():
-                terrs = c.get("territories", [])
-                for t in terrs:
-                    if str(t).lower() == territory_name_clean.lower():
-                        owner_type = "crew"
-                        owner_id = cid
-                        owner = c
-                        break
-                if owner:
-                    break
+        if owner_type is not None:
+            owner = load(GANGS_FILE if owner_type == "gang" else CREWS_FILE).get(owner_id)
 
         attacker_team = self._build_player_team(ctx.author.id)
         if not attacker_team:
@@ -589,8 +419,8 @@ class Crew(commands.Cog):
                              icon_url=ctx.author.display_avatar.url)
             embed.set_footer(text="Prepare for battle!")
             msg = await ctx.send(embed=embed)
-            view = CaptureBattleView(ctx, attacker_team, npc_team, defender_name, self.ensure_user, lambda won, log: self._handle_capture_end(
-                ctx, won, log, territory_name_clean, f_type, f_id, faction, None, None))
+            view = CaptureBattleView(ctx, attacker_team, npc_team, defender_name, lambda won, log: self._handle_capture_end(
+                ctx, won, log, territory_name_clean, f_type, f_id))
             view.msg = msg
             await msg.edit(view=view)
             return
@@ -660,52 +490,49 @@ class Crew(commands.Cog):
                          icon_url=ctx.author.display_avatar.url)
         embed.set_footer(text="Prepare for battle!")
         msg = await ctx.send(embed=embed)
-        view = CaptureBattleView(ctx, attacker_team, def_team, defender_name, self.ensure_user, lambda won, log: self._handle_capture_end(
-            ctx, won, log, territory_name_clean, f_type, f_id, faction, owner_type, owner_id))
+        view = CaptureBattleView(ctx, attacker_team, def_team, defender_name, lambda won, log: self._handle_capture_end(
+            ctx, won, log, territory_name_clean, f_type, f_id))
         view.msg = msg
         await msg.edit(view=view)
 
-    def _handle_capture_end(self, ctx, attacker_won, log_lines, territory_name_clean, f_type, f_id, faction, owner_type, owner_id):
+    async def _handle_capture_end(self, ctx, attacker_won, log_lines, territory_name_clean, f_type, f_id):
         """Callback after interactive capture battle concludes to transfer territory if won"""
         if not attacker_won:
             # Battle lost; nothing to transfer
             return
+        await self._transfer_territory(territory_name_clean, f_type, f_id)
 
-        gangs = load(GANGS_FILE)
-        crews = load(CREWS_FILE)
+    async def _transfer_territory(self, territory_name, to_type, to_id):
+        """Move a territory from whoever holds it now to the given gang/crew.
 
-        # Remove territory from previous owner (if any)
-        if owner_type and owner_id:
-            if owner_type == "gang":
-                owner = gangs.get(owner_id)
-                if owner:
-                    owner.setdefault("territories", [])
-                    owner["territories"] = [t for t in owner["territories"]
-                                            if str(t).lower() != territory_name_clean.lower()]
-                    gangs[owner_id] = owner
-                    save(GANGS_FILE, gangs)
-            else:
-                owner = crews.get(owner_id)
-                if owner:
-                    owner.setdefault("territories", [])
-                    owner["territories"] = [t for t in owner["territories"]
-                                            if str(t).lower() != territory_name_clean.lower()]
-                    crews[owner_id] = owner
-                    save(CREWS_FILE, crews)
-
-        # Add territory to attacker's faction
-        if f_type == "gang":
-            faction.setdefault("territories", [])
-            if territory_name_clean not in faction["territories"]:
-                faction["territories"].append(territory_name_clean)
-            gangs[f_id] = faction
-            save(GANGS_FILE, gangs)
-        else:
-            faction.setdefault("territories", [])
-            if territory_name_clean not in faction["territories"]:
-                faction["territories"].append(territory_name_clean)
-            crews[f_id] = faction
-            save(CREWS_FILE, crews)
+        Both sides are changed before anything is awaited, so no other command
+        can see the territory held twice or by nobody. The holder is looked up
+        again here rather than taken from when the battle started.
+        """
+        docs = {"gang": load(GANGS_FILE), "crew": load(CREWS_FILE)}
+        target = docs[to_type].get(to_id)
+        if target is None:
+            return  # faction was disbanded mid-battle
+        territory_name = territory_name.strip()
+        key = territory_key(territory_name)
+        changed = {to_type}
+
+        owner_type, owner_id = factions.territory_owner(territory_name)
+        owner = docs[owner_type].get(owner_id) if owner_type else None
+        if owner is not None and (owner_type, owner_id) != (to_type, to_id):
+            held = owner.get("territories", [])
+            territory_name = next((t for t in held if territory_key(t) == key), territory_name)
+            owner["territories"] = [t for t in held if territory_key(t) != key]
+            changed.add(owner_type)
+
+        target.setdefault("territories", [])
+        if not any(territory_key(t) == key for t in target["territories"]):
+            target["territories"].append(territory_name)
+
+        if "gang" in changed:
+            await asave(GANGS_FILE, docs["gang"])
+        if "crew" in changed:
+            await asave(CREWS_FILE, docs["crew"])
 
     @commands.command(name="crew_add", aliases=["crewadd"])
     async def crew_add(self, ctx, member: discord.Member = None):
@@ -756,12 +583,11 @@ class Crew(commands.Cog):
         crew.setdefault('members', []).append(str(member.id))
         crews = load(CREWS_FILE)
         crews[cid] = crew
-        save(CREWS_FILE, crews)
+        await asave(CREWS_FILE, crews)
 
-        users = load(USERS_FILE)
-        user = self.ensure_user(users, str(member.id))
+        user = user_store.ensure(str(member.id))
         user["crew_name"] = crew['name']
-        save(USERS_FILE, users)
+        user_store.mark_dirty(member.id)
 
         embed = discord.Embed(
             title="✅ Member Added",
@@ -813,12 +639,12 @@ class Crew(commands.Cog):
         crew['members'].remove(str(member.id))
         crews = load(CREWS_FILE)
         crews[cid] = crew
-        save(CREWS_FILE, crews)
+        await asave(CREWS_FILE, crews)
 
-        users = load(USERS_FILE)
+        users = user_store.load()
         if str(member.id) in users:
             users[str(member.id)]["crew_name"] = None
-        save(USERS_FILE, users)
+        user_store.mark_dirty(member.id)
 
         embed = discord.Embed(
             title="✅ Member Removed",
@@ -830,10 +656,13 @@ class Crew(commands.Cog):
     @commands.command(name="map", aliases=["territory", "territories"])
     async def map(self, ctx):
         """View the territory map showing both gang and crew control"""
-        from utils.database import load as _load  # local alias to avoid confusion
+        if self._map is None or self._map[0] != factions.territory_version:
+            self._map = (factions.territory_version, self._build_map_embed())
+        await ctx.send(embed=self._map[1])
 
-        crews = _load(CREWS_FILE)
-        gangs = _load("data/gangs.json")
+    def _build_map_embed(self):
+        crews = load(CREWS_FILE)
+        gangs = load(GANGS_FILE)
 
         embed = discord.Embed(
             title="🗺️ Territory Map",
@@ -888,7 +717,7 @@ class Crew(commands.Cog):
 
         embed.set_footer(
             text="Territories are controlled by gangs and crews. Win battles and events to claim more!")
-        await ctx.send(embed=embed)
+        return embed
 
 
 async def setup(bot):
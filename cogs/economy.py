@@ -3,43 +3,21 @@ import time
 import random
 from discord.ext import commands
 from discord.ui import View, Button, button
-from utils.database import load, save
+from utils.database import user_store
 from utils.game_math import regenerate_pulls
 import config
 
-USERS_FILE = "data/users.json"
-
 
 class Economy(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
-    def ensure_user(self, users, uid):
-        """Ensure user exists in database"""
-        if uid not in users:
-            users[uid] = {
-                "yen": 0,
-                "cards": [],
-                "fragments": {},
-                "unlocked": [],
-                "pulls": 12,
-                "chests": {},
-                "tickets": {},
-                "equipment": {},
-                "wins": 0,
-                "streak": 0,
-                "last_claim_ts": 0,
-                "last_pull_regen_ts": int(time.time()),
-                "reset_tokens": 0
-            }
-        return users[uid]
 
     @commands.command(name="reset", aliases=["resetpulls", "reset_pulls", "rpulls"])
     async def reset_pulls(self, ctx):
         """Reset your pulls using a reset token. Usage: ls reset"""
-        users = load(USERS_FILE)
         uid = str(ctx.author.id)
-        user = self.ensure_user(users, uid)
+        user = user_store.ensure(uid)
 
         reset_tokens = user.get("reset_tokens", 0)
 
@@ -78,7 +56,7 @@ class Economy(commands.Cog):
         user["pulls"] = config.MAX_PULLS
         user["reset_tokens"] = reset_tokens - 1
         user["last_pull_regen_ts"] = int(time.time())
-        save(USERS_FILE, users)
+        user_store.mark_dirty(uid)
 
         embed = discord.Embed(
             title="✅ Pulls Reset!",
@@ -96,9 +74,7 @@ class Economy(commands.Cog):
 
     @commands.command(name="bal", aliases=["balance", "money"])
     async def bal(self, ctx):
-        users = load(USERS_FILE)
-        user = self.ensure_user(users, str(ctx.author.id))
-        save(USERS_FILE, users)  # Save if new user was created
+        user = user_store.ensure(str(ctx.author.id))
 
         yen = user.get("yen", 0)
         tokens = user.get("reset_tokens", 0)
@@ -139,9 +115,8 @@ class Economy(commands.Cog):
 
     @commands.command(name="claim", aliases=["daily"])
     async def claim(self, ctx):
-        users = load(USERS_FILE)
         uid = str(ctx.author.id)
-        user = self.ensure_user(users, uid)
+        user = user_store.ensure(uid)
 
         now = int(time.time())
         last = user.get("last_claim_ts", 0)
@@ -191,7 +166,7 @@ class Economy(commands.Cog):
         user["yen"] = user.get("yen", 0) + yen_gain
         user["claim_streak"] = streak
         user["last_claim_ts"] = now  # Update timestamp
-        save(USERS_FILE, users)
+        user_store.mark_dirty(uid)
 
         embed = discord.Embed(
             title=f"📅 Day {streak} Claimed!",
@@ -232,9 +207,8 @@ class Economy(commands.Cog):
             )
             return await ctx.send(embed=embed)
 
-        users = load(USERS_FILE)
         uid = str(ctx.author.id)
-        user = self.ensure_user(users, uid)
+        user = user_store.ensure(uid)
         chests = user.get("chests", {})
         available = chests.get(chest_type, 0)
 
@@ -273,7 +247,7 @@ class Economy(commands.Cog):
         if total_pulls > 0:
             user["pulls"] = min(12, user.get("pulls", 0) + total_pulls)
 
-        save(USERS_FILE, users)
+        user_store.mark_dirty(uid)
 
         embed = discord.Embed(
             title=f"📦 Opened {quantity}x {chest_type.upper()} Chest{'s' if quantity > 1 else ''}!",
@@ -303,11 +277,10 @@ class Economy(commands.Cog):
 
     @commands.command(name="cd", aliases=["cooldown", "cooldowns"])
     async def cd(self, ctx):
-        users = load(USERS_FILE)
         uid = str(ctx.author.id)
-        user = self.ensure_user(users, uid)
+        user = user_store.ensure(uid)
         user = regenerate_pulls(user)
-        save(USERS_FILE, users)
+        user_store.mark_dirty(uid)
 
         now = int(time.time())
         pulls = user.get("pulls", 0)
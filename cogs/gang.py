@@ -3,12 +3,12 @@ import time
 import random
 from discord.ext import commands
 from discord.ui import View, Button
-from utils.database import load, save
+from utils.database import asave, load, user_store
+from utils.factions import factions
 import config
 import json
 
 GANGS_FILE = "data/gangs.json"
-USERS_FILE = "data/users.json"
 WHITETIGER_FILE = "data/whitetiger.json"
 
 
@@ -62,12 +62,11 @@ class GangInviteView(View):
 
             gang.setdefault("members", []).append(str(self.member.id))
             gangs[self.gid] = gang
-            save(GANGS_FILE, gangs)
+            await asave(GANGS_FILE, gangs)
 
-            users = load(USERS_FILE)
-            user_data = self.gang_cog.ensure_user(users, str(self.member.id))
+            user_data = user_store.ensure(str(self.member.id))
             user_data["gang_name"] = gang.get("name")
-            save(USERS_FILE, users)
+            user_store.mark_dirty(self.member.id)
 
             for child in self.children:
                 child.disabled = True
@@ -105,32 +104,12 @@ class Gang(commands.Cog):
         self.bot = bot
 
     def get_gang(self, uid):
-        data = load(GANGS_FILE)
-        for gid, g in data.items():
-            if str(uid) in g['members']:
-                return gid, g
-        return None, None
-
-    def ensure_user(self, users, uid):
-        """Ensure user exists in database"""
-        if uid not in users:
-            users[uid] = {
-                "yen": 0,
-                "cards": [],
-                "fragments": {},
-                "unlocked": [],
-                "pulls": 12,
-                "chests": {},
-                "tickets": {},
-                "equipment": {},
-                "wins": 0,
-                "streak": 0,
-                "last_pull_regen_ts": 0,
-                "last_claim_ts": 0,
-                "reset_tokens": 0,
-                "gang_name": None
-            }
-        return users[uid]
+        gid = factions.gang_of(uid)
+        if gid is None:
+            return None, None
+        gang = load(GANGS_FILE).get(gid)
+        return (gid, gang) if gang is not None else (None, None)
+
 
     def load_white_tiger_agents(self):
         try:
@@ -241,8 +220,8 @@ class Gang(commands.Cog):
                 )
                 return await ctx.send(embed=embed)
 
-            users = load(USERS_FILE)
-            u = self.ensure_user(users, str(ctx.author.id))
+            users = user_store.load()
+            u = user_store.ensure(str(ctx.author.id))
 
             if u.get("yen", 0) < config.GANG_CREATE_COST:
                 embed = discord.Embed(
@@ -253,7 +232,7 @@ class Gang(commands.Cog):
                 return await ctx.send(embed=embed)
 
             u["yen"] -= config.GANG_CREATE_COST
-            save(USERS_FILE, users)
+            user_store.mark_dirty(ctx.author.id)
 
             gid = str(int(time.time()))
             new_gang = {
@@ -270,11 +249,11 @@ class Gang(commands.Cog):
             }
             gangs = load(GANGS_FILE)
             gangs[gid] = new_gang
-            save(GANGS_FILE, gangs)
+            await asave(GANGS_FILE, gangs)
 
             # Update user's gang name
             u["gang_name"] = arg
-            save(USERS_FILE, users)
+            user_store.mark_dirty(ctx.author.id)
 
             embed = discord.Embed(
                 title="✅ Gang Created!",
@@ -374,12 +353,12 @@ class Gang(commands.Cog):
             gang['members'].remove(str(ctx.author.id))
             gangs = load(GANGS_FILE)
             gangs[gid] = gang
-            save(GANGS_FILE, gangs)
+            await asave(GANGS_FILE, gangs)
 
-            users = load(USERS_FILE)
+            users = user_store.load()
             if str(ctx.author.id) in users:
                 users[str(ctx.author.id)]["gang_name"] = None
-            save(USERS_FILE, users)
+            user_store.mark_dirty(ctx.author.id)
 
             embed = discord.Embed(
                 title="✅ Left Gang",
@@ -408,7 +387,7 @@ class Gang(commands.Cog):
                 return await ctx.send(embed=embed)
 
             gangs = load(GANGS_FILE)
-            users = load(USERS_FILE)
+            users = user_store.load()
 
             # Clear gang_name for all members
             for member_id in gang.get("members", []):
@@ -419,8 +398,8 @@ class Gang(commands.Cog):
             if gid in gangs:
                 del gangs[gid]
 
-            save(GANGS_FILE, gangs)
-            save(USERS_FILE, users)
+            await asave(GANGS_FILE, gangs)
+            user_store.mark_dirty(*gang.get("members", []))
 
             embed = discord.Embed(
                 title="💥 Gang Dismantled",
@@ -539,12 +518,12 @@ class Gang(commands.Cog):
         gang['members'].remove(str(member.id))
         gangs = load(GANGS_FILE)
         gangs[gid] = gang
-        save(GANGS_FILE, gangs)
+        await asave(GANGS_FILE, gangs)
 
-        users = load(USERS_FILE)
+        users = user_store.load()
         if str(member.id) in users:
             users[str(member.id)]["gang_name"] = None
-        save(USERS_FILE, users)
+        user_store.mark_dirty(member.id)
 
         embed = discord.Embed(
             title="✅ Member Removed",
@@ -589,14 +568,13 @@ class Gang(commands.Cog):
             return await ctx.send(embed=embed)
 
         gang['bank'] -= amount
-        users = load(USERS_FILE)
-        user_data = self.ensure_user(users, str(member.id))
-        user_data['yen'] = user_data.get('yen', 0) + amount
-        save(USERS_FILE, users)
+        async with user_store.transaction(member.id):
+            user_data = user_store.ensure(str(member.id))
+            user_data['yen'] = user_data.get('yen', 0) + amount
 
         gangs_data = load(GANGS_FILE)
         gangs_data[gid] = gang
-        save(GANGS_FILE, gangs_data)
+        await asave(GANGS_FILE, gangs_data)
 
         embed = discord.Embed(
             title="💸 Payment Sent",
@@ -628,8 +606,8 @@ class Gang(commands.Cog):
             )
             return await ctx.send(embed=embed)
 
-        users = load(USERS_FILE)
-        user = self.ensure_user(users, str(ctx.author.id))
+        users = user_store.load()
+        user = user_store.ensure(str(ctx.author.id))
         if user.get("yen", 0) < amount:
             embed = discord.Embed(
                 title="❌ Not Enough Yen",
@@ -640,12 +618,12 @@ class Gang(commands.Cog):
 
         user["yen"] = user.get("yen", 0) - amount
         users[str(ctx.author.id)] = user
-        save(USERS_FILE, users)
+        user_store.mark_dirty(ctx.author.id)
 
         gang["bank"] = gang.get("bank", 0) + amount
         gangs = load(GANGS_FILE)
         gangs[gid] = gang
-        save(GANGS_FILE, gangs)
+        await asave(GANGS_FILE, gangs)
 
         embed = discord.Embed(
             title="🏦 Funds Added to Gang Bank",
@@ -719,7 +697,7 @@ class Gang(commands.Cog):
 
         gangs_data = load(GANGS_FILE)
         gangs_data[gid] = gang
-        save(GANGS_FILE, gangs_data)
+        await asave(GANGS_FILE, gangs_data)
 
         embed = discord.Embed(
             title="🏢 Business Created!",
@@ -748,8 +726,8 @@ class Gang(commands.Cog):
             return await ctx.send(embed=embed)
 
         # Cost: 100,000 yen from leader's personal balance
-        users = load(USERS_FILE)
-        leader = self.ensure_user(users, str(ctx.author.id))
+        users = user_store.load()
+        leader = user_store.ensure(str(ctx.author.id))
         cost = 100_000
         if leader.get("yen", 0) < cost:
             embed = discord.Embed(
@@ -761,7 +739,7 @@ class Gang(commands.Cog):
 
         leader["yen"] = leader.get("yen", 0) - cost
         users[str(ctx.author.id)] = leader
-        save(USERS_FILE, users)
+        user_store.mark_dirty(ctx.author.id)
 
         # Ensure businesses is a dict (migrate from old list format if needed)
         if isinstance(gang.get('businesses', {}), list):
@@ -837,7 +815,7 @@ class Gang(commands.Cog):
 
         gangs_data = load(GANGS_FILE)
         gangs_data[gid] = gang
-        save(GANGS_FILE, gangs_data)
+        await asave(GANGS_FILE, gangs_data)
 
         embed = discord.Embed(
             title="🔁 Business Reworked",
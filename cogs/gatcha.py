@@ -5,7 +5,9 @@ import time
 import config
 from discord.ext import commands
 from discord.ui import View, Button, button
-from utils.database import load, save
+from utils.database import load, user_store
+from utils.catalog import catalog, ticket_id
+from utils.gacha import get_pool, mass_pull
 from utils.game_math import regenerate_pulls
 
 
@@ -22,10 +24,6 @@ def has_patreon_role(member):
         return False
 
 
-USERS_FILE = "data/users.json"
-CARDS_FILE = "data/cards.json"
-RARITIES_FILE = "data/rarities.json"
-BOSSES_FILE = "data/bosses.json"
 EMOJI_FILE = "data/emoji.json"
 
 
@@ -41,23 +39,6 @@ class Gacha(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
-    def ensure_user(self, users, uid):
-        """Ensure user exists in database"""
-        if uid not in users:
-            users[uid] = {
-                "pulls": config.MAX_PULLS,
-                "yen": 0,
-                "cards": [],
-                "fragments": {},
-                "unlocked": [],
-                "chests": {},
-                "tickets": {},
-                "equipment": {},
-                "wins": 0,
-                "streak": 0,
-                "last_pull_regen_ts": int(time.time())
-            }
-        return users[uid]
 
     def get_card_type(self, stats):
         """Determine card type based on stats"""
@@ -90,14 +71,15 @@ class Gacha(commands.Cog):
     @commands.command(name="pull")
     async def pull(self, ctx):
         """Summon a character! Usage: ls pull"""
-        users = load(USERS_FILE)
+        # Held across the animation so a second pull can't spend the same pull
+        async with user_store.transaction(ctx.author.id) as users:
+            await self._pull(ctx, users)
+
+    async def _pull(self, ctx, users):
         uid = str(ctx.author.id)
-        user = self.ensure_user(users, uid)
+        user = user_store.ensure(uid)
         user = regenerate_pulls(user)
-
-        # Save updated user
         users[uid] = user
-        save(USERS_FILE, users)
 
         if user.get("pulls", 0) <= 0:
             embed = discord.Embed(
@@ -126,36 +108,24 @@ class Gacha(commands.Cog):
         # --- LOGIC ---
         user["pulls"] -= 1
 
+        pool = get_pool()
+
         # 1. Ticket Logic (2.5% Chance)
         ticket_drop = None
         try:
-            bosses = load(BOSSES_FILE)
-            if bosses and random.random() * 100 <= 2.5:
-                # Weighted choice
-                total = sum(b.get('ticket_drop_rate', 0)
-                            for b in bosses.values())
-                if total > 0:
-                    r = random.uniform(0, total)
-                    curr = 0
-                    for b in bosses.values():
-                        curr += b.get('ticket_drop_rate', 0)
-                        if r <= curr:
-                            ticket_drop = b
-                            break
-
+            ticket_drop = pool.roll_ticket()
             if ticket_drop:
                 user.setdefault("tickets", {})
-                tid = f"{ticket_drop.get('name', '').lower().replace(' ', '_')}_ticket"
+                tid = ticket_id(ticket_drop.get('name', ''))
                 user["tickets"][tid] = user["tickets"].get(tid, 0) + 1
         except Exception as e:
             print(f"Error loading bosses: {e}")
 
-        # 2. Card Logic - Load from dictionary structure
+        # 2. Card Logic
         try:
-            cards_dict = load(CARDS_FILE)
-            rarities = load(RARITIES_FILE)
+            rarities = catalog.rarities
 
-            if not cards_dict:
+            if pool.cards is None:
                 embed = discord.Embed(
                     title="❌ No Cards Available",
                     description="Card database is empty! Please add cards first.",
@@ -164,20 +134,8 @@ class Gacha(commands.Cog):
                 await msg.edit(embed=embed)
                 return
 
-            # Convert dict to list for weighted selection
-            cards_list = list(cards_dict.values())
-
-            # Calculate weights based on rarity
-            weights = []
-            for card in cards_list:
-                rarity_key = card.get('rarity', 'C')
-                rarity_info = rarities.get(rarity_key, {})
-                # Default to 5 if not found
-                weight = rarity_info.get('weight_multiplier', 5)
-                weights.append(weight)
-
-            # Select card
-            chosen = random.choices(cards_list, weights=weights, k=1)[0]
+            # Select card (weighted by rarity)
+            chosen = pool.draw(1)[0]
             chosen_rarity = chosen.get('rarity', 'C')
             rarity_info = rarities.get(chosen_rarity, {})
 
@@ -210,9 +168,7 @@ class Gacha(commands.Cog):
             await msg.edit(embed=embed)
             return
 
-        # Save user data
         users[uid] = user
-        save(USERS_FILE, users)
 
         # --- RESULT EMBED ---
         try:
@@ -315,15 +271,15 @@ class Gacha(commands.Cog):
             )
             return await ctx.send(embed=embed)
 
+        async with user_store.transaction(ctx.author.id) as users:
+            await self._mass_pull(ctx, users)
+
+    async def _mass_pull(self, ctx, users):
         # Load and regenerate pulls
-        users = load(USERS_FILE)
         uid = str(ctx.author.id)
-        user = self.ensure_user(users, uid)
+        user = user_store.ensure(uid)
         user = regenerate_pulls(user)
-
-        # Save updated user
         users[uid] = user
-        save(USERS_FILE, users)
 
         amount = user.get("pulls", 0)
         if amount <= 0:
@@ -355,11 +311,10 @@ class Gacha(commands.Cog):
         msg = await ctx.send(embed=loading_embed)
 
         # Load data
-        cards_dict = load(CARDS_FILE)
-        rarities = load(RARITIES_FILE)
-        bosses = load(BOSSES_FILE)
+        pool = get_pool()
+        rarities = catalog.rarities
 
-        if not cards_dict:
+        if pool.cards is None:
             embed = discord.Embed(
                 title="❌ No Cards Available",
                 description="Card database is empty!",
@@ -368,81 +323,23 @@ class Gacha(commands.Cog):
             await msg.edit(embed=embed)
             return
 
-        # Prepare card pool and weights
-        cards_list = list(cards_dict.values())
-        weights = []
-        for card in cards_list:
-            rarity_key = card.get("rarity", "C")
-            rarity_info = rarities.get(rarity_key, {})
-            weight = rarity_info.get("weight_multiplier", 5)
-            weights.append(weight)
-
         # Load per-card emojis for fragments
         emojis = load(EMOJI_FILE) or {}
 
-        # Aggregated results
-        new_counts = {}      # card_name -> (count, rarity_emoji)
-        shard_counts = {}    # card_name -> (count, card_emoji)
-        tickets_gained = {}
-
+        # Draw everything in one batch and merge it into the user
         user["pulls"] -= amount
+        result = mass_pull(user, amount, pool)
 
-        for _ in range(amount):
-            # Ticket chance (2.5%)
-            if bosses and random.random() * 100 <= 2.5:
-                total = sum(b.get("ticket_drop_rate", 0)
-                            for b in bosses.values())
-                if total > 0:
-                    r = random.uniform(0, total)
-                    curr = 0
-                    for b in bosses.values():
-                        curr += b.get("ticket_drop_rate", 0)
-                        if r <= curr:
-                            tid = f"{b.get('name', '').lower().replace(' ', '_')}_ticket"
-                            tickets_gained[tid] = tickets_gained.get(
-                                tid, 0) + 1
-                            user.setdefault("tickets", {})
-                            user["tickets"][tid] = user["tickets"].get(
-                                tid, 0) + 1
-                            break
-
-            # Card pull
-            chosen = random.choices(cards_list, weights=weights, k=1)[0]
-            card_name = chosen.get("name", "Unknown")
-            rarity_key = chosen.get("rarity", "C")
-            rarity_info = rarities.get(rarity_key, {})
-            rarity_emoji = rarity_info.get("emoji", "⭐")
-
-            user.setdefault("cards", [])
-            user.setdefault("unlocked", [])
-            user.setdefault("fragments", {})
-
-            if card_name not in user.get("unlocked", []):
-                # New unlock
-                user.setdefault("unlocked", []).append(card_name)
-                user["cards"].append(
-                    {
-                        "name": card_name,
-                        "rarity": rarity_key,
-                        "level": 1,
-                        "exp": 0,
-                        "evo": 0,
-                        "aura": 0,
-                    }
-                )
-                count, _ = new_counts.get(card_name, (0, rarity_emoji))
-                new_counts[card_name] = (count + 1, rarity_emoji)
-            else:
-                # Fragment (duplicate)
-                user["fragments"][card_name] = user["fragments"].get(
-                    card_name, 0) + 1
-                card_emoji = emojis.get(card_name) or "🧩"
-                count, _ = shard_counts.get(card_name, (0, card_emoji))
-                shard_counts[card_name] = (count + 1, card_emoji)
+        # Aggregated results
+        new_counts = {}      # card_name -> (count, rarity_emoji)
+        for name in result.new:
+            rarity_info = rarities.get(catalog.rarity_of(name), {})
+            new_counts[name] = (1, rarity_info.get("emoji", "⭐"))
+        shard_counts = {name: (count, emojis.get(name) or "🧩")
+                        for name, count in result.fragments.items()}
+        tickets_gained = result.tickets
 
-        # Save user data
         users[uid] = user
-        save(USERS_FILE, users)
 
         # Result embed
         result_embed = discord.Embed(
@@ -523,10 +420,13 @@ class Gacha(commands.Cog):
             )
             return await ctx.send(embed=embed)
 
+        async with user_store.transaction(ctx.author.id) as users:
+            await self._mass_reset_and_pull(ctx, users)
+
+    async def _mass_reset_and_pull(self, ctx, users):
         # Load user and check reset tokens
-        users = load(USERS_FILE)
         uid = str(ctx.author.id)
-        user = self.ensure_user(users, uid)
+        user = user_store.ensure(uid)
 
         reset_tokens = user.get("reset_tokens", 0)
         if reset_tokens < 1:
@@ -549,7 +449,6 @@ class Gacha(commands.Cog):
         user["reset_tokens"] = reset_tokens - 1
         user["last_pull_regen_ts"] = int(time.time())
         users[uid] = user
-        save(USERS_FILE, users)
 
         # Now perform the same mass pull logic as mp
         amount = user.get("pulls", 0)
@@ -583,11 +482,10 @@ class Gacha(commands.Cog):
         loading_embed.set_footer(text="This may take a moment...")
         msg = await ctx.send(embed=loading_embed)
 
-        cards_dict = load(CARDS_FILE)
-        rarities = load(RARITIES_FILE)
-        bosses = load(BOSSES_FILE)
+        pool = get_pool()
+        rarities = catalog.rarities
 
-        if not cards_dict:
+        if pool.cards is None:
             embed = discord.Embed(
                 title="❌ No Cards Available",
                 description="Card database is empty!",
@@ -596,73 +494,20 @@ class Gacha(commands.Cog):
             await msg.edit(embed=embed)
             return
 
-        cards_list = list(cards_dict.values())
-        weights = []
-        for card in cards_list:
-            rarity_key = card.get("rarity", "C")
-            rarity_info = rarities.get(rarity_key, {})
-            weight = rarity_info.get("weight_multiplier", 5)
-            weights.append(weight)
-
         emojis = load(EMOJI_FILE) or {}
 
-        new_counts = {}
-        shard_counts = {}
-        tickets_gained = {}
-
         user["pulls"] -= amount
+        result = mass_pull(user, amount, pool)
 
-        for _ in range(amount):
-            if bosses and random.random() * 100 <= 2.5:
-                total = sum(b.get("ticket_drop_rate", 0)
-                            for b in bosses.values())
-                if total > 0:
-                    r = random.uniform(0, total)
-                    curr = 0
-                    for b in bosses.values():
-                        curr += b.get("ticket_drop_rate", 0)
-                        if r <= curr:
-                            tid = f"{b.get('name', '').lower().replace(' ', '_')}_ticket"
-                            tickets_gained[tid] = tickets_gained.get(
-                                tid, 0) + 1
-                            user.setdefault("tickets", {})
-                            user["tickets"][tid] = user["tickets"].get(
-                                tid, 0) + 1
-                            break
-
-            chosen = random.choices(cards_list, weights=weights, k=1)[0]
-            card_name = chosen.get("name", "Unknown")
-            rarity_key = chosen.get("rarity", "C")
-            rarity_info = rarities.get(rarity_key, {})
-            rarity_emoji = rarity_info.get("emoji", "⭐")
-
-            user.setdefault("cards", [])
-            user.setdefault("unlocked", [])
-            user.setdefault("fragments", {})
-
-            if card_name not in user.get("unlocked", []):
-                user.setdefault("unlocked", []).append(card_name)
-                user["cards"].append(
-                    {
-                        "name": card_name,
-                        "rarity": rarity_key,
-                        "level": 1,
-                        "exp": 0,
-                        "evo": 0,
-                        "aura": 0,
-                    }
-                )
-                count, _ = new_counts.get(card_name, (0, rarity_emoji))
-                new_counts[card_name] = (count + 1, rarity_emoji)
-            else:
-                user["fragments"][card_name] = user["fragments"].get(
-                    card_name, 0) + 1
-                card_emoji = emojis.get(card_name) or "🧩"
-                count, _ = shard_counts.get(card_name, (0, card_emoji))
-                shard_counts[card_name] = (count + 1, card_emoji)
+        new_counts = {}
+        for name in result.new:
+            rarity_info = rarities.get(catalog.rarity_of(name), {})
+            new_counts[name] = (1, rarity_info.get("emoji", "⭐"))
+        shard_counts = {name: (count, emojis.get(name) or "🧩")
+                        for name, count in result.fragments.items()}
+        tickets_gained = result.tickets
 
         users[uid] = user
-        save(USERS_FILE, users)
 
         result_embed = discord.Embed(
             title="✨ Reset + Mass Pull Complete!",
@@ -1,16 +1,86 @@
+import functools
+
 import discord
+from discord import app_commands
 from discord.ext import commands
 from discord.ui import View, Select, Button
-from utils.database import load, save
+from utils import autocomplete
+from utils.database import load, save, user_store
+from utils.catalog import catalog
+from utils.collection import SORTS, collection, resolve_sort
 from utils.game_math import compute_stats
+from utils.search import card_index, find_name, fold, search_names, weapon_index
 
-USERS_FILE = "data/users.json"
-WEAPONS_FILE = "data/weapons.json"
-CARDS_FILE = "data/cards.json"
-RARITIES_FILE = "data/rarities.json"
 EMOJI_FILE = "data/emoji.json"
 
 
+_parts = {}  # card id/name -> static embed parts, for _parts_version
+_parts_version = None
+
+
+def card_parts(card):
+    """Static embed pieces for a catalog card, built once per catalog version.
+
+    Everything that depends only on the card: title, rarity line and colour,
+    the image and stats text for each evo (1-4), the image an owned card of
+    each evo level shows, and the ability. Navigation clicks only assemble these.
+    """
+    global _parts_version
+    if _parts_version != catalog.version:
+        _parts.clear()
+        _parts_version = catalog.version
+    key = card.get("id") or card.get("name")
+    parts = _parts.get(key)
+    if parts is not None:
+        return parts
+
+    rarity_key = card.get('rarity', 'C')
+    rarity_info = catalog.rarity(rarity_key)
+    rarity_emoji = rarity_info.get("emoji", "⭐")
+    try:
+        col = int(rarity_info.get("color", "#5865F2").replace("#", ""), 16)
+    except (AttributeError, ValueError):
+        col = 0x5865F2
+
+    images = card.get("images", {})
+    stats = card.get("stats", {})
+    evo_images = {evo: images.get(f"evo_{evo}") or images.get("evo_1") for evo in range(1, 5)}
+    # An owned card shows its highest unlocked evo art that exists (evo 0 -> evo_1 ... evo 3 -> evo_4)
+    owned_images = {}
+    for level in range(4):
+        owned_images[level] = next((images[f"evo_{evo}"] for evo in range(level + 1, 1, -1)
+                                    if images.get(f"evo_{evo}")), images.get("evo_1"))
+    stat_text = {}
+    for evo in range(1, 5):
+        evo_stats = stats.get(f"evo_{evo}")
+        stat_text[evo] = (f"**Strength:** `{evo_stats.get('attack', 'N/A')}`\n**Health:** `{evo_stats.get('health', 'N/A')}`\n"
+                          f"**Speed:** `{evo_stats.get('speed', 'N/A')}`") if evo_stats else None
+    ability = card.get("ability")
+
+    parts = _parts[key] = {
+        "emoji": rarity_emoji,
+        "title": f"{rarity_emoji} {card.get('name', 'Unknown')}",
+        "rarity": f"**{rarity_info.get('display_name', rarity_key)}** ({rarity_key})",
+        "color": col,
+        "images": evo_images,
+        "owned_images": owned_images,
+        "stats": stat_text,
+        "ability": ability if ability and ability != "None" else None,
+    }
+    return parts
+
+
+@functools.lru_cache(maxsize=2048)
+def _owned_stats(version, name, level, aura, item_id):
+    stats = compute_stats(catalog.card_by_name(name), level, aura, item_id)
+    return stats['attack'], stats['health'], stats['speed']
+
+
+def owned_stats(name, level, aura, item_id=None):
+    """(attack, health, speed) of an owned card; recent results are kept (LRU)."""
+    return _owned_stats(catalog.version, name, level, aura, item_id)
+
+
 class CardNavigationView(View):
     """View for navigating through cards one by one"""
 
@@ -73,111 +143,62 @@ class CardNavigationView(View):
         return True
 
     def create_card_embed(self, card_index):
-        """Create embed for a specific card"""
+        """Create embed for a specific card (assembled from cached parts)"""
         if self.info_type == "database":
             card = self.cards[card_index]
+            owned_card = None
         else:  # owned
             owned_card = self.cards[card_index]
-            card = next((c for c in self.cards_db.values() if c.get(
-                'name') == owned_card.get('name')), None)
-            if not card:
-                return None
+            card = catalog.card_by_name(owned_card.get('name'))
 
         if not card:
             return None
-
-        # Get rarity info
-        rarity_key = card.get('rarity', 'C')
-        rarity_info = self.rarities.get(rarity_key, {})
-        rarity_display = rarity_info.get("display_name", rarity_key)
-        rarity_emoji = rarity_info.get("emoji", "⭐")
-
-        # Get rarity color
-        rarity_color = rarity_info.get("color", "#5865F2")
-        try:
-            col = int(rarity_color.replace("#", ""), 16)
-        except:
-            col = 0x5865F2
+        parts = card_parts(card)
 
         # Create embed
         if self.info_type == "database":
             embed = discord.Embed(
-                title=f"{rarity_emoji} {card.get('name', 'Unknown')}",
-                description=f"**{rarity_display}** ({rarity_key}) - Card {card_index + 1}/{len(self.cards)}",
-                color=col
+                title=parts["title"],
+                description=f"{parts['rarity']} - Card {card_index + 1}/{len(self.cards)}",
+                color=parts["color"]
             )
             embed.set_author(name="Card Information",
                              icon_url=self.ctx.author.display_avatar.url)
 
-            # Set card image based on current evolution (if evo buttons are shown)
-            card_images = card.get("images", {})
-            if self.show_evo_buttons:
-                evo_key = f"evo_{self.current_evo}"
-                if card_images.get(evo_key):
-                    embed.set_image(url=card_images[evo_key])
-                elif card_images.get("evo_1"):
-                    embed.set_image(url=card_images["evo_1"])
-            else:
-                if card_images.get("evo_1"):
-                    embed.set_image(url=card_images["evo_1"])
-
-            # Add stats for current evolution
-            card_stats = card.get("stats", {})
+            # Image and stats for the current evolution, or base (Evo 1) stats for list browsing
+            evo = self.current_evo if self.show_evo_buttons else 1
+            if parts["images"][evo]:
+                embed.set_image(url=parts["images"][evo])
             if self.show_evo_buttons:
-                evo_key = f"evo_{self.current_evo}"
-                if card_stats.get(evo_key):
-                    stats = card_stats[evo_key]
-                    embed.add_field(
-                        name=f"📊 Stats (Evo {self.current_evo})",
-                        value=f"**Strength:** `{stats.get('attack', 'N/A')}`\n**Health:** `{stats.get('health', 'N/A')}`\n**Speed:** `{stats.get('speed', 'N/A')}`",
-                        inline=False
-                    )
-            else:
-                # Only show base stats for list browsing
-                if card_stats.get("evo_1"):
-                    stats = card_stats["evo_1"]
-                    embed.add_field(
-                        name="📊 Base Stats (Evo 1)",
-                        value=f"**Strength:** `{stats.get('attack', 'N/A')}`\n**Health:** `{stats.get('health', 'N/A')}`\n**Speed:** `{stats.get('speed', 'N/A')}`",
-                        inline=False
-                    )
+                if parts["stats"][evo]:
+                    embed.add_field(name=f"📊 Stats (Evo {evo})", value=parts["stats"][evo], inline=False)
+            elif parts["stats"][1]:
+                embed.add_field(name="📊 Base Stats (Evo 1)", value=parts["stats"][1], inline=False)
 
         else:  # owned card
             embed = discord.Embed(
-                title=f"{rarity_emoji} {owned_card.get('name', 'Unknown')}",
-                description=f"**{rarity_display}** ({rarity_key}) - **Your Card** - Card {card_index + 1}/{len(self.cards)}",
-                color=col
+                title=parts["title"] if owned_card.get('name') == card.get('name')
+                else f"{parts['emoji']} {owned_card.get('name', 'Unknown')}",
+                description=f"{parts['rarity']} - **Your Card** - Card {card_index + 1}/{len(self.cards)}",
+                color=parts["color"]
             )
             embed.set_author(name=f"{self.ctx.author.display_name}'s Card Info",
                              icon_url=self.ctx.author.display_avatar.url)
 
             # Set card image based on evolution
-            card_images = card.get("images", {})
-            evo_level = owned_card.get('evo', 0)
-
             if self.show_evo_buttons:
-                evo_key = f"evo_{self.current_evo}"
-                if card_images.get(evo_key):
-                    embed.set_image(url=card_images[evo_key])
-                elif card_images.get("evo_1"):
-                    embed.set_image(url=card_images["evo_1"])
+                image = parts["images"][self.current_evo]
             else:
-                # Show current evolution image
-                if evo_level >= 3 and card_images.get("evo_4"):
-                    embed.set_image(url=card_images["evo_4"])
-                elif evo_level >= 2 and card_images.get("evo_3"):
-                    embed.set_image(url=card_images["evo_3"])
-                elif evo_level >= 1 and card_images.get("evo_2"):
-                    embed.set_image(url=card_images["evo_2"])
-                elif card_images.get("evo_1"):
-                    embed.set_image(url=card_images["evo_1"])
+                image = parts["owned_images"][min(max(owned_card.get('evo', 0), 0), 3)]
+            if image:
+                embed.set_image(url=image)
 
             # Current stats with computed values
-            current_stats = compute_stats(card, owned_card.get(
-                'level', 1), owned_card.get('aura', 0), owned_card.get('equipped_item_id'))
             embed.add_field(
                 name="📊 Current Stats",
-                value=f"**Strength:** `{current_stats['attack']}`\n**Health:** `{current_stats['health']}`\n**Speed:** `{current_stats['speed']}`",
+                value="**Strength:** `{}`\n**Health:** `{}`\n**Speed:** `{}`".format(*owned_stats(
+                    card.get('name'), owned_card.get('level', 1), owned_card.get('aura', 0),
+                    owned_card.get('equipped_item_id'))),
                 inline=False
             )
 
@@ -189,30 +210,21 @@ class CardNavigationView(View):
             )
 
             # Equipment info
-            if owned_card.get('equipped_item_id'):
-                weapons = load(WEAPONS_FILE)
-                weapon = weapons.get(owned_card['equipped_item_id'])
-                if weapon:
-                    embed.add_field(
-                        name="⚔️ Equipped Weapon",
-                        value=f"**{weapon['name']}**\n{weapon.get('description', 'No description')}",
-                        inline=True
-                    )
+            weapon = catalog.weapon(owned_card.get('equipped_item_id'))
+            if weapon:
+                embed.add_field(
+                    name="⚔️ Equipped Weapon",
+                    value=f"**{weapon['name']}**\n{weapon.get('description', 'No description')}",
+                    inline=True
+                )
 
             # Base stats comparison (only if not showing evo buttons)
-            if not self.show_evo_buttons:
-                base_stats = card.get("stats", {}).get("evo_1", {})
-                if base_stats:
-                    embed.add_field(
-                        name="📋 Base Stats (Evo 1)",
-                        value=f"**Strength:** `{base_stats.get('attack', 'N/A')}`\n**Health:** `{base_stats.get('health', 'N/A')}`\n**Speed:** `{base_stats.get('speed', 'N/A')}`",
-                        inline=False
-                    )
+            if not self.show_evo_buttons and parts["stats"][1]:
+                embed.add_field(name="📋 Base Stats (Evo 1)", value=parts["stats"][1], inline=False)
 
         # Add ability if available
-        if card.get("ability") and card.get("ability") != "None":
-            embed.add_field(name="✨ Ability", value=card.get(
-                "ability"), inline=False)
+        if parts["ability"]:
+            embed.add_field(name="✨ Ability", value=parts["ability"], inline=False)
 
         return embed
 
@@ -259,25 +271,6 @@ class CardEvoButton(Button):
             await view.update_display(interaction)
 
 
-def ensure_user(users, uid):
-    """Ensure user exists in database"""
-    if uid not in users:
-        users[uid] = {
-            "yen": 0,
-            "cards": [],
-            "fragments": {},
-            "unlocked": [],
-            "pulls": 12,
-            "chests": {},
-            "tickets": {},
-            "equipment": {},
-            "wins": 0,
-            "streak": 0,
-            "last_pull_regen_ts": 0,
-            "last_claim_ts": 0,
-            "reset_tokens": 0
-        }
-    return users[uid]
 
 
 def load_emojis():
@@ -291,7 +284,7 @@ def load_emojis():
     You can later fill in actual emoji IDs or codes.
     """
     emojis = load(EMOJI_FILE, default={}) or {}
-    cards_db = load(CARDS_FILE)
+    cards_db = catalog.cards
 
     updated = False
     for card in cards_db.values():
@@ -327,9 +320,7 @@ class InventorySelect(Select):
         card = self.user_cards[idx]
 
         # Get base card data for stats
-        cards_db = load(CARDS_FILE)
-        base_card = next((v for v in cards_db.values()
-                         if v['name'] == card['name']), None)
+        base_card = catalog.card_by_name(card['name'])
 
         embed = discord.Embed(
             title=f"🎴 {card['name']}",
@@ -346,27 +337,225 @@ class InventorySelect(Select):
                         value=f"`{card.get('evo', 0)}`", inline=True)
 
         if base_card:
-            stats = compute_stats(base_card, card['level'], card.get(
+            attack, health, speed = owned_stats(base_card['name'], card['level'], card.get(
                 'aura', 0), card.get('equipped_item_id'))
             embed.add_field(
                 name="⚔️ Stats",
-                value=f"**ATK:** `{stats['attack']}`\n**HP:** `{stats['health']}`\n**SPD:** `{stats['speed']}`",
+                value=f"**ATK:** `{attack}`\n**HP:** `{health}`\n**SPD:** `{speed}`",
                 inline=False
             )
 
-        if card.get('equipped_item_id'):
-            weapons = load(WEAPONS_FILE)
-            weapon = weapons.get(card['equipped_item_id'])
-            if weapon:
-                embed.add_field(name="⚔️ Equipment",
-                                value=weapon['name'], inline=True)
+        weapon = catalog.weapon(card.get('equipped_item_id'))
+        if weapon:
+            embed.add_field(name="⚔️ Equipment",
+                            value=weapon['name'], inline=True)
 
-        if base_card and base_card.get("images", {}).get("evo_1"):
-            embed.set_image(url=base_card["images"]["evo_1"])
+        image = card_parts(base_card)["images"][1] if base_card else None
+        if image:
+            embed.set_image(url=image)
 
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
 
+BROWSE_PAGE_SIZE = 10
+FRAGMENT_PAGE_SIZE = 15
+
+
+class CardBrowserView(View):
+    """Paged list of a user's cards with sort and rarity menus (ls col).
+
+    Rows come from the per-user sorted index in utils.collection; each
+    click re-queries it (a filter over a cached order) and renders only
+    the visible page.
+    """
+
+    def __init__(self, ctx, sort="rarity", rarity=None, min_level=0, min_aura=0, prefix=""):
+        super().__init__(timeout=180)
+        self.ctx = ctx
+        self.sort = sort
+        self.rarity = rarity
+        self.min_level = min_level
+        self.min_aura = min_aura
+        self.prefix = prefix
+        self.page = 0
+        self.message = None
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user != self.ctx.author:
+            await interaction.response.send_message("❌ This isn't your inventory!", ephemeral=True)
+            return False
+        return True
+
+    def render(self):
+        """Embed for the current page; rebuilds the menus to match it."""
+        rows = collection.query(self.ctx.author.id, self.sort, self.rarity,
+                                self.min_level, self.min_aura, self.prefix)
+        pages = max(1, (len(rows) + BROWSE_PAGE_SIZE - 1) // BROWSE_PAGE_SIZE)
+        self.page = min(self.page, pages - 1)
+        start = self.page * BROWSE_PAGE_SIZE
+        visible = rows[start:start + BROWSE_PAGE_SIZE]
+
+        filters = []
+        if self.rarity:
+            filters.append(catalog.rarity(self.rarity).get("display_name", self.rarity))
+        if self.min_level:
+            filters.append(f"Lv ≥ {self.min_level}")
+        if self.min_aura:
+            filters.append(f"Aura ≥ {self.min_aura}")
+        if self.prefix:
+            filters.append(f"name: {self.prefix}")
+
+        lines = [f"**Filters:** {' • '.join(filters)}\n"] if filters else []
+        for i, row in enumerate(visible, start + 1):
+            emoji = catalog.rarity(row["rarity"]).get("emoji", "⭐")
+            equipped = " ⚔️" if row["equipped_item_id"] else ""
+            lines.append(f"`{i}.` {emoji} **{row['name']}** • Lv.`{row['level']}` • Evo `{row['evo']}` "
+                         f"• ✨`{row['aura']}`{equipped}")
+        if not visible:
+            lines.append("No cards match these filters.")
+
+        embed = discord.Embed(
+            title=f"🎴 {self.ctx.author.display_name}'s Cards",
+            description="\n".join(lines),
+            color=0x5865F2
+        )
+        embed.set_author(name=self.ctx.author.display_name,
+                         icon_url=self.ctx.author.display_avatar.url)
+        embed.set_footer(text=f"Page {self.page + 1}/{pages} • {len(rows)} cards • "
+                              f"Sorted by {SORTS[self.sort][0]}")
+
+        self.clear_items()
+        if visible:
+            self.add_item(InventorySelect(visible))
+        self.add_item(CardSortSelect(self.sort))
+        self.add_item(CardRaritySelect(self.rarity))
+        prev_button = BrowsePageButton("previous", "⬅️ Previous")
+        prev_button.disabled = self.page <= 0
+        next_button = BrowsePageButton("next", "➡️ Next")
+        next_button.disabled = self.page >= pages - 1
+        self.add_item(prev_button)
+        self.add_item(next_button)
+        return embed
+
+    async def update_display(self, interaction):
+        await interaction.response.edit_message(embed=self.render(), view=self)
+
+
+class BrowsePageButton(Button):
+    """Previous/next page for CardBrowserView and FragmentBrowserView"""
+
+    def __init__(self, direction, label):
+        super().__init__(style=discord.ButtonStyle.primary, label=label, row=3)
+        self.direction = direction
+
+    async def callback(self, interaction: discord.Interaction):
+        view = self.view
+        view.page = max(0, view.page + (1 if self.direction == "next" else -1))
+        await view.update_display(interaction)
+
+
+class CardSortSelect(Select):
+    def __init__(self, current):
+        options = [discord.SelectOption(label=f"Sort: {label}", value=key, default=key == current)
+                   for key, (label, _) in SORTS.items()]
+        super().__init__(placeholder="Sort by...", min_values=1, max_values=1, options=options, row=1)
+
+    async def callback(self, interaction: discord.Interaction):
+        self.view.sort = self.values[0]
+        self.view.page = 0
+        await self.view.update_display(interaction)
+
+
+class CardRaritySelect(Select):
+    def __init__(self, current):
+        options = [discord.SelectOption(label="All rarities", value="all", default=current is None)]
+        for code, info in list(catalog.rarities.items())[:24]:
+            emoji = info.get("emoji", "⭐")
+            options.append(discord.SelectOption(
+                label=info.get("display_name", code), value=code, default=code == current,
+                emoji=emoji if isinstance(emoji, str) else None))
+        super().__init__(placeholder="Filter by rarity...", min_values=1, max_values=1, options=options, row=2)
+
+    async def callback(self, interaction: discord.Interaction):
+        self.view.rarity = None if self.values[0] == "all" else self.values[0]
+        self.view.page = 0
+        await self.view.update_display(interaction)
+
+
+class FragmentBrowserView(View):
+    """Fragments of one rarity at a time, FRAGMENT_PAGE_SIZE per page (ls finv)."""
+
+    def __init__(self, owner_id, groups, options, emojis):
+        super().__init__(timeout=120)
+        self.owner_id = owner_id
+        self.groups = groups
+        self.emojis = emojis
+        self.rarity = None
+        self.page = 0
+        self.add_item(FragmentRaritySelect(options))
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.owner_id:
+            await interaction.response.send_message("❌ This menu isn't for you.", ephemeral=True)
+            return False
+        return True
+
+    async def update_display(self, interaction):
+        frag_list = self.groups.get(self.rarity, [])
+        pages = max(1, (len(frag_list) + FRAGMENT_PAGE_SIZE - 1) // FRAGMENT_PAGE_SIZE)
+        self.page = min(self.page, pages - 1)
+        start = self.page * FRAGMENT_PAGE_SIZE
+        rarity_info = catalog.rarity(self.rarity)
+        rarity_display = rarity_info.get("display_name", self.rarity)
+
+        # Build fragment lines with placeholder emojis per character
+        lines = []
+        for name, count in frag_list[start:start + FRAGMENT_PAGE_SIZE]:
+            # placeholder; replace in emoji.json later
+            char_emoji = self.emojis.get(name) or "🧩"
+            lines.append(f"• {char_emoji} **{name}:** `{count}`")
+
+        desc = "\n".join(
+            lines) if lines else "No fragments for this rarity."
+
+        rarity_embed = discord.Embed(
+            title=f"💎 Fragments — {rarity_display}",
+            description=desc,
+            color=0x9B59B6
+        )
+        rarity_embed.set_author(
+            name=interaction.user.display_name, icon_url=interaction.user.display_avatar.url)
+        rarity_embed.set_footer(
+            text=f"Page {self.page + 1}/{pages} • Edit emoji.json to add custom emojis for each character.")
+
+        for item in [item for item in self.children if isinstance(item, BrowsePageButton)]:
+            self.remove_item(item)
+        if pages > 1:
+            prev_button = BrowsePageButton("previous", "⬅️ Previous")
+            prev_button.disabled = self.page <= 0
+            next_button = BrowsePageButton("next", "➡️ Next")
+            next_button.disabled = self.page >= pages - 1
+            self.add_item(prev_button)
+            self.add_item(next_button)
+
+        await interaction.response.edit_message(embed=rarity_embed, view=self)
+
+
+class FragmentRaritySelect(Select):
+    def __init__(self, options):
+        super().__init__(
+            placeholder="Select a rarity to view its fragments...",
+            min_values=1,
+            max_values=1,
+            options=options
+        )
+
+    async def callback(self, interaction: discord.Interaction):
+        self.view.rarity = self.values[0]
+        self.view.page = 0
+        await self.view.update_display(interaction)
+
+
 class Info(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -374,8 +563,8 @@ class Info(commands.Cog):
     @commands.command(name="ci", aliases=["cardinfo"])
     async def card_info(self, ctx, *, card_name: str = None):
         """Show information about a specific card. Usage: ls ci <card_name> or ls ci all or ls ci <rarity>"""
-        cards_db = load(CARDS_FILE)
-        rarities = load(RARITIES_FILE)
+        cards_db = catalog.cards
+        rarities = catalog.rarities
 
         # Handle "all" case
         if card_name and card_name.lower() == "all":
@@ -393,20 +582,13 @@ class Info(commands.Cog):
             )
             return await ctx.send(embed=embed)
 
-        # Search for card (case-insensitive, partial match)
-        card = None
-        search_lower = card_name.lower()
-
-        # Exact match first (filter out tickets)
-        for c in cards_db.values():
-            if c.get('name', '').lower() == search_lower and not c.get('id', '').endswith('_ticket'):
-                card = c
-                break
+        # Search for card (shared ranking: exact, word prefix, substring, typo; no tickets)
+        matches = [c for c in card_index().search(card_name)
+                   if not c.get('id', '').endswith('_ticket')]
+        card = matches[0] if matches and fold(matches[0].get('name', '')) == fold(card_name) else None
 
-        # Partial match if no exact match (filter out tickets)
+        # Show every match, best first, if there's no exact one
         if not card:
-            matches = [c for c in cards_db.values() if search_lower in c.get(
-                'name', '').lower() and not c.get('id', '').endswith('_ticket')]
             if len(matches) >= 1:
                 # Show all matching cards one by one with navigation
                 view = CardNavigationView(
@@ -456,8 +638,7 @@ class Info(commands.Cog):
                 )
                 return await ctx.send(embed=embed)
         else:  # owned
-            users = load(USERS_FILE)
-            user = ensure_user(users, str(ctx.author.id))
+            user = user_store.ensure(str(ctx.author.id))
             cards = user.get("cards", [])
             if not cards:
                 embed = discord.Embed(
@@ -495,13 +676,11 @@ class Info(commands.Cog):
                 )
                 return await ctx.send(embed=embed)
         else:  # owned
-            users = load(USERS_FILE)
-            user = ensure_user(users, str(ctx.author.id))
+            user = user_store.ensure(str(ctx.author.id))
             owned_cards = user.get("cards", [])
             cards = []
             for owned_card in owned_cards:
-                base_card = next((b for b in cards_db.values() if b.get(
-                    'name') == owned_card.get('name')), None)
+                base_card = catalog.card_by_name(owned_card.get('name'))
                 if base_card and base_card.get('rarity') == rarity_key:
                     cards.append(owned_card)
 
@@ -526,8 +705,8 @@ class Info(commands.Cog):
     @commands.command(name="mci", aliases=["mycardinfo", "myci"])
     async def my_card_info(self, ctx, *, card_name: str = None):
         """Show information about your specific card with current stats. Usage: ls mci <card_name> or ls mci all or ls mci <rarity>"""
-        cards_db = load(CARDS_FILE)
-        rarities = load(RARITIES_FILE)
+        cards_db = catalog.cards
+        rarities = catalog.rarities
 
         # Handle "all" case
         if card_name and card_name.lower() == "all":
@@ -545,26 +724,21 @@ class Info(commands.Cog):
             )
             return await ctx.send(embed=embed)
 
-        users = load(USERS_FILE)
-        user = ensure_user(users, str(ctx.author.id))
-        save(USERS_FILE, users)
+        user = user_store.ensure(str(ctx.author.id))
 
         user_cards = user.get("cards", [])
 
-        # Find owned card (fuzzy search)
+        # Find owned card (shared search over the names the user owns)
+        ranked = search_names({c.get('name', '') for c in user_cards}, card_name)
+        order = {name: i for i, name in enumerate(ranked)}
         owned_card = None
-        search_lower = card_name.lower()
+        if ranked and fold(ranked[0]) == fold(card_name):
+            owned_card = next(c for c in user_cards if c.get('name', '') == ranked[0])
 
-        # Exact match first
-        for c in user_cards:
-            if c.get('name', '').lower() == search_lower:
-                owned_card = c
-                break
-
-        # Partial match if no exact match
+        # Show every match, best first, if there's no exact one
         if not owned_card:
-            matches = [c for c in user_cards if search_lower in c.get(
-                'name', '').lower()]
+            matches = sorted((c for c in user_cards if c.get('name', '') in order),
+                             key=lambda c: order[c.get('name', '')])
             if len(matches) >= 1:
                 # Show all matching cards one by one with navigation
                 view = CardNavigationView(
@@ -602,9 +776,7 @@ class Info(commands.Cog):
 
     @commands.command(name="inv", aliases=["inventory", "cards"])
     async def inventory(self, ctx):
-        users = load(USERS_FILE)
-        user = ensure_user(users, str(ctx.author.id))
-        save(USERS_FILE, users)
+        user = user_store.ensure(str(ctx.author.id))
         cards = user.get("cards", [])
         tickets = user.get("tickets", {})
         chests = user.get("chests", {})
@@ -643,28 +815,19 @@ class Info(commands.Cog):
             rarity_text = "\n".join(
                 [f"• **{rar}:** `{count}`" for rar, count in sorted(rarity_count.items())])
             embed.add_field(
-                name="🎴 Cards", value=f"**Total:** `{len(cards)}`\n{rarity_text}", inline=False)
+                name="🎴 Cards", value=f"**Total:** `{len(cards)}`\n{rarity_text}\n\nBrowse them with `ls col`", inline=False)
 
         # Tickets section
         if tickets and any(tickets.values()):
-            bosses = load("data/bosses.json")
             ticket_lines = []
             for ticket_id, count in tickets.items():
                 if count > 0:
                     # Get boss name from ticket ID
-                    boss_name = ticket_id.replace(
-                        '_ticket', '').replace('_', ' ').title()
-
-                    # Try to get actual boss name from bosses.json
-                    found_boss = False
-                    for boss_key, boss_info in bosses.items():
-                        if f"{boss_info.get('name', '').lower().replace(' ', '_')}_ticket" == ticket_id:
-                            boss_name = boss_info.get('name', boss_name)
-                            found_boss = True
-                            break
+                    boss = catalog.boss_for_ticket(ticket_id)
+                    boss_name = boss['name'] if boss else ""
 
                     # If no boss found and name is "Unknown" or empty, use a better fallback
-                    if not found_boss or boss_name in ["Unknown", ""]:
+                    if boss_name in ["Unknown", ""]:
                         # Clean up the ticket ID for display
                         clean_name = ticket_id.replace(
                             '_ticket', '').replace('_', ' ').title()
@@ -695,11 +858,10 @@ class Info(commands.Cog):
 
         # Equipment section
         if equipment and any(equipment.values()):
-            weapons = load(WEAPONS_FILE)
             equip_lines = []
             for item_id, count in equipment.items():
                 if count > 0:
-                    weapon = weapons.get(item_id)
+                    weapon = catalog.weapon(item_id)
                     if weapon:
                         item_emoji = emojis.get(item_id, "⚔️")
                         equip_lines.append(
@@ -716,12 +878,10 @@ class Info(commands.Cog):
     @commands.command(name="finv", aliases=["fragments", "fragment", "shards"])
     async def fragment_inventory(self, ctx):
         """Interactive fragment inventory with rarity selector. Usage: ls finv"""
-        users = load(USERS_FILE)
-        user = ensure_user(users, str(ctx.author.id))
-        save(USERS_FILE, users)
-        fragments = user.get("fragments", {})
+        user_store.ensure(str(ctx.author.id))
+        groups = collection.fragments(ctx.author.id)
 
-        if not fragments or all(count == 0 for count in fragments.values()):
+        if not groups:
             embed = discord.Embed(
                 title="💎 Fragment Inventory",
                 description="You have no fragments yet!\n\nGet fragments by pulling duplicate characters.",
@@ -732,29 +892,8 @@ class Info(commands.Cog):
             embed.set_footer(text="Fragments are used for character upgrades!")
             return await ctx.send(embed=embed)
 
-        # Filter out zero fragments and sort by count
-        active_fragments = {name: count for name,
-                            count in fragments.items() if count > 0}
-        sorted_fragments = sorted(
-            active_fragments.items(), key=lambda x: x[1], reverse=True)
-
-        # Load data
-        rarities = load(RARITIES_FILE)
-        cards_db = load(CARDS_FILE)
-        emojis = load_emojis()
-
-        # Group fragments by rarity code
-        fragments_by_rarity = {}
-        for name, count in sorted_fragments:
-            card = next((c for c in cards_db.values()
-                        if c.get('name') == name), None)
-            if not card:
-                continue
-            rarity_code = card.get('rarity', 'C')
-            if rarity_code not in fragments_by_rarity:
-                fragments_by_rarity[rarity_code] = []
-            fragments_by_rarity[rarity_code].append((name, count))
-
+        # Fragments of cards no longer in the catalog are counted but not listed
+        fragments_by_rarity = {code: frags for code, frags in groups.items() if code is not None}
         if not fragments_by_rarity:
             embed = discord.Embed(
                 title="💎 Fragment Inventory",
@@ -765,12 +904,16 @@ class Info(commands.Cog):
                              icon_url=ctx.author.display_avatar.url)
             return await ctx.send(embed=embed)
 
+        # Load data
+        rarities = catalog.rarities
+        emojis = load_emojis()
+
         # Build base embed
         embed = discord.Embed(
             title=f"💎 {ctx.author.display_name}'s Fragment Inventory",
             description=(
-                f"**Total Fragments:** `{sum(active_fragments.values())}`\n"
-                f"**Unique Characters:** `{len(active_fragments)}`\n\n"
+                f"**Total Fragments:** `{sum(count for frags in groups.values() for _, count in frags)}`\n"
+                f"**Unique Characters:** `{sum(len(frags) for frags in groups.values())}`\n\n"
                 "Select a rarity from the menu below to view its fragments."
             ),
             color=0x9B59B6
@@ -792,64 +935,42 @@ class Info(commands.Cog):
                 value=rarity_code
             ))
 
-        # Define select for rarity filtering
-        class FragmentRaritySelect(Select):
-
-            def __init__(self, owner_id, fragments_by_rarity, rarities, emojis):
-                super().__init__(
-                    placeholder="Select a rarity to view its fragments...",
-                    min_values=1,
-                    max_values=1,
-                    options=options
-                )
-                self.owner_id = owner_id
-                self.fragments_by_rarity = fragments_by_rarity
-                self.rarities = rarities
-                self.emojis = emojis
-
-            async def callback(self, interaction: discord.Interaction):
-                if interaction.user.id != self.owner_id:
-                    await interaction.response.send_message("❌ This menu isn't for you.", ephemeral=True)
-                    return
-
-                rarity_code = self.values[0]
-                frag_list = self.fragments_by_rarity.get(rarity_code, [])
-                rarity_info = self.rarities.get(rarity_code, {})
-                rarity_display = rarity_info.get("display_name", rarity_code)
-                rarity_emoji = rarity_info.get("emoji", "⭐")
-
-                # Build fragment lines with placeholder emojis per character
-                lines = []
-                for name, count in frag_list[:15]:
-                    # placeholder; replace in emoji.json later
-                    char_emoji = self.emojis.get(name) or "🧩"
-                    lines.append(f"• {char_emoji} **{name}:** `{count}`")
-                if len(frag_list) > 15:
-                    lines.append(f"*...and {len(frag_list) - 15} more*")
-
-                desc = "\n".join(
-                    lines) if lines else "No fragments for this rarity."
-
-                rarity_embed = discord.Embed(
-                    title=f"💎 Fragments — {rarity_display}",
-                    description=desc,
-                    color=0x9B59B6
-                )
-                rarity_embed.set_author(
-                    name=interaction.user.display_name, icon_url=interaction.user.display_avatar.url)
-                rarity_embed.set_footer(
-                    text="Edit emoji.json to add custom emojis for each character.")
+        view = FragmentBrowserView(ctx.author.id, fragments_by_rarity, options[:25], emojis)
+        await ctx.send(embed=embed, view=view)
 
-                await interaction.response.edit_message(embed=rarity_embed, view=self.view)
+    @commands.command(name="col", aliases=["collection", "browse"])
+    async def collection_browser(self, ctx, *args):
+        """Browse your cards page by page. Usage: ls col [sort] [rarity] [lv:N] [aura:N] [name]"""
+        sort, rarity, min_level, min_aura, words = "rarity", None, 0, 0, []
+        for arg in args:
+            key, _, value = arg.partition(":")
+            if value.isdigit() and key.lower() in ("lv", "lvl", "level"):
+                min_level = int(value)
+            elif value.isdigit() and key.lower() == "aura":
+                min_aura = int(value)
+            elif resolve_sort(arg):
+                sort = resolve_sort(arg)
+            elif arg.upper() in catalog.rarities:
+                rarity = arg.upper()
+            else:
+                words.append(arg)
 
-        view = View(timeout=120)
-        view.add_item(FragmentRaritySelect(
-            ctx.author.id, fragments_by_rarity, rarities, emojis))
+        user_store.ensure(str(ctx.author.id))
+        if not collection.rows(ctx.author.id):
+            embed = discord.Embed(
+                title="🎴 No Cards",
+                description="You have no cards yet!\n\nUse `ls pull` to get characters.",
+                color=0x95A5A6
+            )
+            return await ctx.send(embed=embed)
 
-        await ctx.send(embed=embed, view=view)
+        view = CardBrowserView(ctx, sort, rarity, min_level, min_aura, " ".join(words))
+        view.message = await ctx.send(embed=view.render(), view=view)
 
-    @commands.command(name="equip")
+    @commands.hybrid_command(name="equip")
+    @app_commands.autocomplete(card_name=autocomplete.owned_cards, item_name=autocomplete.weapons)
     async def equip(self, ctx, card_name: str = None, item_name: str = None):
+        """Equip a weapon on one of your cards. Usage: ls equip <card_name> <item_name>"""
         if not card_name or not item_name:
             embed = discord.Embed(
                 title="❌ Missing Arguments",
@@ -858,17 +979,12 @@ class Info(commands.Cog):
             )
             return await ctx.send(embed=embed)
 
-        users = load(USERS_FILE)
         uid = str(ctx.author.id)
-        user = ensure_user(users, uid)
-        save(USERS_FILE, users)
+        user = user_store.ensure(uid)
 
-        # 1. Find Card (Simple Search)
-        target_card = None
-        for c in user.get("cards", []):
-            if card_name.lower() in c['name'].lower():
-                target_card = c
-                break
+        # 1. Find Card (shared search over owned names)
+        owned_name = find_name({c['name'] for c in user.get("cards", [])}, card_name)
+        target_card = next((c for c in user.get("cards", []) if c['name'] == owned_name), None)
 
         if not target_card:
             embed = discord.Embed(
@@ -879,12 +995,10 @@ class Info(commands.Cog):
             return await ctx.send(embed=embed)
 
         # 2. Find Item in Inventory
-        weapons = load(WEAPONS_FILE)
-        item_id = None
-        for wid, w in weapons.items():
-            if item_name.lower() in w['name'].lower():
-                item_id = wid
-                break
+        weapons = catalog.weapons
+        item_id = weapon_index().best(item_name)
+        if item_id not in weapons:
+            item_id = None
 
         if not item_id:
             embed = discord.Embed(
@@ -913,7 +1027,7 @@ class Info(commands.Cog):
         target_card["equipped_item_id"] = item_id
         inv[item_id] -= 1
 
-        save(USERS_FILE, users)
+        user_store.mark_dirty(uid)
 
         embed = discord.Embed(
             title="✅ Equipment Updated",
@@ -927,9 +1041,7 @@ class Info(commands.Cog):
 
     @commands.command(name="profile", aliases=["p", "stats"])
     async def profile(self, ctx):
-        users = load(USERS_FILE)
-        user = ensure_user(users, str(ctx.author.id))
-        save(USERS_FILE, users)
+        user = user_store.ensure(str(ctx.author.id))
 
         wins = user.get("wins", 0)
         streak = user.get("streak", 0)
@@ -972,9 +1084,7 @@ class Info(commands.Cog):
     @commands.command(name="tickets", aliases=["ticket"])
     async def ticket_inventory(self, ctx):
         """View your boss tickets. Usage: ls tickets or ls ticket"""
-        users = load(USERS_FILE)
-        user = ensure_user(users, str(ctx.author.id))
-        save(USERS_FILE, users)
+        user = user_store.ensure(str(ctx.author.id))
 
         tickets = user.get("tickets", {})
 
@@ -996,9 +1106,6 @@ class Info(commands.Cog):
         sorted_tickets = sorted(active_tickets.items(),
                                 key=lambda x: x[1], reverse=True)
 
-        # Load bosses for display
-        bosses = load("data/bosses.json")
-
         embed = discord.Embed(
             title=f"🎫 {ctx.author.display_name}'s Ticket Inventory",
             description=f"**Total Tickets:** `{sum(active_tickets.values())}`\n**Unique Boss Tickets:** `{len(active_tickets)}`",
@@ -1013,21 +1120,11 @@ class Info(commands.Cog):
         ticket_lines = []
         for ticket_id, count in sorted_tickets:
             # Get boss name from ticket ID
-            boss_name = ticket_id.replace(
-                '_ticket', '').replace('_', ' ').title()
-
-            # Try to get actual boss name from bosses.json
-            boss_data = None
-            found_boss = False
-            for boss_key, boss_info in bosses.items():
-                if f"{boss_info.get('name', '').lower().replace(' ', '_')}_ticket" == ticket_id:
-                    boss_name = boss_info.get('name', boss_name)
-                    boss_data = boss_info
-                    found_boss = True
-                    break
+            boss_data = catalog.boss_for_ticket(ticket_id)
+            boss_name = boss_data['name'] if boss_data else ""
 
             # If no boss found and name is "Unknown" or empty, use a better fallback
-            if not found_boss or boss_name in ["Unknown", ""]:
+            if boss_name in ["Unknown", ""]:
                 # Clean up the ticket ID for display
                 clean_name = ticket_id.replace(
                     '_ticket', '').replace('_', ' ').title()
@@ -1,24 +1,109 @@
+import asyncio
+import time
+
 import discord
 from discord.ext import commands
-from utils.database import load
+import config
+from utils.database import aload, asave, user_store
+from utils.rankings import METRICS, Rankings, resolve_metric
 
-USERS_FILE = "data/users.json"
+PAGE_SIZE = 10
 
 
 class Leaderboard(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.rankings = Rankings(user_store)
+        user_store.subscribe(self.rankings.mark_stale)
+        # Latest snapshot and its pre-rendered pages: metric -> [embed, ...]
+        self.snapshot = None
+        self.pages = {}
+        self._task = None
 
-    @commands.command(name="lb", aliases=["leaderboard", "top"])
-    async def lb(self, ctx):
-        users = load(USERS_FILE)
-        # Filter out users with no yen data and sort
-        valid_users = [(uid, u) for uid, u in users.items()
-                       if isinstance(u, dict) and 'yen' in u]
-        sorted_users = sorted(
-            valid_users, key=lambda x: x[1].get('yen', 0), reverse=True)
-
-        if not sorted_users:
+    async def cog_load(self):
+        self._task = asyncio.get_running_loop().create_task(self._snapshot_loop())
+
+    def cog_unload(self):
+        user_store.unsubscribe(self.rankings.mark_stale)
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _snapshot_loop(self):
+        """Serve the saved snapshot straight away, then retake it every LEADERBOARD_SNAPSHOT_INTERVAL."""
+        saved = await aload(config.LEADERBOARD_SNAPSHOT_FILE)
+        if saved.get("boards"):
+            self._use_snapshot(saved)
+        while True:
+            age = time.time() - self.snapshot["taken"] if self.snapshot else None
+            if age is not None and age < config.LEADERBOARD_SNAPSHOT_INTERVAL:
+                await asyncio.sleep(config.LEADERBOARD_SNAPSHOT_INTERVAL - age)
+            try:
+                snapshot = self.rankings.snapshot(config.LEADERBOARD_SNAPSHOT_SIZE)
+                self._use_snapshot(snapshot)
+                await asave(config.LEADERBOARD_SNAPSHOT_FILE, snapshot)
+            except Exception as e:
+                print(f"Error taking leaderboard snapshot: {e}")
+                await asyncio.sleep(config.LEADERBOARD_SNAPSHOT_INTERVAL)
+
+    def _use_snapshot(self, snapshot):
+        pages = {}
+        for metric, rows in snapshot["boards"].items():
+            if metric not in METRICS:
+                continue
+            ranked = [(rank, uid, score) for rank, (uid, score) in enumerate(rows, 1)]
+            pages[metric] = [self._board_embed(metric, ranked[i:i + PAGE_SIZE], "🏆 Global Rankings")
+                             for i in range(0, len(ranked), PAGE_SIZE)]
+        self.snapshot, self.pages = snapshot, pages
+
+    def _board_embed(self, metric, rows, title):
+        _, unit, _ = METRICS[metric]
+        desc = ""
+        medals = ["🥇", "🥈", "🥉"]
+        for rank, uid, score in rows:
+            medal = medals[rank - 1] if rank <= 3 else f"**{rank}.**"
+            desc += f"{medal} <@{uid}> - `{score:,}` {unit}\n"
+        return discord.Embed(
+            title=title,
+            description=desc or "No players yet!",
+            color=0xFFD700
+        )
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        self.rankings.member_joined(member)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        self.rankings.member_left(member)
+
+    def _parse(self, args):
+        """(metric, page) from `[metric] [page]` in either order, or (None, page) for an unknown metric."""
+        metric, page = "yen", 1
+        for arg in args:
+            if arg.isdigit():
+                page = max(1, int(arg))
+            else:
+                metric = resolve_metric(arg)
+        return metric, page
+
+    async def _send_board(self, ctx, args, guild):
+        metric, page = self._parse(args)
+        if metric is None:
+            embed = discord.Embed(
+                title="❌ Unknown Leaderboard",
+                description="Choose one of: " + ", ".join(f"`{m}`" for m in METRICS),
+                color=0xE74C3C
+            )
+            return await ctx.send(embed=embed)
+
+        title, _, _ = METRICS[metric]
+        icon = ctx.guild.icon.url if ctx.guild and ctx.guild.icon else None
+        if guild is None and metric in self.pages:
+            return await self._send_snapshot_page(ctx, metric, page, title, icon)
+
+        total = self.rankings.count(metric, guild)
+        if not total:
             embed = discord.Embed(
                 title="🏆 Leaderboard",
                 description="No players found!",
@@ -26,24 +111,78 @@ class Leaderboard(commands.Cog):
             )
             return await ctx.send(embed=embed)
 
-        desc = ""
-        medals = ["🥇", "🥈", "🥉"]
+        pages = (total + PAGE_SIZE - 1) // PAGE_SIZE
+        page = min(page, pages)
+        rows = self.rankings.page(metric, (page - 1) * PAGE_SIZE, PAGE_SIZE, guild)
+        embed = self._board_embed(metric, rows, "🏆 Server Rankings" if guild else "🏆 Global Rankings")
+        embed.set_author(name=f"Top {title}", icon_url=icon)
+        mine = self.rankings.rank(metric, ctx.author.id, guild)
+        you = f"You are #{mine[0]:,}" if mine else "You are unranked"
+        embed.set_footer(text=f"Page {page}/{pages} • {you} • Compete to reach the top!")
+        await ctx.send(embed=embed)
+
+    async def _send_snapshot_page(self, ctx, metric, page, title, icon):
+        """A pre-rendered page of the last snapshot; reads no user data at all."""
+        pages = self.pages[metric]
+        if not pages:
+            embed = discord.Embed(
+                title="🏆 Leaderboard",
+                description="No players found!",
+                color=0xFFD700
+            )
+            return await ctx.send(embed=embed)
+        page = min(page, len(pages))
+        embed = pages[page - 1].copy()
+        embed.set_author(name=f"Top {title}", icon_url=icon)
+        embed.set_footer(text=f"Page {page}/{len(pages)} • Updated {_age(self.snapshot['taken'])} • "
+                              f"ls rank for your position")
+        await ctx.send(embed=embed)
+
+    @commands.command(name="lb", aliases=["leaderboard", "top"])
+    async def lb(self, ctx, *args):
+        """Global leaderboard from the latest snapshot. Usage: ls lb [yen|wins|streak|level|aura|cards] [page]"""
+        await self._send_board(ctx, args, None)
 
-        for i, (uid, u) in enumerate(sorted_users[:10]):
-            medal = medals[i] if i < 3 else f"**{i+1}.**"
-            yen = u.get('yen', 0)
-            desc += f"{medal} <@{uid}> - 💴 `{yen:,}` yen\n"
+    @commands.command(name="serverlb", aliases=["slb"])
+    async def serverlb(self, ctx, *args):
+        """This server's leaderboard. Usage: ls serverlb [metric] [page]"""
+        if ctx.guild is None:
+            return await ctx.send("❌ Server leaderboards only work in a server.")
+        await self._send_board(ctx, args, ctx.guild)
 
+    @commands.command(name="rank")
+    async def rank(self, ctx, metric: str = None):
+        """Your global and server rank. Usage: ls rank [metric]"""
+        key = resolve_metric(metric)
+        if key is None:
+            return await ctx.send("❌ Choose one of: " + ", ".join(f"`{m}`" for m in METRICS))
+
+        title, unit, _ = METRICS[key]
         embed = discord.Embed(
-            title="🏆 Global Rankings",
-            description=desc or "No players yet!",
+            title=f"📈 {ctx.author.display_name}'s Rank",
             color=0xFFD700
         )
-        embed.set_author(name="Top 10 Richest Players",
-                         icon_url=ctx.guild.icon.url if ctx.guild.icon else None)
-        embed.set_footer(text="Compete to reach the top!")
+        embed.set_thumbnail(url=ctx.author.display_avatar.url)
+        scopes = [("🌍 Global", None)]
+        if ctx.guild is not None:
+            scopes.append(("🏠 Server", ctx.guild))
+        for label, guild in scopes:
+            mine = self.rankings.rank(key, ctx.author.id, guild)
+            total = self.rankings.count(key, guild)
+            value = f"**#{mine[0]:,}** of `{total:,}` • `{mine[1]:,}` {unit}" if mine else "Unranked"
+            embed.add_field(name=label, value=value, inline=True)
+        embed.set_footer(text=f"Leaderboard: {title}")
         await ctx.send(embed=embed)
 
 
+def _age(taken):
+    seconds = max(0, int(time.time() - taken))
+    if seconds < 60:
+        return "just now"
+    if seconds < 3600:
+        return f"{seconds // 60}m ago"
+    return f"{seconds // 3600}h {seconds % 3600 // 60}m ago"
+
+
 async def setup(bot):
     await bot.add_cog(Leaderboard(bot))
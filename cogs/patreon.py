@@ -1,48 +1,25 @@
 import discord
 import time
-import json
-import os
 from discord.ext import commands
+from utils.database import user_store
 import config
 
-USERS_FILE = "data/users.json"
-
-
-def load(filename):
-    try:
-        if os.path.exists(filename):
-            with open(filename, 'r') as f:
-                return json.load(f)
-        return {}
-    except:
-        return {}
-
-
-def save(data, filename):
-    try:
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
-        with open(filename, 'w') as f:
-            json.dump(data, f, indent=2)
-    except Exception as e:
-        print(f"Error saving {filename}: {e}")
-
 
 class Patreon(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
-    def check_patreon_expiration(self, users):
+    def check_patreon_expiration(self):
         """Check and remove expired Patreon subscriptions"""
         now = int(time.time())
-        expired_users = []
+        expired_users = [uid for uid, user_data in user_store.scan()
+                         if "patreon" in user_data and user_data["patreon"]["expires_at"] <= now]
 
-        for uid, user_data in users.items():
-            if "patreon" in user_data:
-                if user_data["patreon"]["expires_at"] <= now:
-                    expired_users.append(uid)
-                    # Remove Patreon status
-                    del user_data["patreon"]
-                    user_data["max_pulls"] = 12  # Reset to default
+        for uid in expired_users:
+            user_data = user_store.get(uid)
+            # Remove Patreon status
+            user_data.pop("patreon", None)
+            user_data["max_pulls"] = 12  # Reset to default
 
         return expired_users
 
@@ -51,10 +28,9 @@ class Patreon(commands.Cog):
         """Interactive Patreon information command"""
 
         # Check for expired subscriptions
-        users = load(USERS_FILE)
-        expired = self.check_patreon_expiration(users)
+        expired = self.check_patreon_expiration()
         if expired:
-            save(USERS_FILE, users)
+            user_store.mark_dirty(*expired)
 
         # Create interactive Patreon info view
         class PatreonView(discord.ui.View):
@@ -211,13 +187,10 @@ class Patreon(commands.Cog):
                 return
 
             # Store Patreon info in user data
-            users = load(USERS_FILE)
             uid = str(user_id)
+            user = user_store.ensure(uid)
 
-            if uid not in users:
-                users[uid] = {}
-
-            users[uid]["patreon"] = {
+            user["patreon"] = {
                 "tier": tier,
                 "name": tier_info["name"],
                 "added_at": int(time.time()),
@@ -228,13 +201,13 @@ class Patreon(commands.Cog):
 
             # Apply perks immediately
             if tier == "1":
-                users[uid]["max_pulls"] = 14  # +2 extra pulls
+                user["max_pulls"] = 14  # +2 extra pulls
             elif tier == "2":
-                users[uid]["max_pulls"] = 17  # +5 extra pulls
+                user["max_pulls"] = 17  # +5 extra pulls
             elif tier == "3":
-                users[uid]["max_pulls"] = 22  # +10 extra pulls
+                user["max_pulls"] = 22  # +10 extra pulls
 
-            save(USERS_FILE, users)
+            user_store.mark_dirty(uid)
 
             # Try to assign Discord role if role_id is set
             guild = ctx.guild
@@ -280,7 +253,7 @@ class Patreon(commands.Cog):
                 return
 
             # Remove Patreon info from user data
-            users = load(USERS_FILE)
+            users = user_store.load()
             uid = str(user_id)
 
             if uid in users and "patreon" in users[uid]:
@@ -290,7 +263,7 @@ class Patreon(commands.Cog):
                 # Reset max pulls to default
                 users[uid]["max_pulls"] = 12
 
-                save(USERS_FILE, users)
+                user_store.mark_dirty(uid)
 
                 embed = discord.Embed(
                     title="❌ Patreon Status Removed",
@@ -309,10 +282,9 @@ class Patreon(commands.Cog):
     async def patreon_list(self, ctx):
         """List all current patrons"""
 
-        users = load(USERS_FILE)
         patrons = []
 
-        for uid, user_data in users.items():
+        for uid, user_data in user_store.scan():
             if "patreon" in user_data:
                 user = self.bot.get_user(int(uid))
                 if user:
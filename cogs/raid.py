@@ -3,18 +3,34 @@ import random
 import asyncio
 from discord.ext import commands
 from discord.ui import View, Button
-from utils.database import load, save
-from utils.battle_engine import BattleEngine
-from utils.game_math import compute_stats
+from utils.database import user_store
+from utils.battle_engine import PooledRaid
+from utils.catalog import catalog, ticket_id
+from utils.teams import team_cache
 
-BOSSES_FILE = "data/bosses.json"
-USERS_FILE = "data/users.json"
-CARDS_FILE = "data/cards.json"
 
 # Memory Lobby: { "CODE": { "host": int, "boss": str, "members": [int] } }
 active_lobbies = {}
 
 
+def raid_log(battle, events):
+    """Battle log text for a finished PooledRaid."""
+    logs = []
+    for event in events:
+        if event.kind == "team_attack":
+            logs.append(f"**Turn {event.turn}**")
+            hp_bar = "█" * int((event.target_hp / battle.boss.max_hp) * 10)
+            logs.append(f"Team dealt **{event.amount:,}** dmg! Boss: `{hp_bar}` ({event.target_hp:,})")
+            if event.crits:
+                details = [f"{name} **CRIT!**" for name in event.crits]
+                logs.append(f"Notable: {', '.join(details)}")
+        else:
+            logs.append(f"👹 Boss attacked for **{event.amount:,}** damage!")
+    result_text = "🏆 **VICTORY**" if battle.won else "💀 **DEFEAT**"
+    logs.append(f"\n{result_text}")
+    return "\n".join(logs)
+
+
 class LobbyView(View):
     def __init__(self, code, boss_data, max_players):
         super().__init__(timeout=600)
@@ -66,23 +82,13 @@ class LobbyView(View):
         )
 
         # --- BATTLE LOGIC ---
-        users = load(USERS_FILE)
-        cards_db = load(CARDS_FILE)
-
+        users = user_store.load()
         team_cards = []
 
         # Get cards from all players
         for uid in lobby['members']:
-            user_cards = users.get(str(uid), {}).get("cards", [])
             # Take top 2 cards per player
-            for c in user_cards[:2]:
-                base = next((v for v in cards_db.values()
-                            if v['name'] == c['name']), None)
-                if base:
-                    stats = compute_stats(base, c['level'], c.get(
-                        'aura', 0), c.get('equipped_item_id'))
-                    team_cards.append(
-                        {"name": c['name'], "atk": stats['attack'], "hp": stats['health']})
+            team_cards.extend(team_cache.get(uid, size=2, use_saved=False))
 
         if not team_cards:
             embed = discord.Embed(
@@ -93,13 +99,15 @@ class LobbyView(View):
             return await interaction.channel.send(embed=embed)
 
         # Simulate
-        result = BattleEngine.simulate_raid(team_cards, self.boss['stats'])
+        battle = PooledRaid(team_cards, self.boss['stats'])
+        log = raid_log(battle, battle.run())
+        win = battle.won
 
         # Battle result embed
         result_embed = discord.Embed(
             title=f"⚔️ Raid: {self.boss['name']}",
-            description=result['log'][:2000],
-            color=0x2ECC71 if result['win'] else 0xE74C3C
+            description=log[:2000],
+            color=0x2ECC71 if win else 0xE74C3C
         )
         result_embed.set_author(
             name="Raid Battle Results", icon_url=interaction.user.display_avatar.url)
@@ -109,14 +117,14 @@ class LobbyView(View):
 
         result_embed.add_field(
             name="🎯 Result",
-            value="✅ **VICTORY!**" if result['win'] else "❌ **DEFEAT**",
+            value="✅ **VICTORY!**" if win else "❌ **DEFEAT**",
             inline=True
         )
 
         await interaction.channel.send(embed=result_embed)
 
         # Rewards
-        if result['win']:
+        if win:
             rewards_embed = discord.Embed(
                 title="🎁 Raid Rewards",
                 description="Rewards have been distributed to all participants!",
@@ -139,7 +147,7 @@ class LobbyView(View):
                     u["equipment"][wid] = u["equipment"].get(wid, 0) + 1
                     rewards_text += f"✨ <@{uid}> **DROPPED {wid}!**\n"
 
-            save(USERS_FILE, users)
+            user_store.mark_dirty(*lobby['members'])
             rewards_embed.description = rewards_text
             await interaction.channel.send(embed=rewards_embed)
 
@@ -148,25 +156,6 @@ class Raid(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
-    def ensure_user(self, users, uid):
-        """Ensure user exists in database"""
-        if uid not in users:
-            users[uid] = {
-                "yen": 0,
-                "cards": [],
-                "fragments": {},
-                "unlocked": [],
-                "pulls": 12,
-                "chests": {},
-                "tickets": {},
-                "equipment": {},
-                "wins": 0,
-                "streak": 0,
-                "last_pull_regen_ts": 0,
-                "last_claim_ts": 0,
-                "reset_tokens": 0
-            }
-        return users[uid]
 
     @commands.command(name="raid")
     async def raid_base(self, ctx, action: str = None, *, arg: str = ""):
@@ -179,10 +168,7 @@ class Raid(commands.Cog):
                 )
                 return await ctx.send(embed=embed)
 
-            bosses = load(BOSSES_FILE)
-            # Fuzzy search
-            boss = next((b for b in bosses.values()
-                        if b['name'].lower() == arg.lower()), None)
+            boss = catalog.boss(arg)
 
             if not boss:
                 embed = discord.Embed(
@@ -192,10 +178,8 @@ class Raid(commands.Cog):
                 )
                 return await ctx.send(embed=embed)
 
-            users = load(USERS_FILE)
-            user = self.ensure_user(users, str(ctx.author.id))
-            save(USERS_FILE, users)
-            tid = f"{boss['name'].lower().replace(' ', '_')}_ticket"
+            user = user_store.ensure(str(ctx.author.id))
+            tid = ticket_id(boss['name'])
 
             if user.get("tickets", {}).get(tid, 0) < 1:
                 embed = discord.Embed(
@@ -207,7 +191,7 @@ class Raid(commands.Cog):
 
             # Consume
             user["tickets"][tid] -= 1
-            save(USERS_FILE, users)
+            user_store.mark_dirty(ctx.author.id)
 
             # Code
             code = f"{boss['name'][:3].upper()}-{random.randint(1000, 9999)}"
@@ -22,6 +22,37 @@ PULL_REGEN_SECONDS = 900
 DAILY_COOLDOWN = 86400
 GANG_CREATE_COST = 150000
 MINE_COOLDOWN = 14400  # 4 hours
+FIGHT_POWER_BAND = 0.25  # ls fight prefers opponents within ±25% team power
+USER_FLUSH_INTERVAL = 30  # seconds between background saves of users.json
+# ls lb serves the top LEADERBOARD_SNAPSHOT_SIZE per metric from a snapshot
+# retaken every LEADERBOARD_SNAPSHOT_INTERVAL seconds
+LEADERBOARD_SNAPSHOT_INTERVAL = 300
+LEADERBOARD_SNAPSHOT_SIZE = 100
+LEADERBOARD_SNAPSHOT_FILE = "data/leaderboard_snapshot.json"
+# Print the users each command wrote vs. actually changed
+LOG_WRITE_AMPLIFICATION = os.getenv("LOG_WRITE_AMPLIFICATION", "0") != "0"
+
+# Storage: "json" keeps data/*.json, "sqlite" uses SQLITE_FILE
+# (python -m utils.database migrate copies the JSON files across),
+# "shards" splits users.json into USER_SHARDS files under USER_SHARD_DIR
+# (python -m utils.database shard / unshard)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "json")
+SQLITE_FILE = "data/bot.db"
+USER_SHARD_DIR = "data/users"
+USER_SHARDS = 16
+# Standalone name table from before it was stored with the users data;
+# read only when the users data has no table yet
+CARD_INDEX_FILE = "data/card_index.json"
+# user -> gang/crew membership, rebuilt only when gangs/crews.json changed behind its back
+FACTION_INDEX_FILE = "data/faction_index.json"
+# Hash of the slash commands last synced; startup skips the sync while it matches
+SLASH_SYNC_FILE = "data/slash_sync.json"
+# With the JSON backend, user changes are appended to USER_JOURNAL_FILE and
+# folded back into users.json once the journal passes JOURNAL_COMPACT_BYTES
+USER_JOURNAL = os.getenv("USER_JOURNAL", "1") != "0"
+USER_JOURNAL_FILE = "data/users.journal"
+JOURNAL_COMMIT_MS = 5  # group journal writes into one fsync per window
+JOURNAL_COMPACT_BYTES = 4 * 1024 * 1024
 
 # URLs (Placeholders - Replace with your actual URLs)
 IMG_SUMMON_ORB = "https://media.tenor.com/2RoDo8pZt6wAAAAC/black-clover-mobile-summon.gif"
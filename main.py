@@ -2,7 +2,12 @@ import discord
 import os
 import config
 import asyncio
+import sys
 from discord.ext import commands
+from utils.assets import assets
+from utils.catalog import catalog
+from utils.database import storage_io, user_store
+from utils.slash import sync_commands
 from flask import Flask
 from threading import Thread
 
@@ -64,7 +69,41 @@ async def main():
         except Exception as e:
             print(f"Failed to load {extension}: {e}")
 
-    await bot.start(config.TOKEN)
+    # Build the static embeds now so size-limit warnings show at startup
+    print(f"Built {assets.build_all()} static embeds")
+
+    # Serve users from memory and flush changes in the background
+    catalog.reload()
+    user_store.start()
+    try:
+        await bot.start(config.TOKEN)
+    finally:
+        await user_store.close()
+        storage_io.close()
+
+
+@bot.before_invoke
+async def track_writes(ctx):
+    user_store.begin_command(ctx.command.qualified_name)
+
+
+@bot.after_invoke
+async def count_writes(ctx):
+    user_store.end_command()
+
+
+@bot.event
+async def setup_hook():
+    # Register the slash versions of hybrid commands (bossraid, teamadd, kill, equip, capture)
+    # only if they changed since the last sync; `python main.py --sync` forces it
+    try:
+        synced = await sync_commands(bot.tree, force="--sync" in sys.argv)
+        if synced is None:
+            print("Slash commands unchanged, skipped sync")
+        else:
+            print(f"Synced {synced} slash commands")
+    except Exception as e:
+        print(f"Failed to sync slash commands: {e}")
 
 
 @bot.event
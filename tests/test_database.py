@@ -0,0 +1,207 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+os.environ.setdefault("DISCORD_TOKEN", "test")
+
+from utils import database, inventory  # noqa: E402
+from utils.database import JournalBackend, JsonBackend, ShardedBackend, SqliteBackend, UserStore  # noqa: E402
+
+
+class UserStoreRoundTrip(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "users.json")
+        self.journal = os.path.join(self.tmp.name, "users.journal")
+        self._names = inventory.names
+        inventory.names = inventory.NameIndex(os.path.join(self.tmp.name, "card_index.json"))
+
+    def tearDown(self):
+        inventory.names = self._names
+        self.tmp.cleanup()
+
+    def store(self):
+        """A fresh store over the same files, as after a restart."""
+        return UserStore(self.path, backend=JournalBackend(self.path, self.journal))
+
+    def test_in_place_edit_reported_by_mark_dirty_survives_restart(self):
+        store = self.store()
+        store.ensure("1")["fragments"] = {"Mira Kim": 50}
+        store.mark_dirty("1")
+        store.flush()
+
+        store = self.store()
+        fragments = store.get("1")["fragments"]  # unpacks; the packed copy is kept
+        store._settle()  # a background settle drops the read baseline
+        fragments["Mira Kim"] = 999
+        store.mark_dirty("1")
+        store.flush()
+
+        self.assertEqual(dict(self.store().get("1")["fragments"]), {"Mira Kim": 999})
+
+    def test_field_deleted_after_restart_stays_deleted(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"1": {"v": 2, "yen": 5, "patreon": {"tier": "1"}}}, f)
+
+        store = self.store()
+        del store.get("1")["patreon"]
+        store.flush()
+
+        with open(self.journal, encoding="utf-8") as f:
+            self.assertEqual([json.loads(line) for line in f], [{"u": "1", "set": {}, "unset": ["patreon"]}])
+        self.assertEqual(dict(self.store().get("1")), {"v": 2, "yen": 5})
+
+    def test_migration_keeps_unlocked_order_and_repeats(self):
+        unlocked = ["Mira Kim", "Gun Park", "Mira Kim"]
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"1": {"unlocked": unlocked}}, f)
+        store = self.store()
+        self.assertEqual(store.migrate(), 1)
+        store.flush()
+        self.assertEqual(list(self.store().get("1")["unlocked"]), unlocked)
+
+    def test_pulls_do_not_follow_max_pulls(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"1": {"v": 2, "yen": 5}}, f)  # v2 left pulls out at the old MAX_PULLS
+        max_pulls = database.config.MAX_PULLS
+        store = self.store()
+        store.migrate()
+        store.ensure("2")["yen"] = 1
+        store.flush()
+        database.config.MAX_PULLS = max_pulls + 3
+        try:
+            store = self.store()
+            self.assertEqual(store.get("1")["pulls"], 12)
+            self.assertEqual(store.get("2")["pulls"], max_pulls)
+        finally:
+            database.config.MAX_PULLS = max_pulls
+
+    def test_missing_name_table_fails_on_load(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"1": {"v": 2, "fragments": [0, 50]}}, f)
+        with self.assertRaises(ValueError):
+            self.store().load()
+
+
+class WatchedInventory(unittest.TestCase):
+    """Inventory fields that were only read go back to their packed form at the flush."""
+
+    CARD = {"name": "Mira Kim", "rarity": "A", "level": 1, "exp": 0, "evo": 0, "aura": 0}
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "users.json")
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"1": {"v": 3, "cards": [self.CARD]}}, f)
+        self._names = inventory.names
+        inventory.names = inventory.NameIndex(os.path.join(self.tmp.name, "card_index.json"))
+        self.store = UserStore(self.path, backend=JsonBackend(self.path))
+        self.store.migrate()
+        self.store.flush()
+
+    def tearDown(self):
+        inventory.names = self._names
+        self.tmp.cleanup()
+
+    def cards(self):
+        return dict.__getitem__(self.store.get("1"), "cards")
+
+    def test_read_only_command_repacks_and_writes_nothing(self):
+        self.store.begin_command("inv")
+        self.assertEqual(self.store.get("1")["cards"][0]["name"], "Mira Kim")
+        self.store.end_command()
+        self.assertEqual(self.store.command_stats["inv"]["written"], 0)
+        self.assertEqual(self.store.flush(), 0)
+        self.assertIsInstance(self.cards(), inventory.PackedCards)
+
+    def test_unmarked_change_is_still_saved(self):
+        self.store.begin_command("levelup")
+        self.store.get("1")["cards"][0]["level"] = 7
+        self.store.end_command()
+        self.assertEqual(self.store.flush(), 1)
+        store = UserStore(self.path, backend=JsonBackend(self.path))
+        self.assertEqual(store.get("1")["cards"][0]["level"], 7)
+
+    def test_running_command_keeps_its_unpacked_value(self):
+        self.store.begin_command("trade")
+        cards = self.store.get("1")["cards"]
+        self.store.flush()
+        self.assertIs(self.cards(), cards)
+        cards.append(dict(self.CARD))
+        self.store.end_command()
+        self.store.flush()
+        store = UserStore(self.path, backend=JsonBackend(self.path))
+        self.assertEqual(len(store.get("1")["cards"]), 2)
+
+
+class BackendSnapshots(unittest.TestCase):
+    """Flushes write what the records held on the loop thread, not what they hold later."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "users.json")
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"1": {"yen": 5}, "2": {"yen": 7}}, f)
+        self._names = inventory.names
+        inventory.names = inventory.NameIndex(os.path.join(self.tmp.name, "card_index.json"))
+
+    def tearDown(self):
+        inventory.names = self._names
+        self.tmp.cleanup()
+
+    def round_trip(self, backend, reopen):
+        async def run():
+            store = UserStore(self.path, backend=backend)
+            store.get("1")["yen"] = 100
+            store.get("1")["fragments"] = {"Mira Kim": 3}
+            store.mark_dirty("1")
+            async with store.transaction("2"):
+                store.get("2")["yen"] = -1  # half-way through; must not be written yet
+                flushing = asyncio.ensure_future(store.aflush())
+                await asyncio.sleep(0)
+                store.get("1")["yen"] = 200  # after the flush took its snapshot
+            await flushing
+            self.assertEqual(store.get("1")["yen"], 200)
+            return store
+        asyncio.run(run())
+        # A fresh process: the name table comes back from the users data, not card_index.json
+        inventory.names = inventory.NameIndex(os.path.join(self.tmp.name, "card_index.json"))
+        users = UserStore(self.path, backend=reopen())
+        self.assertEqual(users.get("1")["yen"], 100)
+        self.assertEqual(dict(users.get("1")["fragments"]), {"Mira Kim": 3})
+        self.assertEqual(users.get("2")["yen"], 7)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, "card_index.json")))
+
+    def test_json_backend(self):
+        self.round_trip(JsonBackend(self.path), lambda: JsonBackend(self.path))
+
+    def test_journal_compaction(self):
+        journal = os.path.join(self.tmp.name, "users.journal")
+        self.round_trip(JournalBackend(self.path, journal, compact_bytes=1),
+                        lambda: JsonBackend(self.path))  # the snapshot alone has it
+        self.assertEqual(os.path.getsize(journal), 0)
+
+    def test_sharded_backend(self):
+        shards = os.path.join(self.tmp.name, "users")
+        users_file = database.USERS_FILE
+        database.USERS_FILE = self.path
+        try:
+            self.round_trip(ShardedBackend(shards, 4), lambda: ShardedBackend(shards))
+        finally:
+            database.USERS_FILE = users_file
+
+    def test_sqlite_backend(self):
+        db = os.path.join(self.tmp.name, "bot.db")
+        open(db, "w").close()  # not new, so nothing is imported from data/
+        backend = SqliteBackend(db)
+        backend.save_document("data/users.json", {"1": {"yen": 5}, "2": {"yen": 7}})
+        try:
+            self.round_trip(backend, lambda: backend)
+        finally:
+            backend.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+"""Static embeds (help pages, tier info...) built once and served as copies.
+
+A cog registers a builder under a key; the first `get()` (or `build_all()`
+at startup) builds it and checks it against Discord's embed limits, so an
+oversized help page shows up as a warning in the console instead of a
+failed send. Each `get()` returns a copy the caller can personalise
+(author icon, footer) without touching the cached one.
+"""
+# Discord's embed limits
+MAX_TITLE = 256
+MAX_DESCRIPTION = 4096
+MAX_FIELDS = 25
+MAX_FIELD_NAME = 256
+MAX_FIELD_VALUE = 1024
+MAX_FOOTER = 2048
+MAX_AUTHOR = 256
+MAX_TOTAL = 6000
+
+_UNSET = object()
+
+
+def embed_problems(embed):
+    """Descriptions of every limit `embed` breaks; empty if it can be sent."""
+    problems = []
+
+    def check(label, text, limit):
+        if text and len(text) > limit:
+            problems.append(f"{label} is {len(text)} characters (max {limit})")
+
+    check("title", embed.title, MAX_TITLE)
+    check("description", embed.description, MAX_DESCRIPTION)
+    check("footer", embed.footer.text, MAX_FOOTER)
+    check("author", embed.author.name, MAX_AUTHOR)
+    if len(embed.fields) > MAX_FIELDS:
+        problems.append(f"{len(embed.fields)} fields (max {MAX_FIELDS})")
+    for i, field in enumerate(embed.fields, 1):
+        check(f"field {i} name", field.name, MAX_FIELD_NAME)
+        check(f"field {i} value", field.value, MAX_FIELD_VALUE)
+    if len(embed) > MAX_TOTAL:
+        problems.append(f"{len(embed)} characters in total (max {MAX_TOTAL})")
+    return problems
+
+
+def _copy(embed):
+    """Copy of an embed that shares its strings. Field dicts are copied so
+    `add_field()` / `set_field_at()` leave the original alone; the other
+    setters replace their dicts rather than edit them."""
+    clone = object.__new__(type(embed))
+    for attr in type(embed).__slots__:
+        value = getattr(embed, attr, _UNSET)
+        if value is not _UNSET:
+            setattr(clone, attr, value)
+    fields = getattr(embed, "_fields", None)
+    if fields is not None:
+        clone._fields = [dict(field) for field in fields]
+    return clone
+
+
+class AssetRegistry:
+    def __init__(self):
+        self._builders = {}  # key -> build()
+        self._embeds = {}  # key -> built embed
+
+    def embed(self, key):
+        """Decorator registering `build() -> discord.Embed` under `key`."""
+        def register(build):
+            self._builders[key] = build
+            self._embeds.pop(key, None)
+            return build
+        return register
+
+    def _build(self, key):
+        embed = self._builders[key]()
+        for problem in embed_problems(embed):
+            print(f"Warning: embed asset '{key}': {problem}")
+        self._embeds[key] = embed
+        return embed
+
+    def get(self, key):
+        """A copy of the embed registered under `key`."""
+        embed = self._embeds.get(key)
+        if embed is None:
+            embed = self._build(key)
+        return _copy(embed)
+
+    def build_all(self):
+        """Build every registered embed now, so limit warnings show at startup."""
+        for key in self._builders:
+            if key not in self._embeds:
+                self._build(key)
+        return len(self._embeds)
+
+
+assets = AssetRegistry()
@@ -0,0 +1,98 @@
+"""Autocomplete callbacks for the slash versions of name-taking commands.
+
+Catalog names (cards, bosses, weapons) come from the prebuilt indexes in
+utils.search and territories from the faction index. Owned cards and
+fragments are read from the caller's in-memory record once, and again
+only after user_store reports the user changed; keystrokes are answered
+from the card index restricted to those names, so they never load, unpack
+or mark user data.
+"""
+from discord import app_commands
+
+from utils import inventory
+from utils.catalog import catalog
+from utils.database import user_store
+from utils.factions import factions
+from utils.search import SearchIndex, boss_index, card_index, weapon_index
+
+MAX_CHOICES = 25  # Discord's limit per autocomplete response
+
+_owned = {}  # uid -> (card names, fragment names)
+_territories = None  # (factions.territory_version, SearchIndex)
+
+
+def _forget(uids):
+    for uid in uids:
+        _owned.pop(str(uid), None)
+
+
+user_store.subscribe(_forget)
+
+
+def _owned_names(uid):
+    """(card names, fragment names with count > 0) for a user, cached until they change."""
+    uid = str(uid)
+    hit = _owned.get(uid)
+    if hit is not None:
+        return hit
+    record = user_store.get(uid)
+    if record is None:
+        return frozenset(), frozenset()
+
+    # dict.get: read the stored (possibly packed) fields without unpacking them
+    cards = dict.get(record, "cards") or []
+    if isinstance(cards, inventory.PackedCards):
+        card_names = frozenset(inventory.names.name(i) for i in set(cards.columns["n"]))
+    else:
+        card_names = frozenset(c.get("name", "") for c in cards if isinstance(c, dict))
+    fragments = dict.get(record, "fragments") or {}
+    if isinstance(fragments, inventory.PackedCounts):
+        fragment_names = frozenset(inventory.names.name(i)
+                                   for i, count in zip(fragments.ids, fragments.counts) if count > 0)
+    else:
+        fragment_names = frozenset(name for name, count in fragments.items() if count > 0)
+    _owned[uid] = (card_names, fragment_names)
+    return card_names, fragment_names
+
+
+def _choices(pairs):
+    return [app_commands.Choice(name=str(name)[:100], value=str(value)[:100]) for name, value in pairs]
+
+
+def _owned_choices(names, current):
+    index = card_index()
+    pairs = [(name, card["name"]) for name, card in index.choices(current, MAX_CHOICES, among=names)]
+    unknown = [name for name in names if catalog.card_by_name(name) is None]
+    if unknown and len(pairs) < MAX_CHOICES:
+        # Owned names the catalog no longer has
+        extra = SearchIndex((name, name, ()) for name in unknown)
+        pairs += extra.choices(current, MAX_CHOICES - len(pairs))
+    return _choices(pairs)
+
+
+async def owned_cards(interaction, current: str):
+    """Cards the caller owns."""
+    return _owned_choices(_owned_names(interaction.user.id)[0], current)
+
+
+async def owned_fragments(interaction, current: str):
+    """Fragments the caller has at least one of."""
+    return _owned_choices(_owned_names(interaction.user.id)[1], current)
+
+
+async def bosses(interaction, current: str):
+    """Boss names; the value is the boss key, which `ls bossraid` accepts as is."""
+    return _choices(boss_index().choices(current, MAX_CHOICES))
+
+
+async def weapons(interaction, current: str):
+    return _choices((name, name) for name, _ in weapon_index().choices(current, MAX_CHOICES))
+
+
+async def territories(interaction, current: str):
+    """Territories some gang or crew holds (any other name captures a new one)."""
+    global _territories
+    if _territories is None or _territories[0] != factions.territory_version:
+        _territories = (factions.territory_version,
+                        SearchIndex((name, name, ()) for name in factions.territories()))
+    return _choices(_territories[1].choices(current, MAX_CHOICES))
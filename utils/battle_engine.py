@@ -1,67 +1,355 @@
+"""Headless battle engine shared by PvP, territory captures and boss raids.
+
+Battles hold `Combatant` objects and return structured `Event`s from each
+action; the Discord views decide how to render them. Every battle takes an
+`rng` (anything with a `.random()` method) so fights can be seeded, replayed
+or benchmarked without Discord: `python -m utils.battle_engine`.
+"""
 import random
+from typing import NamedTuple
+
+
+class Combatant:
+    __slots__ = ("name", "atk", "hp", "max_hp", "side", "index", "owner")
+
+    def __init__(self, name, atk, hp, max_hp=None, side=0, index=0, owner=None):
+        self.name = name
+        self.atk = atk
+        self.hp = hp
+        self.max_hp = max_hp if max_hp is not None else hp
+        self.side = side
+        self.index = index
+        self.owner = owner
+
+    @classmethod
+    def from_card(cls, card, side=0, index=0, owner=None):
+        """From a team entry as built by utils.teams ({name, atk, hp, max_hp})."""
+        return cls(card["name"], card["atk"], card["hp"], card.get("max_hp", card["hp"]),
+                   side, index, owner)
+
+    @property
+    def alive(self):
+        return self.hp > 0
+
+    @property
+    def hp_percent(self):
+        return int(self.hp / self.max_hp * 100) if self.max_hp > 0 else 0
+
+
+class Event(NamedTuple):
+    """One thing that happened in a battle.
+
+    kind is "attack", "defend", "heal", "pass" or "team_attack"; `amount` is
+    damage or healing; `target_hp` is the target's hp right after. For a
+    pooled "team_attack", `crits` lists the names of the cards that crit.
+    """
+    kind: str
+    turn: int
+    actor: object
+    target: object
+    amount: int = 0
+    target_hp: int = 0
+    crits: tuple = ()
+
+
+class AliveSet:
+    """Indices of living members with O(1) removal and uniform random choice."""
+
+    __slots__ = ("_items", "_pos")
+
+    def __init__(self, indices=()):
+        self._items = list(indices)
+        self._pos = {idx: i for i, idx in enumerate(self._items)}
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, idx):
+        return idx in self._pos
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def add(self, idx):
+        if idx not in self._pos:
+            self._pos[idx] = len(self._items)
+            self._items.append(idx)
+
+    def discard(self, idx):
+        i = self._pos.pop(idx, None)
+        if i is None:
+            return
+        last = self._items.pop()
+        if i < len(self._items):
+            self._items[i] = last
+            self._pos[last] = i
+
+    def choice(self, rng):
+        return self._items[int(rng.random() * len(self._items))]
+
+
+class Side:
+    """One team in a battle and the set of its members still standing."""
+
+    __slots__ = ("members", "alive")
+
+    def __init__(self, members):
+        self.members = members
+        self.alive = AliveSet(i for i, c in enumerate(members) if c.alive)
+
+    def random_alive(self, rng):
+        return self.members[self.alive.choice(rng)]
+
+    def hurt(self, target, dmg):
+        target.hp = max(0, target.hp - dmg)
+        if target.hp == 0:
+            self.alive.discard(target.index)
+
+    def heal(self, target, amount):
+        target.hp = min(target.max_hp, target.hp + amount)
+        if target.hp > 0:
+            self.alive.add(target.index)
+
+
+def _roll(rng, atk, low, spread):
+    return int(atk * (low + rng.random() * spread))
+
+
+class Duel:
+    """Two teams trading blows: each action is one hit plus a counter-attack.
+
+    Used for PvP (`ls fight`/`challenge`) and territory captures. Side 0 picks
+    its attacker (`attack(i)`) or lets the engine pick one (`step()`); a random
+    living enemy then hits back. Side 0 wins if it still has anyone standing
+    when the battle ends.
+    """
+
+    def __init__(self, team_a, team_b, max_turns=15, rng=random):
+        self.sides = (
+            Side([Combatant.from_card(c, 0, i) for i, c in enumerate(team_a)]),
+            Side([Combatant.from_card(c, 1, i) for i, c in enumerate(team_b)]),
+        )
+        self.max_turns = max_turns
+        self.rng = rng
+        self.turn = 0
+
+    @property
+    def finished(self):
+        a, b = self.sides
+        return not a.alive or not b.alive or self.turn >= self.max_turns
+
+    @property
+    def side_a_won(self):
+        return bool(self.sides[0].alive)
+
+    def _hit(self, attacker, defending):
+        target = defending.random_alive(self.rng)
+        dmg = _roll(self.rng, attacker.atk, 0.8, 0.4)
+        defending.hurt(target, dmg)
+        return Event("attack", self.turn, attacker, target, dmg, target.hp)
+
+    def attack(self, index):
+        """Side 0's card `index` attacks; returns the events (empty if nothing happened)."""
+        a, b = self.sides
+        attacker = a.members[index]
+        if not attacker.alive or not b.alive:
+            return []
+        events = [self._hit(attacker, b)]
+        if a.alive and b.alive:
+            events.append(self._hit(b.random_alive(self.rng), a))
+        self.turn += 1
+        return events
+
+    def step(self):
+        """One automatic exchange with a random side-0 attacker."""
+        a = self.sides[0]
+        if self.finished:
+            return []
+        return self.attack(a.random_alive(self.rng).index)
+
+    def run(self):
+        events = []
+        while not self.finished:
+            events.extend(self.step())
+        return events
+
+
+class BossFight:
+    """Several players' cards against one boss, taking turns in join order.
+
+    Each player gets one action per round: `attack(owner, card_name)`,
+    `defend(owner)`, `heal(owner)` or `pass_turn(owner)`. Every action except
+    passing draws a counter-attack from the boss on a random living card.
+    """
+
+    COUNTER = {"attack": (0.9, 0.3), "defend": (0.5, 0.2), "heal": (0.9, 0.3)}
+
+    def __init__(self, boss, parties, max_turns=20, rng=random):
+        """`boss` is {name, atk, hp}; `parties` is [(owner, team)] in turn order."""
+        self.boss = Combatant(boss["name"], boss["atk"], boss["hp"], side=1)
+        members = []
+        self.owners = []
+        self.cards = {}
+        for owner, team in parties:
+            self.owners.append(owner)
+            self.cards[owner] = []
+            for card in team:
+                c = Combatant.from_card(card, 0, len(members), owner)
+                members.append(c)
+                self.cards[owner].append(c)
+        self.party = Side(members)
+        self.max_turns = max_turns
+        self.rng = rng
+        self.turn = 0
+        self.acted = set()
+        self.victory = None
+
+    @property
+    def finished(self):
+        return self.victory is not None
+
+    @property
+    def current(self):
+        """Owner whose turn it is, or None once the fight is over."""
+        if self.finished:
+            return None
+        return next((o for o in self.owners if o not in self.acted), None)
+
+    def alive_cards(self, owner):
+        return [c for c in self.cards.get(owner, ()) if c.alive]
+
+    def _counter(self, kind):
+        if not self.boss.alive or not self.party.alive:
+            return []
+        target = self.party.random_alive(self.rng)
+        low, spread = self.COUNTER[kind]
+        dmg = _roll(self.rng, self.boss.atk, low, spread)
+        self.party.hurt(target, dmg)
+        return [Event("attack", self.turn, self.boss, target, dmg, target.hp)]
+
+    def _end_action(self, owner):
+        self.acted.add(owner)
+        self.turn += 1
+        if not self.boss.alive:
+            self.victory = True
+        elif not self.party.alive or self.turn >= self.max_turns:
+            self.victory = False
+        elif len(self.acted) >= len(self.owners):
+            self.acted.clear()
+
+    def attack(self, owner, card_name):
+        """Returns the events, or None if that card can't attack."""
+        card = next((c for c in self.alive_cards(owner) if c.name == card_name), None)
+        if card is None or self.finished:
+            return None
+        dmg = _roll(self.rng, card.atk, 0.8, 0.4)
+        self.boss.hp = max(0, self.boss.hp - dmg)
+        events = [Event("attack", self.turn, card, self.boss, dmg, self.boss.hp)]
+        events += self._counter("attack")
+        self._end_action(owner)
+        return events
+
+    def defend(self, owner):
+        events = [Event("defend", self.turn, owner, None)]
+        events += self._counter("defend")
+        self._end_action(owner)
+        return events
+
+    def heal(self, owner):
+        """Heal a random living card for 30% of its max hp; None if none are alive."""
+        alive = self.alive_cards(owner)
+        if not alive or self.finished:
+            return None
+        card = alive[int(self.rng.random() * len(alive))]
+        amount = int(card.max_hp * 0.3)
+        self.party.heal(card, amount)
+        events = [Event("heal", self.turn, card, card, amount, card.hp)]
+        events += self._counter("heal")
+        self._end_action(owner)
+        return events
+
+    def pass_turn(self, owner):
+        events = [Event("pass", self.turn, owner, None)]
+        self._end_action(owner)
+        return events
+
+
+class PooledRaid:
+    """Auto-resolved raid: all cards hit the boss each turn, the boss hits a shared hp pool.
+
+    Card damage rolls 60-100% of atk with a 15% chance of a 1.5x crit; the
+    boss rolls 80-120% of its attack.
+    """
+
+    def __init__(self, team, boss_stats, max_turns=15, rng=random):
+        self.team = [Combatant.from_card(c, 0, i) for i, c in enumerate(team)]
+        self.boss = Combatant("Boss", boss_stats["attack"], boss_stats["health"], side=1)
+        self.team_hp = sum(c.hp for c in self.team)
+        self.max_turns = max_turns
+        self.rng = rng
+        self.turn = 0
+
+    @property
+    def finished(self):
+        return not self.boss.alive or self.team_hp <= 0 or self.turn >= self.max_turns
+
+    @property
+    def won(self):
+        return not self.boss.alive
+
+    def step(self):
+        if self.finished:
+            return []
+        self.turn += 1
+        rng = self.rng
+        total = 0
+        crits = []
+        for card in self.team:
+            dmg = _roll(rng, card.atk, 0.6, 0.4)
+            if rng.random() < 0.15:
+                dmg = int(dmg * 1.5)
+                crits.append(card.name)
+            total += dmg
+        self.boss.hp -= total
+        events = [Event("team_attack", self.turn, None, self.boss, total,
+                        max(0, self.boss.hp), tuple(crits))]
+        if self.boss.alive:
+            dmg = _roll(rng, self.boss.atk, 0.8, 0.4)
+            self.team_hp -= dmg
+            events.append(Event("attack", self.turn, self.boss, None, dmg, max(0, self.team_hp)))
+        return events
+
+    def run(self):
+        events = []
+        while not self.finished:
+            events.extend(self.step())
+        return events
+
+
+if __name__ == "__main__":
+    # Benchmark: python -m utils.battle_engine [battles]
+    import sys
+    import time
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    team_a = [{"name": f"A{i}", "atk": 900 + 50 * i, "hp": 4000} for i in range(4)]
+    team_b = [{"name": f"B{i}", "atk": 1000, "hp": 4200 - 100 * i} for i in range(4)]
+    rng = random.Random(42)
+
+    start = time.perf_counter()
+    wins = 0
+    for _ in range(n):
+        duel = Duel(team_a, team_b, max_turns=20, rng=rng)
+        duel.run()
+        wins += duel.side_a_won
+    elapsed = time.perf_counter() - start
+    print(f"Duel: {n / elapsed:,.0f} battles/s (side A won {wins / n:.1%})")
 
-class BattleEngine:
-    @staticmethod
-    def simulate_raid(team_cards, boss_stats):
-        """
-        Simulates a party vs boss battle.
-        team_cards: List of dicts {'name': str, 'atk': int, 'hp': int}
-        boss_stats: Dict {'attack': int, 'health': int, 'speed': int}
-        """
-        logs = []
-        boss_hp = boss_stats['health']
-        boss_atk = boss_stats['attack']
-        
-        # Calculate Team Total HP
-        team_hp = sum(c['hp'] for c in team_cards)
-        
-        turn = 0
-        max_turns = 15
-        
-        while boss_hp > 0 and team_hp > 0 and turn < max_turns:
-            turn += 1
-            logs.append(f"**Turn {turn}**")
-            
-            # 1. Player Phase: All active cards attack
-            total_dmg = 0
-            details = []
-            
-            for card in team_cards:
-                if card['hp'] <= 0: continue
-                
-                # Damage Variance (60% - 100%)
-                variance = 0.6 + (random.random() * 0.4)
-                dmg = int(card['atk'] * variance)
-                
-                # Crit (15% Chance, 1.5x Dmg)
-                crit_text = ""
-                if random.random() < 0.15:
-                    dmg = int(dmg * 1.5)
-                    crit_text = " **CRIT!**"
-                
-                total_dmg += dmg
-                if crit_text: 
-                    details.append(f"{card['name']}{crit_text}")
-
-            boss_hp -= total_dmg
-            
-            # Log formatting
-            hp_bar = "█" * int((boss_hp / boss_stats['health']) * 10)
-            logs.append(f"Team dealt **{total_dmg:,}** dmg! Boss: `{hp_bar}` ({max(0, boss_hp):,})")
-            if details:
-                logs.append(f"Notable: {', '.join(details)}")
-
-            if boss_hp <= 0: break
-
-            # 2. Boss Phase
-            # Boss deals damage to collective HP (simplified raid logic)
-            boss_dmg = int(boss_atk * (0.8 + random.random() * 0.4))
-            team_hp -= boss_dmg
-            
-            logs.append(f"👹 Boss attacked for **{boss_dmg:,}** damage!")
-
-        win = boss_hp <= 0
-        result_text = "🏆 **VICTORY**" if win else "💀 **DEFEAT**"
-        logs.append(f"\n{result_text}")
-        
-        return { "win": win, "log": "\n".join(logs) }
\ No newline at end of file
+    start = time.perf_counter()
+    wins = 0
+    for _ in range(n):
+        raid = PooledRaid(team_a, {"attack": 2500, "health": 30000}, rng=rng)
+        raid.run()
+        wins += raid.won
+    elapsed = time.perf_counter() - start
+    print(f"PooledRaid: {n / elapsed:,.0f} raids/s (won {wins / n:.1%})")
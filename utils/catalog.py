@@ -0,0 +1,133 @@
+from types import MappingProxyType
+
+from utils.database import load
+
+CARDS_FILE = "data/cards.json"
+RARITIES_FILE = "data/rarities.json"
+BOSSES_FILE = "data/bosses.json"
+WEAPONS_FILE = "data/weapon.json"
+
+
+def ticket_id(boss_name):
+    """Inventory key for a boss's raid ticket, e.g. "Gun Park" -> "gun_park_ticket"."""
+    return f"{boss_name.lower().replace(' ', '_')}_ticket"
+
+
+class Catalog:
+    """Read-only game data (cards, rarities, bosses, weapons) loaded once and indexed.
+
+    The top-level mappings are read-only views; treat the entries as read-only
+    too. Call `reload()` after editing the JSON files; `version` goes up each
+    time so caches built from the catalog can tell they are stale.
+    """
+
+    def __init__(self):
+        self._version = 0
+        self._loaded = False
+
+    def _ensure(self):
+        if not self._loaded:
+            self.reload()
+
+    def reload(self):
+        cards = load(CARDS_FILE)
+        bosses = load(BOSSES_FILE)
+
+        by_name = {}
+        by_folded = {}
+        by_rarity = {}
+        for card in cards.values():
+            name = card.get("name")
+            if not name:
+                continue
+            by_name.setdefault(name, card)
+            by_folded.setdefault(name.casefold(), card)
+            by_rarity.setdefault(card.get("rarity", "C"), []).append(card)
+
+        boss_by_folded = {}
+        boss_by_ticket = {}
+        for boss in bosses.values():
+            name = boss.get("name")
+            if not name:
+                continue
+            boss_by_folded.setdefault(name.casefold(), boss)
+            boss_by_ticket.setdefault(ticket_id(name), boss)
+
+        self._cards = MappingProxyType(cards)
+        self._rarities = MappingProxyType(load(RARITIES_FILE))
+        self._bosses = MappingProxyType(bosses)
+        self._weapons = MappingProxyType(load(WEAPONS_FILE))
+        self._by_name = by_name
+        self._by_folded = by_folded
+        self._by_rarity = {k: tuple(v) for k, v in by_rarity.items()}
+        self._boss_by_folded = boss_by_folded
+        self._boss_by_ticket = boss_by_ticket
+        self._loaded = True
+        self._version += 1
+
+    @property
+    def version(self):
+        self._ensure()
+        return self._version
+
+    # ---- whole tables ----
+
+    @property
+    def cards(self):
+        """card id -> card"""
+        self._ensure()
+        return self._cards
+
+    @property
+    def rarities(self):
+        self._ensure()
+        return self._rarities
+
+    @property
+    def bosses(self):
+        self._ensure()
+        return self._bosses
+
+    @property
+    def weapons(self):
+        self._ensure()
+        return self._weapons
+
+    # ---- lookups ----
+
+    def card(self, card_id):
+        return self.cards.get(str(card_id))
+
+    def card_by_name(self, name):
+        """Card by display name; falls back to a case-insensitive match."""
+        self._ensure()
+        if not name:
+            return None
+        return self._by_name.get(name) or self._by_folded.get(name.casefold())
+
+    def cards_of_rarity(self, rarity):
+        self._ensure()
+        return self._by_rarity.get(rarity, ())
+
+    def rarity(self, key):
+        """Rarity info for a rarity code ({} if unknown)."""
+        return self.rarities.get(key, {})
+
+    def rarity_of(self, card_name):
+        card = self.card_by_name(card_name)
+        return card.get("rarity", "C") if card else None
+
+    def boss(self, name):
+        """Boss by name, case-insensitive."""
+        self._ensure()
+        return self._boss_by_folded.get(name.casefold()) if name else None
+
+    def boss_for_ticket(self, tid):
+        self._ensure()
+        return self._boss_by_ticket.get(tid)
+
+    def weapon(self, item_id):
+        return self.weapons.get(item_id) if item_id else None
+
+
+catalog = Catalog()
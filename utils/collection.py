@@ -0,0 +1,130 @@
+"""Per-user sorted views of owned cards and fragments for the inventory browsers.
+
+A user's cards are read once from the stored record (packed columns are
+read in place, nothing is unpacked or marked), sorted per requested order
+on first use, and kept until user_store reports the user changed. A query
+is a filter over one cached order; the browser only turns the rows of the
+visible page into text, so a page flip is a slice.
+"""
+from utils import inventory
+from utils.catalog import catalog
+from utils.database import user_store
+from utils.search import fold
+
+# sort name -> (label, key(row)); every order lists the best first
+SORTS = {
+    "rarity": ("Rarity", lambda row: (_rarity_rank(row["rarity"]), -row["level"], row["name"])),
+    "level": ("Level", lambda row: (-row["level"], _rarity_rank(row["rarity"]), row["name"])),
+    "aura": ("Aura", lambda row: (-row["aura"], -row["level"], row["name"])),
+    "evo": ("Evolution", lambda row: (-row["evo"], -row["level"], row["name"])),
+    "name": ("Name", lambda row: (row["folded"], -row["level"])),
+    "recent": ("Newest", lambda row: -row["pos"]),
+}
+SORT_ALIASES = {"lvl": "level", "lv": "level", "new": "recent", "newest": "recent", "rar": "rarity",
+                "evolution": "evo", "abc": "name"}
+
+
+_ranks = (None, {})  # (catalog version, rarity code -> position)
+
+
+def _rarity_rank(code):
+    """Position of a rarity in rarities.json, which lists the top rarities first; unknown codes last."""
+    global _ranks
+    if _ranks[0] != catalog.version:
+        _ranks = (catalog.version, {code: i for i, code in enumerate(catalog.rarities)})
+    return _ranks[1].get(code, len(_ranks[1]))
+
+
+def resolve_sort(name):
+    """Sort key for a user-typed name, or None."""
+    name = SORT_ALIASES.get(name.lower(), name.lower())
+    return name if name in SORTS else None
+
+
+def _card_rows(record):
+    cards = dict.get(record, "cards") or []
+    if isinstance(cards, inventory.PackedCards):
+        columns, extra = cards.columns, cards.extra or {}
+        rows = []
+        for pos, (n, r, level, evo, aura) in enumerate(zip(
+                columns["n"], columns["r"], columns["l"], columns["e"], columns["a"])):
+            rows.append({"pos": pos, "name": inventory.names.name(n), "rarity": inventory.names.name(r),
+                         "level": level, "evo": evo, "aura": aura,
+                         "equipped_item_id": extra.get(pos, {}).get("equipped_item_id")})
+    else:
+        rows = [{"pos": pos, "name": c.get("name", "Unknown"), "rarity": c.get("rarity", "Common"),
+                 "level": c.get("level", 1), "evo": c.get("evo", 0), "aura": c.get("aura", 0),
+                 "equipped_item_id": c.get("equipped_item_id")}
+                for pos, c in enumerate(cards) if isinstance(c, dict)]
+    for row in rows:
+        row["folded"] = fold(row["name"])
+    return rows
+
+
+def _fragment_groups(record):
+    """rarity code -> [(name, count > 0)], most first; fragments of cards the catalog lacks go under None."""
+    fragments = dict.get(record, "fragments") or {}
+    if isinstance(fragments, inventory.PackedCounts):
+        pairs = [(inventory.names.name(i), count) for i, count in zip(fragments.ids, fragments.counts)]
+    else:
+        pairs = list(fragments.items())
+    groups = {}
+    for name, count in sorted(pairs, key=lambda pair: pair[1], reverse=True):
+        if count > 0:
+            groups.setdefault(catalog.rarity_of(name), []).append((name, count))
+    return groups
+
+
+class Collection:
+    def __init__(self, store):
+        self.store = store
+        self._users = {}  # uid -> {"rows": [...], sort name: [...], "fragments": {...}}
+
+    def forget(self, uids):
+        for uid in uids:
+            self._users.pop(str(uid), None)
+
+    def _user(self, uid):
+        uid = str(uid)
+        hit = self._users.get(uid)
+        if hit is None or hit.get("catalog") != catalog.version:
+            hit = self._users[uid] = {"catalog": catalog.version}
+        return hit
+
+    def rows(self, uid, sort="rarity"):
+        """The user's cards as rows, in `sort` order."""
+        user = self._user(uid)
+        ordered = user.get(sort)
+        if ordered is None:
+            if "rows" not in user:
+                record = self.store.get(str(uid))
+                user["rows"] = _card_rows(record) if record is not None else []
+            ordered = user[sort] = sorted(user["rows"], key=SORTS[sort][1])
+        return ordered
+
+    def query(self, uid, sort="rarity", rarity=None, min_level=0, min_aura=0, prefix=""):
+        """Rows in `sort` order matching every filter given.
+
+        `prefix` matches the start of any word of the name ("park" finds "Gun Park").
+        """
+        prefix = fold(prefix)
+        rows = self.rows(uid, sort)
+        if not (rarity or min_level or min_aura or prefix):
+            return rows
+        return [row for row in rows
+                if (rarity is None or row["rarity"] == rarity)
+                and row["level"] >= min_level and row["aura"] >= min_aura
+                and (not prefix or row["folded"].startswith(prefix) or f" {prefix}" in row["folded"])]
+
+    def fragments(self, uid):
+        """rarity code -> [(name, count)] of the user's fragments, most first (see _fragment_groups)."""
+        user = self._user(uid)
+        groups = user.get("fragments")
+        if groups is None:
+            record = self.store.get(str(uid))
+            groups = user["fragments"] = _fragment_groups(record) if record is not None else {}
+        return groups
+
+
+collection = Collection(user_store)
+user_store.subscribe(collection.forget)
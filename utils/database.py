@@ -1,9 +1,31 @@
+import asyncio
+import contextlib
+import contextvars
 import json
 import os
+import sqlite3
+import threading
+import time
+import weakref
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from utils import inventory
+
+USERS_FILE = "data/users.json"
 
 def load(path, default=None):
     """Loads JSON data safely."""
     if default is None: default = {}
+    pending = storage_io.pending(path)
+    if pending is not None:
+        return pending
+    backend = sqlite_backend()
+    if backend is not None and backend.handles(path):
+        data = backend.load_document(path)
+        if data is not None:
+            return data
     if not os.path.exists(path):
         os.makedirs(os.path.dirname(path), exist_ok=True)
         with open(path, "w", encoding="utf-8") as f:
@@ -18,6 +40,1627 @@ def load(path, default=None):
 
 def save(path, data):
     """Saves dictionary to JSON."""
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
\ No newline at end of file
+    backend = sqlite_backend()
+    if backend is not None and backend.handles(path):
+        backend.save_document(path, data)
+    else:
+        with storage_io.writing(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=4, ensure_ascii=False, default=inventory.json_default)
+    _notify_saved(path, data)
+
+
+async def aload(path, default=None):
+    """`load()` with the file read and JSON decoding done off the event loop."""
+    return await storage_io.aload(path, default)
+
+
+async def asave(path, data):
+    """`save()` with JSON encoding and the file write done off the event loop."""
+    await storage_io.asave(path, data)
+
+
+def _notify_saved(path, data):
+    for callback in _save_listeners.get(_path_key(path), ()):
+        try:
+            callback(data)
+        except Exception as e:
+            print(f"Error in save listener for {path}: {e}")
+
+
+_save_listeners = {}
+
+
+def _path_key(path):
+    return os.path.normpath(path).replace(os.sep, "/")
+
+
+def on_save(path, callback):
+    """Call `callback(data)` after every `save(path, data)` or `asave()` (e.g. to refresh a cache)."""
+    _save_listeners.setdefault(_path_key(path), []).append(callback)
+
+
+def remove_save_listener(path, callback):
+    listeners = _save_listeners.get(_path_key(path), [])
+    if callback in listeners:
+        listeners.remove(callback)
+
+
+class StorageIO:
+    """Single background thread that encodes and writes JSON files for `asave()`.
+
+    There is one writer thread, so writes to a file land in the order they
+    were requested. If a file is saved again while its previous save is still
+    waiting, the two saves are merged and only the newest data is written.
+    Until the write happens, `load()` returns the pending data. Files are
+    written compactly to a temp file, which is fsynced, renamed over the
+    target with `os.replace`, and then the directory is fsynced. So neither
+    a crash nor a power loss leaves a half-written file behind.
+
+    `asave()` encodes the data it is given on the writer thread, one
+    top-level entry at a time, without copying it first. An entry changed
+    on the event loop while its save is queued may be written before or
+    after the change, so save the file again after changing it (the saves
+    coalesce). User records never reach the writer live: the user backends
+    encode each changed record on the loop thread and queue only the text
+    (`asave_entries()`).
+    """
+
+    def __init__(self):
+        self._pool = None
+        self._lock = threading.Lock()  # guards _pending
+        self._write_lock = threading.Lock()  # one file write at a time, sync or async
+        self._pending = {}  # path key -> [path, data, future]
+        self.writes = 0
+        self.coalesced = 0
+        self.last_write_ms = 0.0
+        self.max_write_ms = 0.0
+        self._total_write_ms = 0.0
+
+    def _executor(self):
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="storage-io")
+        return self._pool
+
+    @property
+    def queue_depth(self):
+        """Files waiting to be written."""
+        return len(self._pending)
+
+    def stats(self):
+        return {
+            "queue_depth": self.queue_depth,
+            "writes": self.writes,
+            "coalesced": self.coalesced,
+            "last_write_ms": round(self.last_write_ms, 2),
+            "avg_write_ms": round(self._total_write_ms / self.writes, 2) if self.writes else 0.0,
+            "max_write_ms": round(self.max_write_ms, 2),
+        }
+
+    def pending(self, path):
+        """Data queued for `path` but not written yet, or None."""
+        entry = self._pending.get(_path_key(path))
+        return entry[1] if entry is not None else None
+
+    @contextlib.contextmanager
+    def writing(self, path):
+        """Held by synchronous `save()`: it supersedes any queued write of the same file."""
+        with self._write_lock:
+            with self._lock:
+                entry = self._pending.pop(_path_key(path), None)
+            if entry is not None and not entry[2].done():
+                entry[2].get_loop().call_soon_threadsafe(_resolve, entry[2])
+            yield
+
+    async def aload(self, path, default=None):
+        pending = self.pending(path)
+        if pending is not None:
+            return pending
+        backend = sqlite_backend()
+        if backend is not None and backend.handles(path):
+            return load(path, default)  # the sqlite connection belongs to the loop thread
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor(), load, path, default)
+
+    async def asave(self, path, data):
+        """Queue `data` to be written to `path` and wait until it is on disk."""
+        backend = sqlite_backend()
+        if backend is not None and backend.handles(path):
+            save(path, data)
+            return
+
+        key = _path_key(path)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is not None:
+                entry[1] = data
+                self.coalesced += 1
+                future = entry[2]
+            else:
+                future = loop.create_future()
+                self._pending[key] = [path, data, future]
+                self._executor().submit(self._write, key, loop)
+        _notify_saved(path, data)
+        await asyncio.shield(future)
+
+    def _write(self, key, loop):
+        with self._write_lock:
+            with self._lock:
+                entry = self._pending.pop(key, None)
+            if entry is None:
+                return  # a synchronous save() already wrote newer data
+            path, data, future = entry
+            start = time.perf_counter()
+            try:
+                _replace_file(path, _encode(data))
+            except Exception as e:
+                print(f"Error writing {path}: {e}")
+                loop.call_soon_threadsafe(_resolve, future, e)
+                return
+            self._record((time.perf_counter() - start) * 1000)
+        loop.call_soon_threadsafe(_resolve, future)
+
+    def _write_entries(self, path, entries):
+        with self._write_lock:
+            start = time.perf_counter()
+            _replace_file(path, _join(entries))
+            self._record((time.perf_counter() - start) * 1000)
+
+    def save_entries(self, path, entries):
+        """Write a JSON object from `entries`, its `"key": value` members already encoded (`_entry()`)."""
+        self._write_entries(path, entries)
+
+    async def asave_entries(self, path, entries):
+        """`save_entries()` on the writer thread, in order with queued writes."""
+        await asyncio.get_running_loop().run_in_executor(
+            self._executor(), self._write_entries, path, entries)
+
+    async def aappend(self, path, text):
+        """Append `text` to `path` and fsync it.
+
+        Appends that arrive while an earlier append is still queued are
+        written together with a single fsync (group commit).
+        """
+        key = ("append", _path_key(path))
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is not None:
+                entry[1].append(text)
+                self.coalesced += 1
+                future = entry[2]
+            else:
+                future = loop.create_future()
+                self._pending[key] = [path, [text], future]
+                self._executor().submit(self._append, key, loop)
+        await asyncio.shield(future)
+
+    def append_now(self, path, text):
+        """Synchronous `aappend()`, ordered after anything already being written."""
+        with self._write_lock:
+            _append_file(path, text)
+
+    def _append(self, key, loop):
+        with self._write_lock:
+            with self._lock:
+                path, chunks, future = self._pending.pop(key)
+            start = time.perf_counter()
+            try:
+                _append_file(path, "".join(chunks))
+            except Exception as e:
+                print(f"Error appending to {path}: {e}")
+                loop.call_soon_threadsafe(_resolve, future, e)
+                return
+            self._record((time.perf_counter() - start) * 1000)
+        loop.call_soon_threadsafe(_resolve, future)
+
+    async def arun(self, fn, *args):
+        """Run `fn(*args)` on the writer thread, in order with queued writes."""
+        def run():
+            with self._write_lock:
+                return fn(*args)
+        return await asyncio.get_running_loop().run_in_executor(self._executor(), run)
+
+    def _record(self, elapsed):
+        self.writes += 1
+        self.last_write_ms = elapsed
+        self.max_write_ms = max(self.max_write_ms, elapsed)
+        self._total_write_ms += elapsed
+
+    def close(self):
+        """Finish queued writes and stop the writer thread."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+
+def _replace_file(path, text):
+    """Write `path` durably: fsync a temp file, rename it over `path`, fsync the directory."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    _fsync_dir(directory)
+
+
+def _fsync_dir(directory):
+    """Make a rename in `directory` survive a power loss (a no-op where directories can't be opened)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _append_file(path, text):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _encode(data):
+    if not isinstance(data, dict):
+        return json.dumps(data, ensure_ascii=False, default=inventory.json_default)
+    return _join([_entry(key, _stored(value)) for key, value in list(data.items())])
+
+
+def _entry(key, value):
+    """One `"key": value` member of a JSON object."""
+    return (f"{json.dumps(str(key), ensure_ascii=False)}: "
+            f"{json.dumps(value, ensure_ascii=False, default=inventory.json_default)}")
+
+
+def _join(entries):
+    return "{" + ", ".join(entries) + "}"
+
+
+def _with_names(entries):
+    """Entries of a users file, led by the card name table they decode with."""
+    return [_entry(inventory.NAMES_KEY, inventory.names.stored()), *entries]
+
+
+def _resolve(future, error=None):
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(None)
+
+
+storage_io = StorageIO()
+
+
+def _read_json(path):
+    """Read a JSON file directly, bypassing any configured backend."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=inventory.json_default)
+
+
+def _stored(record):
+    """A user record as it is written to storage (packed inventory); other values as they are."""
+    return record.stored() if isinstance(record, UserRecord) else record
+
+
+class JsonBackend:
+    """Original storage: the whole users dict lives in one JSON file.
+
+    Each user's encoded entry is kept, and a flush re-encodes only the
+    changed users, on the loop thread where no command can be halfway
+    through changing them. The writer thread only joins the text and
+    writes it. The card name table is written into the same file under
+    inventory.NAMES_KEY.
+    """
+
+    lazy = False
+
+    def __init__(self, path=USERS_FILE):
+        self.path = path
+        self._entries = {}  # uid -> encoded '"uid": {...}', as last written
+
+    def read_all(self):
+        users = load(self.path)
+        inventory.names.attach(users.pop(inventory.NAMES_KEY, None))
+        self._entries = {uid: _entry(uid, record) for uid, record in users.items()}
+        return users
+
+    def _snapshot(self, users, uids):
+        for uid in uids:
+            record = dict.get(users, uid)
+            if record is None:
+                self._entries.pop(uid, None)
+            else:
+                self._entries[uid] = _entry(uid, _stored(record))
+        return _with_names(self._entries.values())
+
+    def write(self, users, uids):
+        storage_io.save_entries(self.path, self._snapshot(users, uids))
+
+    async def awrite(self, users, uids):
+        await storage_io.asave_entries(self.path, self._snapshot(users, uids))
+
+
+def _fields(record):
+    """field -> encoded value, for comparing a record with what was last written."""
+    return {str(k): _dumps(v) for k, v in record.items()}
+
+
+def _record_entry(uid, encoded):
+    return f"{_dumps(uid)}: {{{', '.join(f'{_dumps(k)}: {v}' for k, v in encoded.items())}}}"
+
+
+class JournalBackend(JsonBackend):
+    """users.json snapshot plus an append-only journal of per-user field changes.
+
+    A flush appends one line per changed user. The line holds only the
+    top-level fields that changed since that user was last written
+    ({"u": uid, "set": {...}, "unset": [...]}) or {"u": uid, "del": 1}.
+    So a command's write cost follows the size of its change, not the size
+    of the dataset. Lines set whole field values, so replaying one twice is
+    harmless. Card names new since the last write go ahead of the records
+    in the same append, as {"names": [...], "at": first index}. On startup
+    the journal is replayed over the snapshot. Once it grows past
+    `compact_bytes`, the snapshot is rewritten and the journal emptied.
+    Both steps run on the storage thread, in order with the appends.
+    """
+
+    def __init__(self, path=USERS_FILE, journal_path=None, compact_bytes=None, commit_ms=None):
+        super().__init__(path)
+        self.journal_path = journal_path or config.USER_JOURNAL_FILE
+        self.compact_bytes = compact_bytes or config.JOURNAL_COMPACT_BYTES
+        self.group_commit = (commit_ms if commit_ms is not None else config.JOURNAL_COMMIT_MS) / 1000
+        self.journal_bytes = 0
+        self._shadow = {}  # uid -> {field: encoded value} as last written
+        self._compacting = False
+
+    def read_all(self):
+        users = _read_json(self.path)
+        names = users.pop(inventory.NAMES_KEY, None)
+        self.journal_bytes, names = self._replay(users, names)
+        inventory.names.attach(names)
+        # What is on disk is the baseline, so the first line per user after a
+        # restart is a delta too, with "unset" for fields removed since
+        self._shadow = {uid: _fields(record) for uid, record in users.items()}
+        self._entries = {uid: _record_entry(uid, encoded) for uid, encoded in self._shadow.items()}
+        return users
+
+    def _replay(self, users, names):
+        """Apply the journal to `users` and the name table; returns (journal size in bytes, names)."""
+        if not os.path.exists(self.journal_path):
+            return 0, names
+        with open(self.journal_path, "rb") as f:
+            raw = f.read()
+        # A crash mid-append can leave a torn last line; drop it
+        end = raw.rfind(b"\n") + 1
+        if end < len(raw):
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(end)
+        for line in raw[:end].decode("utf-8").splitlines():
+            if not line:
+                continue
+            entry = json.loads(line)
+            if "names" in entry:
+                names = list(names or ())
+                if entry["at"] > len(names):
+                    raise ValueError(f"{self.journal_path}: card names from #{entry['at']} "
+                                     f"follow a table of {len(names)}")
+                names[entry["at"]:entry["at"] + len(entry["names"])] = entry["names"]
+                continue
+            uid = entry["u"]
+            if entry.get("del"):
+                users.pop(uid, None)
+                continue
+            record = users.setdefault(uid, {})
+            record.update(entry.get("set", {}))
+            for field in entry.get("unset", ()):
+                record.pop(field, None)
+        return end, names
+
+    def _changes(self, users, uids):
+        lines = []
+        for uid in uids:
+            record = dict.get(users, uid)
+            if record is None:
+                self._shadow.pop(uid, None)
+                self._entries.pop(uid, None)
+                lines.append(f'{{"u":{_dumps(uid)},"del":1}}\n')
+                continue
+            encoded = _fields(_stored(record))
+            # Also the user's entry for the next compacted snapshot
+            self._entries[uid] = _record_entry(uid, encoded)
+            old = self._shadow.get(uid)
+            if old is None:
+                changed, removed = encoded, ()
+            else:
+                changed = {k: v for k, v in encoded.items() if old.get(k) != v}
+                removed = [k for k in old if k not in encoded]
+            if not changed and not removed:
+                continue
+            self._shadow[uid] = encoded
+            line = f'{{"u":{_dumps(uid)},"set":{{{",".join(f"{_dumps(k)}:{v}" for k, v in changed.items())}}}'
+            if removed:
+                line += f',"unset":{_dumps(removed)}'
+            lines.append(line + "}\n")
+        if not lines:
+            return "", 0
+        # Names go first: a replay must know them before any record using them
+        at, new = inventory.names.pending()
+        if new:
+            lines.insert(0, f'{{"names":{_dumps(new)},"at":{at}}}\n')
+        return "".join(lines), at + len(new)
+
+    def write(self, users, uids):
+        text, names = self._changes(users, uids)
+        if text:
+            storage_io.append_now(self.journal_path, text)
+            inventory.names.saved(names)
+            self.journal_bytes += len(text.encode("utf-8"))
+
+    async def awrite(self, users, uids):
+        text, names = self._changes(users, uids)
+        if not text:
+            return
+        await storage_io.aappend(self.journal_path, text)
+        inventory.names.saved(names)
+        self.journal_bytes += len(text.encode("utf-8"))
+        if self.journal_bytes > self.compact_bytes and not self._compacting:
+            await self.compact()
+
+    def _compact(self, entries):
+        # The snapshot is on disk (file and rename fsynced) before the journal is emptied
+        _replace_file(self.path, _join(entries))
+        with open(self.journal_path, "w", encoding="utf-8") as f:
+            f.flush()
+            os.fsync(f.fileno())
+
+    async def compact(self):
+        """Fold the journal into a fresh users.json snapshot (from the entries as last journaled)."""
+        self._compacting = True
+        try:
+            await storage_io.arun(self._compact, _with_names(self._entries.values()))
+            self.journal_bytes = 0
+        finally:
+            self._compacting = False
+
+
+class ShardedBackend:
+    """Users split across `shards` JSON files by a stable hash of the user id.
+
+    `manifest.json` in the shard directory records the shard count and
+    hash, so the layout can't silently change under existing files, and
+    the card name table; a flush that added names rewrites it before any
+    shard. A
+    lookup reads only the shard holding that user, and a flush rewrites
+    only the shards holding changed users. `scan()` reads the shards one at
+    a time. `python -m utils.database shard` builds the layout from
+    users.json; `unshard` merges it back.
+    """
+
+    lazy = True
+    MANIFEST = "manifest.json"
+
+    def __init__(self, directory=None, shards=None):
+        self.directory = directory or config.USER_SHARD_DIR
+        manifest = os.path.join(self.directory, self.MANIFEST)
+        if not os.path.exists(manifest):
+            split_users(USERS_FILE, self.directory, shards or config.USER_SHARDS)
+        info = _read_json(manifest)
+        if info.get("hash") != "crc32":
+            raise ValueError(f"Unsupported shard hash in {manifest}: {info.get('hash')}")
+        self.shards = int(info["shards"])
+        self._names = info.get("names")
+        self._loaded = {}  # shard index -> {uid: record}
+        self._entries = {}  # shard index -> {uid: encoded entry}, for shards written since start
+
+    def read_names(self):
+        return self._names
+
+    def _manifest(self):
+        """(manifest text with the current name table, names in it), if names were added."""
+        if not inventory.names.unsaved:
+            return None, 0
+        names = inventory.names.stored()
+        return json.dumps({"shards": self.shards, "hash": "crc32", "names": names},
+                          ensure_ascii=False), len(names)
+
+    def shard_of(self, uid):
+        return zlib.crc32(str(uid).encode("utf-8")) % self.shards
+
+    def shard_path(self, index):
+        return os.path.join(self.directory, f"shard_{index:03d}.json")
+
+    def _shard(self, index):
+        shard = self._loaded.get(index)
+        if shard is None:
+            shard = self._loaded[index] = _read_json(self.shard_path(index))
+        return shard
+
+    def read_user(self, uid):
+        return self._shard(self.shard_of(uid)).get(str(uid))
+
+    def read_all(self):
+        users = {}
+        for index in range(self.shards):
+            users.update(self._shard(index))
+        return users
+
+    def scan(self):
+        """Yield (uid, record) shard by shard; shards not already in memory aren't kept."""
+        for index in range(self.shards):
+            shard = self._loaded.get(index)
+            if shard is None:
+                shard = _read_json(self.shard_path(index))
+            yield from list(shard.items())
+
+    def _apply(self, users, uids):
+        """Re-encode the changed users (on the loop thread); returns the shards they are in."""
+        touched = set()
+        for uid in uids:
+            index = self.shard_of(uid)
+            shard = self._shard(index)
+            entries = self._entries.get(index)
+            if entries is None:
+                entries = self._entries[index] = {u: _entry(u, _stored(r)) for u, r in shard.items()}
+            record = dict.get(users, uid)
+            if record is None:
+                shard.pop(uid, None)
+                entries.pop(uid, None)
+            else:
+                shard[uid] = record
+                entries[uid] = _entry(uid, _stored(record))
+            touched.add(index)
+        return touched
+
+    def write(self, users, uids):
+        touched = self._apply(users, uids)
+        manifest, names = self._manifest()
+        if manifest:
+            _replace_file(os.path.join(self.directory, self.MANIFEST), manifest)
+            inventory.names.saved(names)
+        for index in touched:
+            storage_io.save_entries(self.shard_path(index), list(self._entries[index].values()))
+
+    async def awrite(self, users, uids):
+        touched = self._apply(users, uids)
+        manifest, names = self._manifest()
+        if manifest:
+            await storage_io.arun(_replace_file, os.path.join(self.directory, self.MANIFEST), manifest)
+            inventory.names.saved(names)
+        await asyncio.gather(*(storage_io.asave_entries(self.shard_path(index), list(self._entries[index].values()))
+                               for index in touched))
+
+
+def split_users(users_path, directory, shards):
+    """Split users.json (plus any journaled changes) into shard files. Returns users per shard."""
+    users = JournalBackend(users_path).read_all()
+    names = inventory.names.stored()
+    buckets = [{} for _ in range(shards)]
+    for uid, record in users.items():
+        buckets[zlib.crc32(str(uid).encode("utf-8")) % shards][uid] = record
+    os.makedirs(directory, exist_ok=True)
+    for index, bucket in enumerate(buckets):
+        _replace_file(os.path.join(directory, f"shard_{index:03d}.json"), _encode(bucket))
+    # The manifest goes last: without it the split counts as unfinished
+    _replace_file(os.path.join(directory, ShardedBackend.MANIFEST),
+                  json.dumps({"shards": shards, "hash": "crc32", "names": names}, ensure_ascii=False))
+    return [len(bucket) for bucket in buckets]
+
+
+def merge_users(directory, users_path):
+    """Merge shard files back into users.json. Returns the number of users."""
+    backend = ShardedBackend(directory)
+    inventory.names.attach(backend.read_names())
+    users = backend.read_all()
+    _replace_file(users_path, _encode({inventory.NAMES_KEY: inventory.names.stored(), **users}))
+    # The merged file is newer than anything in the journal
+    journal = config.USER_JOURNAL_FILE
+    if os.path.exists(journal):
+        open(journal, "w").close()
+    return len(users)
+
+
+class SqliteBackend:
+    """SQLite storage with one row per user, gang, crew and catalog entry.
+
+    Users are read and written a row at a time, so the cost of a command no
+    longer grows with the number of players. Gangs, crews and the catalog
+    files are served through `load()`/`save()` by path; see `COLLECTIONS` and
+    `CATALOG`. The database runs in WAL mode so readers never wait on the
+    background flush. The card name table is a row of `meta`, written in
+    the same transaction as the users that added names.
+    """
+
+    lazy = True
+
+    COLLECTIONS = {
+        "data/users.json": "users",
+        "data/gangs.json": "gangs",
+        "data/crews.json": "crews",
+    }
+    CATALOG = {
+        "data/cards.json": "cards",
+        "data/rarities.json": "rarities",
+        "data/bosses.json": "bosses",
+        "data/weapon.json": "weapons",
+        "data/emoji.json": "emoji",
+        "data/whitetiger.json": "whitetiger",
+    }
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS users (id TEXT PRIMARY KEY, data TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS gangs (id TEXT PRIMARY KEY, data TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS crews (id TEXT PRIMARY KEY, data TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, data TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS catalog (
+            kind TEXT NOT NULL,
+            id TEXT NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (kind, id)
+        );
+    """
+
+    # Single-row statements; sqlite3 keeps these compiled in its statement cache.
+    SELECT_USER = "SELECT data FROM users WHERE id = ?"
+    UPSERT_USER = "INSERT OR REPLACE INTO users (id, data) VALUES (?, ?)"
+    DELETE_USER = "DELETE FROM users WHERE id = ?"
+    SELECT_META = "SELECT data FROM meta WHERE key = ?"
+    UPSERT_META = "INSERT OR REPLACE INTO meta (key, data) VALUES (?, ?)"
+
+    def __init__(self, path=None):
+        self.path = path or config.SQLITE_FILE
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        created = not os.path.exists(self.path)
+        self.conn = sqlite3.connect(self.path, cached_statements=256)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        if created:
+            self.import_json()
+
+    @staticmethod
+    def _key(path):
+        return _path_key(path)
+
+    def handles(self, path):
+        key = self._key(path)
+        return any(self._key(p) == key for p in (*self.COLLECTIONS, *self.CATALOG))
+
+    def _lookup(self, path):
+        key = self._key(path)
+        for p, table in self.COLLECTIONS.items():
+            if self._key(p) == key:
+                return table, None
+        for p, kind in self.CATALOG.items():
+            if self._key(p) == key:
+                return "catalog", kind
+        raise KeyError(path)
+
+    # ---- users ----
+
+    def read_user(self, uid):
+        row = self.conn.execute(self.SELECT_USER, (str(uid),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def read_all(self):
+        return {uid: json.loads(data) for uid, data in self.conn.execute("SELECT id, data FROM users")}
+
+    def read_names(self):
+        row = self.conn.execute(self.SELECT_META, ("names",)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def scan(self):
+        for uid, data in self.conn.execute("SELECT id, data FROM users"):
+            yield uid, json.loads(data)
+
+    def write(self, users, uids):
+        """Upsert the given users; ids no longer in `users` are deleted."""
+        with self.conn:
+            if inventory.names.unsaved:
+                names = inventory.names.stored()
+                self.conn.execute(self.UPSERT_META, ("names", _dumps(names)))
+            else:
+                names = None
+            for uid in uids:
+                record = dict.get(users, uid)
+                if record is None:
+                    self.conn.execute(self.DELETE_USER, (uid,))
+                else:
+                    self.conn.execute(self.UPSERT_USER, (uid, _dumps(_stored(record))))
+        if names is not None:
+            inventory.names.saved(len(names))
+
+    async def awrite(self, users, uids):
+        # Only the touched rows are written, so this stays on the loop thread
+        # (sqlite3 connections can't be shared across threads by default).
+        self.write(users, uids)
+
+    # ---- whole documents (gangs, crews, catalog) ----
+
+    def load_document(self, path):
+        """Return the document stored for `path`, or None for an empty catalog kind."""
+        table, kind = self._lookup(path)
+        if kind is None:
+            rows = self.conn.execute(f"SELECT id, data FROM {table}")
+        else:
+            rows = self.conn.execute("SELECT id, data FROM catalog WHERE kind = ?", (kind,))
+        data = {key: json.loads(value) for key, value in rows}
+        if kind is not None and not data:
+            return None
+        return data
+
+    def save_document(self, path, data):
+        table, kind = self._lookup(path)
+        rows = [(str(key), _dumps(value)) for key, value in data.items()]
+        with self.conn:
+            if kind is None:
+                self.conn.execute(f"DELETE FROM {table}")
+                self.conn.executemany(f"INSERT INTO {table} (id, data) VALUES (?, ?)", rows)
+            else:
+                self.conn.execute("DELETE FROM catalog WHERE kind = ?", (kind,))
+                self.conn.executemany(
+                    "INSERT INTO catalog (kind, id, data) VALUES (?, ?, ?)",
+                    [(kind, key, value) for key, value in rows],
+                )
+
+    def import_json(self, catalog_only=False):
+        """Copy the data/*.json files into the database. Returns rows written per file."""
+        counts = {}
+        paths = list(self.CATALOG) if catalog_only else [*self.COLLECTIONS, *self.CATALOG]
+        for path in paths:
+            if self.COLLECTIONS.get(path) == "users":
+                data = JournalBackend(path).read_all()  # snapshot plus any journaled changes
+                with self.conn:
+                    self.conn.execute(self.UPSERT_META, ("names", _dumps(inventory.names.stored())))
+            else:
+                data = _read_json(path)
+            self.save_document(path, data)
+            counts[path] = len(data)
+        return counts
+
+    def close(self):
+        self.conn.close()
+
+
+_sqlite = None
+
+
+def sqlite_backend():
+    """The shared SqliteBackend when STORAGE_BACKEND is "sqlite", otherwise None."""
+    global _sqlite
+    if getattr(config, "STORAGE_BACKEND", "json") != "sqlite":
+        return None
+    if _sqlite is None:
+        _sqlite = SqliteBackend()
+    return _sqlite
+
+
+class TrackedRecord(dict):
+    """One user's record that tells the store which top-level fields change.
+
+    Assigning, deleting or `setdefault`-ing a field marks it changed at once.
+    Nested dicts and lists (cards, chests, fragments...) are fingerprinted the
+    first time they are read (inventory fields by their packed form, others
+    as JSON) and compared when the store settles, at the end of a command or
+    before a flush. Copies (`dict(record)`, `copy.copy`) are plain dicts.
+    """
+
+    __slots__ = ("_store", "_uid")
+
+    def __init__(self, store, uid, record=()):
+        dict.__init__(self, record)
+        self._store = store
+        self._uid = uid
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+    def _watch(self, key, value):
+        if isinstance(value, (dict, list)):
+            self._store._watch(self._uid, key, value)
+        return value
+
+    def __getitem__(self, key):
+        return self._watch(key, dict.__getitem__(self, key))
+
+    def get(self, key, default=None):
+        if dict.__contains__(self, key):
+            return self._watch(key, dict.__getitem__(self, key))
+        return default
+
+    def __setitem__(self, key, value):
+        old = dict.get(self, key, _MISSING)
+        dict.__setitem__(self, key, value)
+        # Re-assigning an equal number or string (user["yen"] = user.get("yen", 0)) isn't a change
+        if not isinstance(value, (dict, list)) and old == value:
+            return
+        self._store._touch(self._uid, key)
+        self._watch(key, value)
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self._store._touch(self._uid, key)
+
+    def pop(self, key, *default):
+        if dict.__contains__(self, key):
+            self._store._touch(self._uid, key)
+        return dict.pop(self, key, *default)
+
+    def popitem(self):
+        key, value = dict.popitem(self)
+        self._store._touch(self._uid, key)
+        return key, value
+
+    def setdefault(self, key, default=None):
+        if dict.__contains__(self, key):
+            return self[key]
+        self[key] = default
+        return default
+
+    def update(self, *args, **kwargs):
+        other = dict(*args, **kwargs)
+        dict.update(self, other)
+        if other:
+            self._store._touch(self._uid, *other)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def clear(self):
+        keys = list(dict.keys(self))
+        dict.clear(self)
+        if keys:
+            self._store._touch(self._uid, *keys)
+
+
+_MISSING = object()
+
+# Version stamped on user records as "v"; USER_MIGRATIONS[n] upgrades a v=n record
+USER_SCHEMA_VERSION = 3
+
+# Fields every user has. Records only store the ones that differ from these,
+# so none may depend on config: changing it would change every stored user.
+USER_DEFAULTS = {
+    "yen": 0,
+    "cards": [],
+    "fragments": {},
+    "unlocked": inventory.NameList(),
+    "chests": {},
+    "tickets": {},
+    "equipment": {},
+    "team": [],
+    "boss_raid_team": [],
+    "wins": 0,
+    "streak": 0,
+    "reset_tokens": 0,
+}
+
+
+class UserRecord(TrackedRecord):
+    """A user's record, with USER_DEFAULTS standing in for missing fields.
+
+    Reading a missing field (`[]`, `get`, `setdefault`) returns its default
+    and assigning a default to a missing field stores nothing. A missing
+    dict or list is added on first read so it can be filled in place, and it
+    is only saved once something is put in it.
+
+    Cards, unlocked and fragments are held packed (utils.inventory) until
+    first read, then swapped for a plain list or dict. The packed form is
+    kept in `_packed` until the field changes, so saving an unchanged field
+    doesn't pack it again, and a field that was only read is swapped back
+    to it at the next flush (`UserStore._settle`).
+    """
+
+    __slots__ = ("_packed",)
+
+    def __init__(self, store, uid, record=()):
+        super().__init__(store, uid, record)
+        self._packed = None
+
+    def _default(self, key):
+        default = USER_DEFAULTS[key]
+        if isinstance(default, (dict, list)):
+            default = type(default)()
+            dict.__setitem__(self, key, default)
+        return default
+
+    def _unpack(self, key, packed):
+        value = packed.unpack()
+        dict.__setitem__(self, key, value)
+        self._remember(key, packed)
+        return value
+
+    def _remember(self, key, packed):
+        """`packed` is the packed form of the field's current value."""
+        if self._packed is None:
+            self._packed = {}
+        self._packed[key] = packed
+
+    def _repack(self, key, packed):
+        """Hold an unchanged field packed again, freeing the unpacked copy."""
+        dict.__setitem__(self, key, packed)
+        if self._packed:
+            self._packed.pop(key, None)
+
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        if isinstance(value, inventory.Packed):
+            value = self._unpack(key, value)
+        return self._watch(key, value)
+
+    def __missing__(self, key):
+        if key not in USER_DEFAULTS:
+            raise KeyError(key)
+        return self._default(key)
+
+    def get(self, key, default=None):
+        if dict.__contains__(self, key):
+            return self[key]
+        if key in USER_DEFAULTS:
+            return self._watch(key, self._default(key))
+        return default
+
+    def setdefault(self, key, default=None):
+        if key in USER_DEFAULTS:
+            return self[key]
+        return super().setdefault(key, default)
+
+    def __setitem__(self, key, value):
+        if (not dict.__contains__(self, key) and not isinstance(value, (dict, list))
+                and USER_DEFAULTS.get(key, _MISSING) == value):
+            return
+        super().__setitem__(key, value)
+
+    def _forget(self, fields):
+        """Drop cached packed forms of fields that changed."""
+        if self._packed:
+            for field in fields:
+                self._packed.pop(field, None)
+
+    def pack(self):
+        """Pack inventory fields changed since they were last packed (on the loop thread)."""
+        for field in inventory.PACKED_FIELDS:
+            value = dict.get(self, field)
+            if value is None or isinstance(value, inventory.Packed):
+                continue
+            if self._packed is not None and field in self._packed:
+                continue
+            packed = inventory.pack(field, value)
+            if packed is not None:
+                self._remember(field, packed)
+
+    def stored(self):
+        """Plain dict of this record as written to storage, with packed inventory fields."""
+        items = list(dict.items(self))
+        packed = self._packed
+        if not packed:
+            return dict(items)
+        return {key: packed.get(key, value) for key, value in items}
+
+
+def _drop_defaults(record):
+    """v0 -> v1: forget fields still at their default, and unset gang/crew names."""
+    for key, default in USER_DEFAULTS.items():
+        if key in record and record[key] == default:
+            del record[key]
+    for key in ("gang_name", "crew_name"):
+        if key in record and record[key] is None:
+            del record[key]
+
+
+def _pack_inventory(record):
+    """v1 -> v2: store cards, unlocked and fragments packed (see utils.inventory).
+
+    Only the encoding changes: card order, unlocked order and repeats, and
+    fragment order all come back as they were.
+    """
+    for field in inventory.PACKED_FIELDS:
+        value = record.get(field)
+        if value is not None and not isinstance(value, inventory.Packed):
+            packed = inventory.pack(field, value)
+            if packed is not None:
+                record[field] = packed
+
+
+def _store_pulls(record):
+    """v2 -> v3: pulls is stored again; v1 and v2 left it out at MAX_PULLS, then 12."""
+    record.setdefault("pulls", 12)
+
+
+USER_MIGRATIONS = [_drop_defaults, _pack_inventory, _store_pulls]
+
+
+def migrate_user(record):
+    """Upgrade a plain user dict to USER_SCHEMA_VERSION in place. Returns True if it changed."""
+    version = record.get("v", 0)
+    if version >= USER_SCHEMA_VERSION:
+        return False
+    for step in USER_MIGRATIONS[version:]:
+        step(record)
+    record["v"] = USER_SCHEMA_VERSION
+    return True
+
+
+class _TrackedUsers(dict):
+    """Users dict that keeps every record wrapped in a `UserRecord`.
+
+    Storing a new record (`users[uid] = {...}`) copies it into a tracked
+    record and marks the user changed; assigning a user's own record back is
+    a no-op.
+    """
+
+    def __init__(self, store, users=()):
+        super().__init__()
+        self._store = store
+        for uid, record in dict(users).items():
+            dict.__setitem__(self, uid, self._wrap(uid, record))
+
+    def _wrap(self, uid, record):
+        if isinstance(record, UserRecord) and record._store is self._store and record._uid == uid:
+            return record
+        return UserRecord(self._store, uid, inventory.from_storage(record))
+
+    def _adopt(self, uid, record):
+        """Store a record without marking the user changed."""
+        record = self._wrap(uid, record)
+        dict.__setitem__(self, uid, record)
+        return record
+
+    def __setitem__(self, uid, record):
+        if dict.get(self, uid) is record:
+            return
+        record = self._wrap(uid, record)
+        dict.__setitem__(self, uid, record)
+        self._store._touch(uid, *dict.keys(record))
+
+    def setdefault(self, uid, default=None):
+        if uid not in self:
+            self[uid] = {} if default is None else default
+        return self[uid]
+
+    def __delitem__(self, uid):
+        dict.__delitem__(self, uid)
+        self._store._touch(uid)
+
+    def pop(self, uid, *default):
+        if dict.__contains__(self, uid):
+            self._store._touch(uid)
+        return dict.pop(self, uid, *default)
+
+
+class _LazyUsers(_TrackedUsers):
+    """Users dict that fetches single rows from the backend on first access.
+
+    Lookups (`in`, `[]`, `get`) only read the requested row; iterating or
+    taking `len()` reads the whole table once.
+    """
+
+    def __init__(self, store, backend):
+        super().__init__(store)
+        self._backend = backend
+        self._complete = False
+        self._absent = set()
+
+    def _fetch(self, uid):
+        if self._complete or uid in self._absent or dict.__contains__(self, uid):
+            return
+        record = self._backend.read_user(uid)
+        if record is None:
+            self._absent.add(uid)
+        else:
+            dict.__setitem__(self, uid, self._wrap(uid, record))
+
+    def _fetch_all(self):
+        if not self._complete:
+            for uid, record in self._backend.read_all().items():
+                if uid not in self._absent and not dict.__contains__(self, uid):
+                    dict.__setitem__(self, uid, self._wrap(uid, record))
+            self._complete = True
+
+    def __contains__(self, uid):
+        self._fetch(uid)
+        return dict.__contains__(self, uid)
+
+    def __missing__(self, uid):
+        self._fetch(uid)
+        if dict.__contains__(self, uid):
+            return dict.__getitem__(self, uid)
+        raise KeyError(uid)
+
+    def get(self, uid, default=None):
+        self._fetch(uid)
+        return dict.get(self, uid, default)
+
+    def setdefault(self, uid, default=None):
+        self._fetch(uid)
+        self._absent.discard(uid)
+        return super().setdefault(uid, default)
+
+    def _adopt(self, uid, record):
+        self._absent.discard(uid)
+        return super()._adopt(uid, record)
+
+    def __setitem__(self, uid, record):
+        self._absent.discard(uid)
+        super().__setitem__(uid, record)
+
+    def __delitem__(self, uid):
+        self._fetch(uid)
+        super().__delitem__(uid)
+        self._absent.add(uid)
+
+    def pop(self, uid, *default):
+        self._fetch(uid)
+        self._absent.add(uid)
+        return super().pop(uid, *default)
+
+    def __iter__(self):
+        self._fetch_all()
+        return dict.__iter__(self)
+
+    def __len__(self):
+        self._fetch_all()
+        return dict.__len__(self)
+
+    def keys(self):
+        self._fetch_all()
+        return dict.keys(self)
+
+    def values(self):
+        self._fetch_all()
+        return dict.values(self)
+
+    def items(self):
+        self._fetch_all()
+        return dict.items(self)
+
+
+class _CommandWrites:
+    """Users one command marked dirty, changed (with the fields) and read."""
+
+    __slots__ = ("name", "marked", "changed", "read")
+
+    def __init__(self, name):
+        self.name = name
+        self.marked = set()
+        self.changed = {}
+        self.read = set()
+
+
+_command = contextvars.ContextVar("user_store_command", default=None)
+
+
+def _default_backend(path):
+    if getattr(config, "STORAGE_BACKEND", "json") == "shards":
+        return ShardedBackend()
+    return JournalBackend(path) if config.USER_JOURNAL else JsonBackend(path)
+
+
+class UserStore:
+    """Process-wide in-memory copy of the users data with write-behind flushing.
+
+    Commands get the live dict from `load()` and call `mark_dirty(uid)` after
+    changing a record instead of saving the whole file. Records are
+    `TrackedRecord`s, so a change the command forgot to mark is still picked
+    up, and `begin_command`/`end_command` count how many records each command
+    marked against how many it really changed. Dirty records are
+    written by a background task every `flush_interval` seconds and once more
+    on `close()`. With the plain JSON backend the file is read once and
+    rewritten on flush; with SQLite only the touched rows are read and
+    written. Backends with a `group_commit` window (the journal) are flushed
+    that many seconds after a change instead of waiting for the timer.
+    """
+
+    def __init__(self, path=USERS_FILE, flush_interval=None, backend=None):
+        self.path = path
+        self.flush_interval = flush_interval or config.USER_FLUSH_INTERVAL
+        self.backend = backend or sqlite_backend() or _default_backend(path)
+        self._users = None
+        self._dirty = set()
+        self._task = None
+        self._locks = weakref.WeakValueDictionary()
+        self._listeners = []
+        self._versions = {}
+        self._commit = None
+        self._watched = {}
+        self._repack = {}  # uid -> {field: (value, packed form)} read but unchanged, for the next flush
+        self._commands = set()
+        self.command_stats = {}
+
+    def load(self):
+        """Return the live users dict, reading the file on first use."""
+        if self._users is None:
+            if self.backend.lazy:
+                inventory.names.attach(self.backend.read_names())
+                self._users = _LazyUsers(self, self.backend)
+            else:
+                self._users = _TrackedUsers(self, self.backend.read_all())
+        return self._users
+
+    def get(self, uid, default=None):
+        return self.load().get(str(uid), default)
+
+    def ensure(self, uid):
+        """The user's record. New users start with full pulls, saved only once something changes."""
+        uid = str(uid)
+        users = self.load()
+        record = users.get(uid)
+        if record is None:
+            record = users._adopt(uid, {"v": USER_SCHEMA_VERSION, "pulls": config.MAX_PULLS})
+        return record
+
+    def migrate(self):
+        """Upgrade every stored user to USER_SCHEMA_VERSION. Returns the number upgraded."""
+        users = self.load()
+        upgraded = []
+        for uid, record in self.scan():
+            if migrate_user(record):
+                users._adopt(uid, record)
+                upgraded.append(uid)
+        if upgraded:
+            self._mark(upgraded)
+        return len(upgraded)
+
+    def scan(self):
+        """Yield (uid, record) for every user, for leaderboards and other full scans.
+
+        With a lazy backend (shards, SQLite) users not yet in memory are
+        streamed from storage and not cached. Records are shallow copies, so
+        reading them doesn't count as a read of the live record; to change a
+        user, fetch it with `get()`.
+        """
+        users = self.load()
+        scan = getattr(self.backend, "scan", None)
+        if not isinstance(users, _LazyUsers) or users._complete or scan is None:
+            for uid, record in list(users.items()):
+                yield uid, dict(record)
+            return
+        seen = set()
+        for uid, record in scan():
+            seen.add(uid)
+            live = dict.get(users, uid)
+            if live is not None:
+                yield uid, dict(live)
+            elif uid not in users._absent:
+                yield uid, inventory.from_storage(record)
+        # Users created in memory and not flushed yet
+        for uid, record in list(dict.items(users)):
+            if uid not in seen:
+                yield uid, dict(record)
+
+    def mark_dirty(self, *uids):
+        """Record that these users changed (or were deleted) since the last flush."""
+        keys = [str(uid) for uid in uids]
+        writes = _command.get()
+        if writes is not None:
+            writes.marked.update(keys)
+        if self._users is not None:
+            # Any unpacked inventory field may have been edited in place; repack it
+            for key in keys:
+                self._repack.pop(key, None)
+                record = dict.get(self._users, key)
+                if isinstance(record, UserRecord):
+                    record._forget(inventory.PACKED_FIELDS)
+        self._mark(keys)
+
+    def _touch(self, uid, *fields):
+        """A tracked record changed: mark it dirty and count the fields for the command."""
+        writes = _command.get()
+        if writes is not None:
+            writes.changed.setdefault(uid, set()).update(fields)
+        if not fields:
+            self._repack.pop(uid, None)
+        elif uid in self._repack:
+            for field in fields:
+                self._repack[uid].pop(field, None)
+        if fields:
+            record = dict.get(self._users, uid)
+            if isinstance(record, UserRecord):
+                record._forget(fields)
+        self._mark([uid])
+
+    def _watch(self, uid, field, value):
+        fields = self._watched.setdefault(uid, {})
+        if field not in fields:
+            fields[field] = self._baseline(uid, field, value)
+        writes = _command.get()
+        if writes is not None:
+            writes.read.add(uid)
+
+    def _baseline(self, uid, field, value):
+        """What `_settle` compares the field with: for inventory fields the
+        packed form (the one the record already holds costs nothing), else
+        the field's JSON."""
+        if field in inventory.PACKED_FIELDS:
+            record = dict.get(self._users, uid)
+            packed = record._packed.get(field) if isinstance(record, UserRecord) and record._packed else None
+            if packed is None:
+                packed = inventory.pack(field, value)
+            if packed is not None:
+                return packed
+        return _dumps(value)
+
+    def _settle(self, uids=None, keep=()):
+        """Touch the watched nested fields that changed since they were read.
+
+        Watches are dropped afterwards, except for users in `keep`, which get
+        a fresh baseline (a command still running may change them again).
+        Inventory fields of dropped watches that are unchanged are noted, and
+        swapped back to their packed form at the next flush.
+        """
+        if self._users is None:
+            return
+        for uid in list(self._watched if uids is None else uids):
+            fields = self._watched.get(uid)
+            if fields is None:
+                continue
+            record = dict.get(self._users, uid)
+            kept = record is not None and uid in keep
+            changed, packed = [], {}
+            if record is not None:
+                for field, before in fields.items():
+                    value = dict.get(record, field, _MISSING)
+                    if value is _MISSING or isinstance(value, inventory.Packed):
+                        continue
+                    if isinstance(before, str):
+                        now = _dumps(value)
+                        same = now == before
+                    else:
+                        same = before.unpack() == value
+                        if not same:
+                            now = inventory.pack(field, value)
+                            if now is None:
+                                now = _dumps(value)
+                            else:
+                                packed[field] = now
+                    if not same:
+                        changed.append(field)
+                        fields[field] = now
+                    elif not kept and not isinstance(before, str):
+                        self._repack.setdefault(uid, {})[field] = (value, before)
+            if not kept:
+                del self._watched[uid]
+            if changed:
+                self._touch(uid, *changed)
+                # Packed while comparing; saves packing it again at the flush
+                for field, now in packed.items():
+                    record._remember(field, now)
+
+    def _repack_settled(self, running):
+        """Swap inventory fields that were read but not changed back to their packed form.
+
+        Users read by a `running` command or in a transaction are skipped: it
+        may still hold the unpacked value.
+        """
+        repack, self._repack = self._repack, {}
+        for uid, fields in repack.items():
+            record = dict.get(self._users, uid)
+            if not isinstance(record, UserRecord) or uid in running or uid in self._watched or self.locked(uid):
+                continue
+            for field, (value, packed) in fields.items():
+                if dict.get(record, field) is value:
+                    record._repack(field, packed)
+
+    def begin_command(self, name):
+        """Attribute user reads and changes in this task to command `name` until `end_command()`."""
+        writes = _CommandWrites(name)
+        self._commands.add(writes)
+        _command.set(writes)
+
+    def end_command(self):
+        """Pick up the current command's unmarked changes and add its writes to `command_stats`."""
+        writes = _command.get()
+        if writes is None:
+            return None
+        self._settle(writes.read)
+        _command.set(None)
+        self._commands.discard(writes)
+
+        written = writes.marked | writes.changed.keys()
+        stats = self.command_stats.setdefault(
+            writes.name, {"calls": 0, "written": 0, "changed": 0, "fields": 0})
+        stats["calls"] += 1
+        stats["written"] += len(written)
+        stats["changed"] += len(writes.changed)
+        stats["fields"] += sum(len(fields) for fields in writes.changed.values())
+        if config.LOG_WRITE_AMPLIFICATION and written:
+            fields = sorted({f for fields in writes.changed.values() for f in fields})
+            print(f"[writes] {writes.name}: {len(written)} record(s) written, "
+                  f"{len(writes.changed)} changed, fields {fields}")
+        return writes
+
+    def _mark(self, keys):
+        self._dirty.update(keys)
+        for key in keys:
+            self._versions[key] = self._versions.get(key, 0) + 1
+        for callback in self._listeners:
+            callback(keys)
+        self._schedule_commit()
+
+    def _schedule_commit(self):
+        delay = getattr(self.backend, "group_commit", None)
+        if delay is None or self._commit is not None or self._task is None:
+            return
+        loop = asyncio.get_running_loop()
+        self._commit = loop.call_later(delay, self._group_commit)
+
+    def _group_commit(self):
+        self._commit = None
+        asyncio.get_running_loop().create_task(self._safe_flush())
+
+    async def _safe_flush(self):
+        try:
+            await self.aflush()
+        except Exception as e:
+            print(f"Error flushing {self.path}: {e}")
+
+    def version(self, uid):
+        """Counter bumped on every change to a user, for caches derived from it."""
+        uid = str(uid)
+        if uid in self._watched:
+            self._settle((uid,), keep=(uid,))
+        return self._versions.get(uid, 0)
+
+    def subscribe(self, callback):
+        """Call `callback(uids)` whenever users are marked dirty."""
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _lock(self, uid):
+        lock = self._locks.get(uid)
+        if lock is None:
+            lock = self._locks[uid] = asyncio.Lock()
+        return lock
+
+    @contextlib.asynccontextmanager
+    async def transaction(self, *uids):
+        """Hold these users' locks for a read-modify-write that spans awaits.
+
+        Locks are taken in sorted id order, so transactions over several users
+        (trades, PvP) cannot deadlock each other. Yields the live users dict
+        and marks the users dirty on exit. Not re-entrant: don't open a second
+        transaction on the same user inside one.
+        """
+        keys = sorted({str(uid) for uid in uids})
+        locks = [self._lock(key) for key in keys]
+        held = []
+        try:
+            for lock in locks:
+                await lock.acquire()
+                held.append(lock)
+            yield self.load()
+        finally:
+            if len(held) == len(locks):
+                self.mark_dirty(*keys)
+            for lock in reversed(held):
+                lock.release()
+
+    def locked(self, uid):
+        lock = self._locks.get(str(uid))
+        return lock is not None and lock.locked()
+
+    @property
+    def dirty(self):
+        return len(self._dirty)
+
+    def _take_dirty(self):
+        # Users read by commands still running keep their watches
+        running = set().union(*(w.read for w in self._commands))
+        self._settle(keep=running)
+        if self._users is None:
+            return set()
+        self._repack_settled(running)
+        if not self._dirty:
+            return set()
+        # Users inside a transaction are half-updated; keep them for the next flush.
+        busy = {uid for uid in self._dirty if self.locked(uid)}
+        uids, self._dirty = self._dirty - busy, busy
+        for uid in uids:
+            record = dict.get(self._users, uid)
+            if isinstance(record, UserRecord):
+                record.pack()
+        return uids
+
+    def flush(self):
+        """Write pending changes to disk. Returns the number of records flushed."""
+        uids = self._take_dirty()
+        if not uids:
+            return 0
+        try:
+            self.backend.write(self._users, uids)
+        except Exception:
+            self._dirty |= uids
+            raise
+        return len(uids)
+
+    async def aflush(self):
+        """`flush()` with the encoding and file write done by the storage thread."""
+        uids = self._take_dirty()
+        if not uids:
+            return 0
+        try:
+            await self.backend.awrite(self._users, uids)
+        except Exception:
+            self._dirty |= uids
+            raise
+        return len(uids)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self._safe_flush()
+
+    def start(self):
+        """Load and migrate the data, then start the background flush task (needs a running loop)."""
+        upgraded = self.migrate()
+        if upgraded:
+            print(f"Upgraded {upgraded} users to schema v{USER_SCHEMA_VERSION}")
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    async def close(self):
+        """Stop the background task and write anything still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._commit is not None:
+            self._commit.cancel()
+            self._commit = None
+        await self.aflush()
+
+
+user_store = UserStore(USERS_FILE)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Storage maintenance.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    migrate = sub.add_parser("migrate", help="copy data/*.json into the SQLite database")
+    migrate.add_argument("--db", default=config.SQLITE_FILE)
+    migrate.add_argument("--catalog-only", action="store_true",
+                         help="only re-import the card/boss/rarity files after editing them")
+    shard = sub.add_parser("shard", help="split users.json into hash-sharded files")
+    shard.add_argument("--dir", default=config.USER_SHARD_DIR)
+    shard.add_argument("--shards", type=int, default=config.USER_SHARDS)
+    unshard = sub.add_parser("unshard", help="merge the user shards back into users.json")
+    unshard.add_argument("--dir", default=config.USER_SHARD_DIR)
+    args = parser.parse_args()
+
+    if args.command == "shard":
+        counts = split_users(USERS_FILE, args.dir, args.shards)
+        print(f"{sum(counts)} users in {len(counts)} shards (largest {max(counts)})")
+    elif args.command == "unshard":
+        print(f"{merge_users(args.dir, USERS_FILE)} users written to {USERS_FILE}")
+    elif args.command == "migrate":
+        backend = SqliteBackend(args.db)
+        for path, count in backend.import_json(catalog_only=args.catalog_only).items():
+            print(f"{path}: {count} rows")
+        backend.close()
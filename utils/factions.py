@@ -0,0 +1,230 @@
+"""Who is in which gang or crew, and who holds which territory, without
+scanning gangs.json / crews.json.
+
+The index maps user id -> gang id and user id -> crew id, keeps each
+gang's level, and maps each territory (by case-folded name) to the gang or
+crew holding it. It is refreshed whenever gangs.json or crews.json is saved
+(create, invite, kick, leave, disband, gang EXP and captures all end in a
+save), so lookups are a dict get.
+
+It is also written to FACTION_INDEX_FILE together with the size and
+mtime of the files it was built from. At startup, if those still match,
+the index is read back instead of rebuilt. With the sqlite backend the
+documents aren't files, so the index is rebuilt from the database.
+"""
+import asyncio
+import json
+import os
+
+import config
+from utils.database import _replace_file, load, on_save, sqlite_backend, storage_io
+
+GANGS_FILE = "data/gangs.json"
+CREWS_FILE = "data/crews.json"
+SOURCES = {"gang": GANGS_FILE, "crew": CREWS_FILE}
+_INDEX_VERSION = 2
+
+
+def gang_level(gang):
+    """Level from gang['exp'] and gang['type']: exp // 50_000 for gangs, // 150_000 otherwise."""
+    threshold = 50000 if gang.get("type", "gang") == "gang" else 150000
+    return int(gang.get("exp", 0)) // threshold
+
+
+def _members_of(data):
+    """uid -> faction id; a user listed in two factions keeps the first, as a scan would."""
+    members = {}
+    for fid, faction in data.items():
+        for member in faction.get("members", []):
+            members.setdefault(str(member), fid)
+    return members
+
+
+def territory_key(name):
+    """Territory names match case-insensitively and ignoring surrounding spaces."""
+    return str(name).strip().casefold()
+
+
+def _holdings_of(data):
+    """faction id -> [faction name, [territories]] for the factions holding any."""
+    return {fid: [faction.get("name", "Unknown"), [str(t) for t in faction["territories"]]]
+            for fid, faction in data.items() if faction.get("territories")}
+
+
+def _stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _from_files():
+    """True when SOURCES are plain JSON files whose stamps mean something."""
+    backend = sqlite_backend()
+    return not any(backend is not None and backend.handles(path) for path in SOURCES.values())
+
+
+class FactionIndex:
+    def __init__(self, path=None):
+        self.path = path or config.FACTION_INDEX_FILE
+        self._members = None  # kind -> {uid: faction id}
+        self._levels = None  # gang id -> level
+        self._holdings = None  # kind -> {faction id: [name, [territories]]}
+        self._territories = None  # territory key -> (kind, faction id)
+        self._listeners = []
+        self.rebuilds = 0
+        # Bumped whenever a territory changes hands (or a holder is renamed)
+        self.territory_version = 0
+
+    # ---- lookups ----
+
+    def _load(self):
+        if self._members is not None:
+            return
+        saved = self._read() if _from_files() else None
+        self._members, self._holdings, stale = {}, {}, False
+        for kind, path in SOURCES.items():
+            if saved is not None and storage_io.pending(path) is None \
+                    and saved["sources"].get(kind) == _stamp(path):
+                self._members[kind] = saved[kind]
+                self._holdings[kind] = saved["holdings"][kind]
+                if kind == "gang":
+                    self._levels = saved["levels"]
+            else:
+                self._index(kind, load(path))
+                self.rebuilds += 1
+                stale = True
+        self._index_territories()
+        if stale:
+            self._schedule_write()
+
+    def _index(self, kind, data):
+        self._members[kind] = _members_of(data)
+        self._holdings[kind] = _holdings_of(data)
+        if kind == "gang":
+            self._levels = {gid: gang_level(g) for gid, g in data.items()}
+
+    def _index_territories(self):
+        # Gangs first: a territory listed by both is the gang's, as the old scan had it
+        territories = {}
+        for kind in SOURCES:
+            for fid, (_, held) in self._holdings[kind].items():
+                for name in held:
+                    territories.setdefault(territory_key(name), (kind, fid))
+        self._territories = territories
+
+    def gang_of(self, uid):
+        """Id of the user's gang, or None."""
+        self._load()
+        return self._members["gang"].get(str(uid))
+
+    def crew_of(self, uid):
+        """Id of the user's crew, or None."""
+        self._load()
+        return self._members["crew"].get(str(uid))
+
+    def faction_of(self, uid):
+        """("gang", gid) or ("crew", cid) for the user, preferring gang if in both; (None, None) otherwise."""
+        gid = self.gang_of(uid)
+        if gid is not None:
+            return "gang", gid
+        cid = self.crew_of(uid)
+        if cid is not None:
+            return "crew", cid
+        return None, None
+
+    def level(self, gid):
+        self._load()
+        return self._levels.get(gid, 0)
+
+    def multiplier(self, uid):
+        """Team stat multiplier from the user's gang level (1 + level * 0.02), 1.0 if not in a gang."""
+        gid = self.gang_of(uid)
+        return 1.0 + self.level(gid) * 0.02 if gid is not None else 1.0
+
+    def territory_owner(self, name):
+        """("gang" or "crew", faction id) holding territory `name`, or (None, None) if unclaimed."""
+        self._load()
+        return self._territories.get(territory_key(name), (None, None))
+
+    def territories(self):
+        """Names of every held territory."""
+        self._load()
+        return [name for held in self._holdings.values() for _, names in held.values() for name in names]
+
+    def subscribe(self, callback):
+        """Call `callback(uids)` with the users whose gang multiplier changed."""
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    # ---- upkeep ----
+
+    def _saved(self, kind, data):
+        if self._members is None:
+            self._load()  # what the index said before this save, for the diff below
+        old_members, old_levels, old_holdings = self._members[kind], self._levels, self._holdings[kind]
+        self._index(kind, data)
+        if self._holdings[kind] != old_holdings:
+            self._index_territories()
+            self.territory_version += 1
+        if kind == "gang":
+            old = {uid: old_levels.get(gid, 0) for uid, gid in old_members.items()}
+            new = {uid: self._levels.get(gid, 0) for uid, gid in self._members[kind].items()}
+            changed = {uid for uid in old.keys() | new.keys() if old.get(uid) != new.get(uid)}
+            if changed:
+                for callback in self._listeners:
+                    callback(changed)
+        self._schedule_write()
+
+    def _schedule_write(self):
+        if not _from_files():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write()
+            return
+        # After the queued gangs/crews write, so the stamps are those of the new files
+        loop.create_task(storage_io.arun(self._write))
+
+    def _write(self):
+        if any(storage_io.pending(path) is not None for path in SOURCES.values()):
+            return  # another save is queued; its listener writes the index again
+        data = {"v": _INDEX_VERSION,
+                "sources": {kind: _stamp(path) for kind, path in SOURCES.items()},
+                "levels": self._levels,
+                "holdings": self._holdings}
+        data.update(self._members)
+        try:
+            _replace_file(self.path, json.dumps(data, ensure_ascii=False))
+        except OSError as e:
+            print(f"Error writing {self.path}: {e}")
+
+    def _read(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get("v") != _INDEX_VERSION:
+            return None
+        return data
+
+
+factions = FactionIndex()
+
+
+def _gangs_saved(gangs):
+    factions._saved("gang", gangs)
+
+
+def _crews_saved(crews):
+    factions._saved("crew", crews)
+
+
+on_save(GANGS_FILE, _gangs_saved)
+on_save(CREWS_FILE, _crews_saved)
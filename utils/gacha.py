@@ -0,0 +1,252 @@
+import random
+
+from utils.catalog import catalog, ticket_id
+
+try:
+    import numpy as np
+except ImportError:  # mass pulls fall back to the pure-Python sampler
+    np = None
+
+TICKET_DROP_CHANCE = 0.025  # chance per pull of also dropping a boss ticket
+DEFAULT_WEIGHT = 5  # rarity weight when rarities.json has no weight_multiplier
+
+
+class AliasSampler:
+    """Weighted sampler using Vose's alias method: O(n) to build, O(1) per draw."""
+
+    def __init__(self, items, weights):
+        items = list(items)
+        weights = [float(w) for w in weights]
+        total = sum(weights)
+        if not items or total <= 0:
+            raise ValueError("AliasSampler needs at least one positive weight")
+
+        n = len(items)
+        scaled = [w * n / total for w in weights]
+        prob = [0.0] * n
+        alias = [0] * n
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+
+        while small and large:
+            s = small.pop()
+            g = large.pop()
+            prob[s] = scaled[s]
+            alias[s] = g
+            scaled[g] = (scaled[g] + scaled[s]) - 1.0
+            (small if scaled[g] < 1.0 else large).append(g)
+        # Whatever is left is 1.0 up to rounding error
+        for i in large + small:
+            prob[i] = 1.0
+
+        self.items = items
+        self.prob = prob
+        self.alias = alias
+        self._arrays = None
+
+    def __len__(self):
+        return len(self.items)
+
+    def draw(self, rng=random):
+        i = int(rng.random() * len(self.items))
+        if rng.random() < self.prob[i]:
+            return self.items[i]
+        return self.items[self.alias[i]]
+
+    def draw_many(self, n, rng=random):
+        items, prob, alias = self.items, self.prob, self.alias
+        size = len(items)
+        rand = rng.random
+        out = []
+        for _ in range(n):
+            i = int(rand() * size)
+            out.append(items[i] if rand() < prob[i] else items[alias[i]])
+        return out
+
+    def draw_indices(self, n, gen):
+        """Draw `n` item indices at once as a NumPy array (`gen` is a numpy Generator)."""
+        if self._arrays is None:
+            self._arrays = (np.asarray(self.prob), np.asarray(self.alias, dtype=np.intp))
+        prob, alias = self._arrays
+        i = gen.integers(0, len(self.items), size=n)
+        return np.where(gen.random(n) < prob[i], i, alias[i])
+
+
+class GachaPool:
+    """Card and boss-ticket samplers for one catalog version.
+
+    Card weights come from each card's rarity `weight_multiplier`; tickets are
+    weighted by each boss's `ticket_drop_rate`. Use `get_pool()` rather than
+    building one per command.
+    """
+
+    def __init__(self, cat=catalog):
+        cards = list(cat.cards.values())
+        weights = [cat.rarity(c.get("rarity", "C")).get("weight_multiplier", DEFAULT_WEIGHT)
+                   for c in cards]
+        self.cards = AliasSampler(cards, weights) if cards and sum(weights) > 0 else None
+
+        bosses = [b for b in cat.bosses.values() if b.get("ticket_drop_rate", 0) > 0]
+        self.tickets = AliasSampler(
+            bosses, [b["ticket_drop_rate"] for b in bosses]) if bosses else None
+        self.version = cat.version
+
+    def draw(self, n=1, rng=random):
+        """Draw `n` cards (with replacement)."""
+        if self.cards is None:
+            return []
+        if n == 1:
+            return [self.cards.draw(rng)]
+        return self.cards.draw_many(n, rng)
+
+    def roll_ticket(self, rng=random):
+        """The boss whose ticket drops on this pull, or None."""
+        if self.tickets is None or rng.random() >= TICKET_DROP_CHANCE:
+            return None
+        return self.tickets.draw(rng)
+
+
+class MassPull:
+    """Outcome of `mass_pull`: names unlocked (in draw order), fragment and ticket counts."""
+
+    __slots__ = ("new", "fragments", "tickets")
+
+    def __init__(self):
+        self.new = []
+        self.fragments = {}
+        self.tickets = {}
+
+
+def _counts(pool, n, gen):
+    """Per-card and per-boss hit counts for `n` pulls, plus the first draw index of each card."""
+    if np is not None:
+        gen = gen or _generator()
+        idx = pool.cards.draw_indices(n, gen)
+        card_counts = np.bincount(idx, minlength=len(pool.cards))
+        hit, first = np.unique(idx, return_index=True)
+        first_seen = dict(zip(hit.tolist(), first.tolist()))
+        ticket_counts = []
+        if pool.tickets is not None:
+            drops = int((gen.random(n) < TICKET_DROP_CHANCE).sum())
+            if drops:
+                ticket_counts = np.bincount(pool.tickets.draw_indices(drops, gen),
+                                            minlength=len(pool.tickets)).tolist()
+        return card_counts.tolist(), first_seen, ticket_counts
+
+    index = {id(card): i for i, card in enumerate(pool.cards.items)}
+    card_counts = [0] * len(pool.cards)
+    first_seen = {}
+    for pos, card in enumerate(pool.cards.draw_many(n)):
+        i = index[id(card)]
+        card_counts[i] += 1
+        first_seen.setdefault(i, pos)
+    ticket_counts = []
+    if pool.tickets is not None:
+        ticket_counts = [0] * len(pool.tickets)
+        tindex = {id(boss): i for i, boss in enumerate(pool.tickets.items)}
+        for _ in range(n):
+            boss = pool.roll_ticket()
+            if boss is not None:
+                ticket_counts[tindex[id(boss)]] += 1
+    return card_counts, first_seen, ticket_counts
+
+
+_numpy_rng = None
+
+
+def _generator():
+    global _numpy_rng
+    if _numpy_rng is None:
+        _numpy_rng = np.random.default_rng()
+    return _numpy_rng
+
+
+def mass_pull(user, n, pool=None, gen=None):
+    """Do `n` pulls for `user` in one batch and merge the results into the record.
+
+    The draws are vectorised with NumPy when it is installed. The cost of the
+    merge depends on the number of distinct cards, not on `n`. The first copy
+    of a card the user hasn't unlocked becomes a new card; every other copy
+    becomes a fragment, the same as `n` single pulls. Does not touch
+    `user["pulls"]`. `gen` is an optional numpy Generator for reproducible runs.
+    """
+    pool = pool or get_pool()
+    result = MassPull()
+    if pool.cards is None or n <= 0:
+        return result
+
+    card_counts, first_seen, ticket_counts = _counts(pool, n, gen)
+    cards = user.setdefault("cards", [])
+    # A NameList on user records, so membership is O(1)
+    unlocked = user.setdefault("unlocked", [])
+    fragments = user.setdefault("fragments", {})
+
+    for i in sorted(first_seen, key=first_seen.get):
+        card = pool.cards.items[i]
+        name = card.get("name", "Unknown")
+        count = card_counts[i]
+        if name not in unlocked:
+            unlocked.append(name)
+            cards.append({
+                "name": name,
+                "rarity": card.get("rarity", "C"),
+                "level": 1,
+                "exp": 0,
+                "evo": 0,
+                "aura": 0,
+            })
+            result.new.append(name)
+            count -= 1
+        if count:
+            fragments[name] = fragments.get(name, 0) + count
+            result.fragments[name] = result.fragments.get(name, 0) + count
+
+    if any(ticket_counts):
+        tickets = user.setdefault("tickets", {})
+        for boss, count in zip(pool.tickets.items, ticket_counts):
+            if count:
+                tid = ticket_id(boss.get("name", ""))
+                tickets[tid] = tickets.get(tid, 0) + count
+                result.tickets[tid] = result.tickets.get(tid, 0) + count
+    return result
+
+
+_pool = None
+
+
+def get_pool():
+    """The shared GachaPool, rebuilt when the catalog is reloaded."""
+    global _pool
+    if _pool is None or _pool.version != catalog.version:
+        _pool = GachaPool(catalog)
+    return _pool
+
+
+if __name__ == "__main__":
+    # Benchmark: python -m utils.gacha [draws]
+    import sys
+    import time
+
+    draws = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    cards = list(catalog.cards.values())
+
+    def timed(label, fn):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        print(f"{label:<34} {draws / elapsed:>14,.0f} draws/s")
+
+    def old_way():
+        # What pull used to do: rebuild the weights, then choices(k=1) per draw
+        for _ in range(draws):
+            weights = [catalog.rarity(c.get("rarity", "C")).get("weight_multiplier", DEFAULT_WEIGHT)
+                       for c in cards]
+            random.choices(cards, weights=weights, k=1)
+
+    start = time.perf_counter()
+    pool = GachaPool(catalog)
+    print(f"pool build: {(time.perf_counter() - start) * 1000:.2f} ms for {len(cards)} cards")
+    timed("weights + random.choices per draw", old_way)
+    timed("GachaPool.draw(1) per draw", lambda: [pool.draw(1) for _ in range(draws)])
+    timed("GachaPool.draw(n)", lambda: pool.draw(draws))
+    timed("mass_pull(n) into a fresh user", lambda: mass_pull({}, draws, pool))
@@ -1,8 +1,6 @@
 import time
 import config
-from utils.database import load
-
-WEAPONS_FILE = "data/weapons.json"
+from utils.catalog import catalog
 
 def compute_stats(card_data, level, aura, equipped_item_id=None):
     # Base Stats
@@ -22,8 +20,7 @@ def compute_stats(card_data, level, aura, equipped_item_id=None):
 
     # Equipment Bonus
     if equipped_item_id:
-        weapons = load(WEAPONS_FILE)
-        item = weapons.get(equipped_item_id)
+        item = catalog.weapon(equipped_item_id)
         if item:
             final_atk += item['stats'].get('attack', 0)
             final_hp += item['stats'].get('health', 0)
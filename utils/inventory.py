@@ -0,0 +1,464 @@
+"""Compact storage for users' cards, unlocked names and fragments.
+
+Saved records keep these three fields packed. Names (card names, rarities)
+become indices into an append-only name table, which is stored with the
+users data it decodes: under NAMES_KEY in users.json, as "names" lines in
+the journal, in the shard manifest, or in SQLite's meta table, written in
+the same step as the records that use new names.
+
+- cards are parallel `array("I")` columns (name, rarity, level, exp, evo,
+  aura), plus a small dict for the few cards with extra keys.
+- unlocked is an array of name indices, in the list's order.
+- fragments are (name index, count) arrays.
+
+A packed value answers the same reads as the list or dict it stands for
+(`len`, iteration, `in`, `[]`, `.get`). `UserRecord` swaps it for the plain
+list or dict the first time a command reads the field, so code changes it
+the usual way. Fields that can't be packed (negative numbers, non-string
+names...) are simply stored as they are.
+
+Stored forms, told apart from the plain ones by type:
+    cards      {"n": [...], "r": [...], "l": [...], "x": [...], "e": [...], "a": [...], "+": {pos: {...}}}
+    unlocked   [name index, ...]
+    fragments  [name index, count, name index, count, ...]
+
+Records packed before unlocked kept its order hold it as a hex bitset
+("1f3"); those are still read (`NameSet`) and repacked once changed.
+"""
+import json
+import os
+from array import array
+from collections.abc import Mapping, Sequence, Set
+
+import config
+
+PACKED_FIELDS = ("cards", "unlocked", "fragments")
+# Reserved key holding the name table in a users file; never a user id
+NAMES_KEY = "#names"
+CARD_COLUMNS = (("n", "name"), ("r", "rarity"), ("l", "level"), ("x", "exp"), ("e", "evo"), ("a", "aura"))
+_UINT_MAX = 2 ** 32 - 1
+
+
+class NameIndex:
+    """Append-only name <-> index table shared by every user's packed inventory.
+
+    Indices are never reused or renumbered, so renaming or deleting a card
+    in the catalog can't change what stored inventories mean. The storage
+    backend `attach()`es the table it read with the users, and writes
+    `stored()` (or the new names, `pending()`) with the next records.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or config.CARD_INDEX_FILE  # older standalone table, only read
+        self._names = None
+        self._ids = None
+        self._saved = 0
+
+    def attach(self, names):
+        """Use the table stored with the users data; None if it has none yet."""
+        saved = names is not None
+        if names is None and os.path.exists(self.path):
+            # Data from before the table moved in with the users; the next write stores it
+            with open(self.path, "r", encoding="utf-8") as f:
+                names = json.load(f)
+        self._names = list(names or ())
+        self._ids = {name: i for i, name in enumerate(self._names)}
+        self._saved = len(self._names) if saved else 0
+
+    def _load(self):
+        if self._names is None:
+            self.attach(None)
+
+    def __len__(self):
+        self._load()
+        return len(self._names)
+
+    def id(self, name):
+        """Index of `name`, adding it to the table if it's new."""
+        self._load()
+        i = self._ids.get(name)
+        if i is None:
+            i = self._ids[name] = len(self._names)
+            self._names.append(name)
+        return i
+
+    def find(self, name):
+        """Index of `name`, or None if no inventory has used it yet."""
+        self._load()
+        return self._ids.get(name)
+
+    def name(self, i):
+        self._load()
+        return self._names[i]
+
+    def decode(self, ids):
+        """Names for a sequence of indices."""
+        self._load()
+        table = self._names
+        return [table[i] for i in ids]
+
+    @property
+    def unsaved(self):
+        return self._names is not None and len(self._names) > self._saved
+
+    def stored(self):
+        """The whole table, for a backend writing it in full."""
+        self._load()
+        return list(self._names)
+
+    def pending(self):
+        """(index of the first new name, new names) not yet stored with the users."""
+        self._load()
+        return self._saved, self._names[self._saved:]
+
+    def saved(self, count):
+        """The first `count` names are now stored with the users."""
+        self._saved = max(self._saved, count)
+
+    def require(self, top):
+        """Fail loudly if a stored inventory uses index `top` and the table is shorter."""
+        if top >= len(self):
+            raise ValueError(
+                f"Packed inventory uses card name #{top} but the name table only has "
+                f"{len(self)} names; the table must be stored with the users data")
+
+
+names = NameIndex()
+
+
+def _uint(value):
+    return type(value) is int and 0 <= value <= _UINT_MAX
+
+
+class NameList(list):
+    """List of names that also keeps counts, so `name in names` is O(1)."""
+
+    __slots__ = ("_counts",)
+
+    def __init__(self, items=()):
+        super().__init__(items)
+        self._recount()
+
+    def __reduce__(self):
+        return list, (list(self),)
+
+    def _recount(self):
+        counts = {}
+        for name in self:
+            counts[name] = counts.get(name, 0) + 1
+        self._counts = counts
+
+    def _add(self, name):
+        self._counts[name] = self._counts.get(name, 0) + 1
+
+    def _drop(self, name):
+        left = self._counts.get(name, 0) - 1
+        if left > 0:
+            self._counts[name] = left
+        else:
+            self._counts.pop(name, None)
+
+    def __contains__(self, name):
+        try:
+            return name in self._counts
+        except TypeError:  # unhashable
+            return list.__contains__(self, name)
+
+    def append(self, name):
+        super().append(name)
+        self._add(name)
+
+    def insert(self, index, name):
+        super().insert(index, name)
+        self._add(name)
+
+    def extend(self, names):
+        names = list(names)
+        super().extend(names)
+        for name in names:
+            self._add(name)
+
+    def __iadd__(self, names):
+        self.extend(names)
+        return self
+
+    def remove(self, name):
+        super().remove(name)
+        self._drop(name)
+
+    def pop(self, index=-1):
+        name = super().pop(index)
+        self._drop(name)
+        return name
+
+    def clear(self):
+        super().clear()
+        self._counts = {}
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self._recount()
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._recount()
+
+    def __imul__(self, n):
+        super().__imul__(n)
+        self._recount()
+        return self
+
+
+class PackedCards(Sequence):
+    """A user's cards as columns; reads give a fresh card dict per index."""
+
+    __slots__ = ("columns", "extra")
+
+    def __init__(self, columns, extra=None):
+        self.columns = columns  # short key -> array("I")
+        self.extra = extra  # position -> {other keys}, or None
+
+    @classmethod
+    def pack(cls, cards):
+        """Columns for a list of card dicts, or None if any card doesn't fit."""
+        if not isinstance(cards, list) or not cards:
+            return None
+        columns = {short: array("I") for short, _ in CARD_COLUMNS}
+        extra = {}
+        for pos, card in enumerate(cards):
+            if not isinstance(card, dict):
+                return None
+            name, rarity = card.get("name"), card.get("rarity")
+            if not isinstance(name, str) or not isinstance(rarity, str):
+                return None
+            columns["n"].append(names.id(name))
+            columns["r"].append(names.id(rarity))
+            for short, key in CARD_COLUMNS[2:]:
+                value = card.get(key)
+                if not _uint(value):
+                    return None
+                columns[short].append(value)
+            if len(card) > len(CARD_COLUMNS):
+                extra[pos] = {k: v for k, v in card.items() if k not in _CARD_KEYS}
+        return cls(columns, extra or None)
+
+    @classmethod
+    def load(cls, stored):
+        extra = stored.get("+")
+        return cls({short: array("I", stored[short]) for short, _ in CARD_COLUMNS},
+                   {int(pos): fields for pos, fields in extra.items()} if extra else None)
+
+    def stored(self):
+        data = {short: column.tolist() for short, column in self.columns.items()}
+        if self.extra:
+            data["+"] = {str(pos): fields for pos, fields in self.extra.items()}
+        return data
+
+    def __len__(self):
+        return len(self.columns["n"])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        card = {}
+        for short, key in CARD_COLUMNS:
+            value = self.columns[short][index]
+            card[key] = names.name(value) if short in ("n", "r") else value
+        if self.extra and index in self.extra:
+            card.update(self.extra[index])
+        return card
+
+    def unpack(self):
+        # Same keys, in the same order, as CARD_COLUMNS and __getitem__
+        columns = self.columns
+        cards = [{"name": n, "rarity": r, "level": level, "exp": exp, "evo": evo, "aura": aura}
+                 for n, r, level, exp, evo, aura in zip(
+                     names.decode(columns["n"]), names.decode(columns["r"]),
+                     columns["l"], columns["x"], columns["e"], columns["a"])]
+        if self.extra:
+            for pos, fields in self.extra.items():
+                cards[pos].update(fields)
+        return cards
+
+
+_CARD_KEYS = frozenset(key for _, key in CARD_COLUMNS)
+
+
+class PackedNames(Sequence):
+    """Unlocked names as an array of name indices, order and repeats kept."""
+
+    __slots__ = ("ids",)
+
+    def __init__(self, ids):
+        self.ids = ids
+
+    @classmethod
+    def pack(cls, unlocked):
+        if not isinstance(unlocked, list) or not unlocked:
+            return None
+        if not all(isinstance(name, str) for name in unlocked):
+            return None
+        return cls(array("I", (names.id(name) for name in unlocked)))
+
+    @classmethod
+    def load(cls, stored):
+        return cls(array("I", stored))
+
+    def stored(self):
+        return self.ids.tolist()
+
+    def __contains__(self, name):
+        i = names.find(name) if isinstance(name, str) else None
+        return i is not None and i in self.ids
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [names.name(i) for i in self.ids[index]]
+        return names.name(self.ids[index])
+
+    def __iter__(self):
+        return iter(names.decode(self.ids))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def unpack(self):
+        return NameList(names.decode(self.ids))
+
+
+class NameSet(Set):
+    """Unlocked names in the older stored form, a hex bitset over name indices.
+
+    Only read: order and repeats weren't kept, so names come back in index
+    order. Once the field changes it is packed as `PackedNames`.
+    """
+
+    __slots__ = ("bits",)
+
+    def __init__(self, bits):
+        self.bits = bits
+
+    @classmethod
+    def load(cls, stored):
+        return cls(int(stored, 16))
+
+    def stored(self):
+        return format(self.bits, "x")
+
+    def __contains__(self, name):
+        i = names.find(name) if isinstance(name, str) else None
+        return i is not None and bool(self.bits >> i & 1)
+
+    def __iter__(self):
+        bits, i = self.bits, 0
+        while bits:
+            if bits & 1:
+                yield names.name(i)
+            bits >>= 1
+            i += 1
+
+    def __len__(self):
+        return self.bits.bit_count()
+
+    def unpack(self):
+        return NameList(self)
+
+
+class PackedCounts(Mapping):
+    """Fragment counts as parallel (name index, count) arrays."""
+
+    __slots__ = ("ids", "counts")
+
+    def __init__(self, ids, counts):
+        self.ids = ids
+        self.counts = counts
+
+    @classmethod
+    def pack(cls, fragments):
+        if not isinstance(fragments, dict) or not fragments:
+            return None
+        ids, counts = array("I"), array("I")
+        for name, count in fragments.items():
+            if not isinstance(name, str) or not _uint(count):
+                return None
+            ids.append(names.id(name))
+            counts.append(count)
+        return cls(ids, counts)
+
+    @classmethod
+    def load(cls, stored):
+        return cls(array("I", stored[0::2]), array("I", stored[1::2]))
+
+    def stored(self):
+        flat = [0] * (2 * len(self.ids))
+        flat[0::2] = self.ids.tolist()
+        flat[1::2] = self.counts.tolist()
+        return flat
+
+    def __getitem__(self, name):
+        i = names.find(name) if isinstance(name, str) else None
+        if i is not None:
+            for pos, fid in enumerate(self.ids):
+                if fid == i:
+                    return self.counts[pos]
+        raise KeyError(name)
+
+    def __iter__(self):
+        return iter(names.decode(self.ids))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def unpack(self):
+        return dict(zip(names.decode(self.ids), self.counts))
+
+
+Packed = (PackedCards, PackedNames, NameSet, PackedCounts)
+_PACKERS = {"cards": PackedCards, "unlocked": PackedNames, "fragments": PackedCounts}
+
+
+def pack(field, value):
+    """Packed form of a plain cards/unlocked/fragments value, or None if it can't be packed."""
+    return _PACKERS[field].pack(value)
+
+
+def from_storage(record):
+    """`record` with stored packed fields turned into packed objects (a copy if any were).
+
+    Raises ValueError if they use names the table doesn't have.
+    """
+    converted = None
+    for field in PACKED_FIELDS:
+        value = dict.get(record, field)
+        if field == "cards" and isinstance(value, dict):
+            value = PackedCards.load(value)
+            if len(value):
+                names.require(max(max(value.columns["n"]), max(value.columns["r"])))
+        elif field == "unlocked" and isinstance(value, str):
+            value = NameSet.load(value)
+            if value.bits:
+                names.require(value.bits.bit_length() - 1)
+        elif field == "unlocked" and isinstance(value, list) and value and type(value[0]) is int:
+            value = PackedNames.load(value)
+            names.require(max(value.ids))
+        elif field == "unlocked" and isinstance(value, list):
+            value = NameList(value)
+        elif field == "fragments" and isinstance(value, list):
+            value = PackedCounts.load(value)
+            if len(value):
+                names.require(max(value.ids))
+        else:
+            continue
+        if converted is None:
+            converted = dict(record)
+        converted[field] = value
+    return record if converted is None else converted
+
+
+def json_default(value):
+    """`default=` hook for json.dumps: packed objects encode as their stored form."""
+    if isinstance(value, Packed):
+        return value.stored()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
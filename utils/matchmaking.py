@@ -0,0 +1,132 @@
+import bisect
+import random
+
+
+class MatchIndex:
+    """PvP-eligible players ordered by team power, kept per guild.
+
+    `power_fn(uid)` returns a user's team power (0/None if they can't fight).
+    Scores are computed once for everybody on first use; after that only users
+    passed to `mark_stale()` are recomputed, right before the next pick. Each
+    guild gets a sorted list of (power, uid) the first time it is searched,
+    so picking an opponent is a couple of bisects.
+    """
+
+    def __init__(self, power_fn, all_uids_fn):
+        self.power_fn = power_fn
+        self.all_uids_fn = all_uids_fn
+        self._power = None
+        self._stale = set()
+        self._guilds = {}  # guild id -> (guild, sorted [(power, uid)])
+
+    def mark_stale(self, uids):
+        if self._power is not None:
+            self._stale.update(str(uid) for uid in uids)
+
+    def invalidate(self):
+        """Drop everything; the next pick rebuilds from scratch."""
+        self._power = None
+        self._stale.clear()
+        self._guilds.clear()
+
+    def power(self, uid):
+        self._refresh()
+        return self._power.get(str(uid))
+
+    def _score(self, uid):
+        try:
+            return int(self.power_fn(uid) or 0) or None
+        except Exception as e:
+            print(f"Error scoring {uid} for matchmaking: {e}")
+            return None
+
+    def _refresh(self):
+        if self._power is None:
+            self._power = {}
+            for uid in self.all_uids_fn():
+                score = self._score(uid)
+                if score:
+                    self._power[uid] = score
+            self._stale.clear()
+            return
+
+        stale, self._stale = self._stale, set()
+        for uid in stale:
+            old = self._power.pop(uid, None)
+            new = self._score(uid)
+            if new:
+                self._power[uid] = new
+            if old == new:
+                continue
+            for guild, entries in self._guilds.values():
+                if old is not None:
+                    _remove(entries, (old, uid))
+                if new is not None and _is_member(guild, uid):
+                    bisect.insort(entries, (new, uid))
+
+    def _entries(self, guild):
+        hit = self._guilds.get(guild.id)
+        if hit is not None:
+            return hit[1]
+        if len(guild.members) < len(self._power):
+            candidates = ((str(m.id), self._power.get(str(m.id))) for m in guild.members if not m.bot)
+            entries = sorted((power, uid) for uid, power in candidates if power)
+        else:
+            entries = sorted((power, uid) for uid, power in self._power.items() if _is_member(guild, uid))
+        self._guilds[guild.id] = (guild, entries)
+        return entries
+
+    def member_joined(self, member):
+        hit = self._guilds.get(member.guild.id)
+        power = self._power.get(str(member.id)) if self._power is not None else None
+        if hit is not None and power and not member.bot:
+            entry = (power, str(member.id))
+            i = bisect.bisect_left(hit[1], entry)
+            if i == len(hit[1]) or hit[1][i] != entry:
+                hit[1].insert(i, entry)
+
+    def member_left(self, member):
+        hit = self._guilds.get(member.guild.id)
+        power = self._power.get(str(member.id)) if self._power is not None else None
+        if hit is not None and power:
+            _remove(hit[1], (power, str(member.id)))
+
+    def pick(self, guild, uid, band=None, rng=random):
+        """Random opponent in `guild` for `uid`, or None.
+
+        With `band` (e.g. 0.25) the opponent's power is within ±25% of the
+        caller's when anyone qualifies; otherwise anyone in the guild.
+        """
+        self._refresh()
+        entries = self._entries(guild)
+        me = str(uid)
+        lo, hi = 0, len(entries)
+        power = self._power.get(me)
+        if band is not None and power:
+            b_lo = bisect.bisect_left(entries, (power * (1 - band), ""))
+            b_hi = bisect.bisect_right(entries, (power * (1 + band), "\uffff"))
+            # Need someone besides the caller in the band
+            if b_hi - b_lo >= 2:
+                lo, hi = b_lo, b_hi
+        if hi - lo < 1:
+            return None
+
+        for _ in range(4):
+            _, cand = entries[rng.randrange(lo, hi)]
+            if cand != me:
+                return int(cand)
+        for _, cand in entries[lo:hi]:
+            if cand != me:
+                return int(cand)
+        return None
+
+
+def _is_member(guild, uid):
+    member = guild.get_member(int(uid))
+    return member is not None and not member.bot
+
+
+def _remove(entries, entry):
+    i = bisect.bisect_left(entries, entry)
+    if i < len(entries) and entries[i] == entry:
+        del entries[i]
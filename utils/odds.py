@@ -0,0 +1,216 @@
+"""Monte Carlo win odds: thousands of battles at once, with NumPy.
+
+The rules match utils.battle_engine. A PvP fight or territory capture is a
+`Duel` where each exchange uses a random attacker. A raid is a `PooledRaid`
+against a boss's `stats` from bosses.json. Teams use the same
+[{name, atk, hp, max_hp}] shape that `Combat.get_team` / `team_cache` return.
+
+Without NumPy the same numbers come from running the engine battle by battle,
+which is much slower. `gen` is a numpy Generator, or a `random.Random` when
+NumPy isn't installed.
+"""
+import random
+import time
+
+from utils.battle_engine import Duel, PooledRaid
+
+try:
+    import numpy as np
+except ImportError:  # fall back to running the engine one battle at a time
+    np = None
+
+DEFAULT_BATTLES = 2000
+
+
+class Odds:
+    """Result of a simulation run.
+
+    `damage` has the 10th/50th/90th percentile of damage dealt per battle by
+    the first team (the challenger, or the raid party).
+    """
+
+    __slots__ = ("battles", "win_rate", "avg_turns", "damage", "elapsed_ms")
+
+    def __init__(self, battles, wins, turns, damage, elapsed_ms):
+        self.battles = battles
+        self.win_rate = wins / battles if battles else 0.0
+        self.avg_turns = turns / battles if battles else 0.0
+        self.damage = damage
+        self.elapsed_ms = elapsed_ms
+
+
+def _percentiles(values):
+    if np is not None:
+        p10, p50, p90 = np.percentile(values, (10, 50, 90))
+        return {"p10": int(p10), "p50": int(p50), "p90": int(p90)}
+    values = sorted(values)
+    last = len(values) - 1
+    return {f"p{q}": int(values[round(last * q / 100)]) for q in (10, 50, 90)}
+
+
+def _arrays(team):
+    atk = np.array([c["atk"] for c in team], dtype=np.int64)
+    hp = np.array([c["hp"] for c in team], dtype=np.int64)
+    return atk, hp
+
+
+def _pick_alive(alive, gen):
+    """Per row, a uniformly random column where `alive` is True (rows need at least one)."""
+    r = gen.random(alive.shape)
+    r[~alive] = -1.0
+    return r.argmax(axis=1)
+
+
+def _hit(rows, atk, hp_attacking, hp_defending, gen):
+    """One random living attacker per row hits one random living defender; returns the damage rolls."""
+    a = _pick_alive(hp_attacking[rows] > 0, gen)
+    t = _pick_alive(hp_defending[rows] > 0, gen)
+    dmg = (atk[a] * (0.8 + gen.random(len(rows)) * 0.4)).astype(np.int64)
+    hp_defending[rows, t] = np.maximum(hp_defending[rows, t] - dmg, 0)
+    return dmg
+
+
+def simulate_duel(team_a, team_b, battles=DEFAULT_BATTLES, max_turns=15, gen=None):
+    """Odds of `team_a` beating `team_b` in a PvP fight or capture battle."""
+    start = time.perf_counter()
+    if not team_a or not team_b:
+        return Odds(battles, 0 if not team_a else battles, 0, _percentiles([0]), 0.0)
+
+    if np is None:
+        wins = turns = 0
+        damage = []
+        for _ in range(battles):
+            duel = Duel(team_a, team_b, max_turns=max_turns, rng=gen or random)
+            damage.append(sum(e.amount for e in duel.run() if e.actor.side == 0))
+            wins += duel.side_a_won
+            turns += duel.turn
+        return Odds(battles, wins, turns, _percentiles(damage),
+                    (time.perf_counter() - start) * 1000)
+
+    gen = gen or np.random.default_rng()
+    atk_a, hp0_a = _arrays(team_a)
+    atk_b, hp0_b = _arrays(team_b)
+    hp_a = np.tile(hp0_a, (battles, 1))
+    hp_b = np.tile(hp0_b, (battles, 1))
+    turns = np.zeros(battles, dtype=np.int64)
+    dealt_a = np.zeros(battles, dtype=np.int64)
+
+    rows = np.arange(battles)
+    while len(rows):
+        dealt_a[rows] += _hit(rows, atk_a, hp_a, hp_b, gen)
+        # Counter-attack only where the defenders still stand
+        counter = rows[(hp_b[rows] > 0).any(axis=1)]
+        if len(counter):
+            _hit(counter, atk_b, hp_b, hp_a, gen)
+        turns[rows] += 1
+        still = (hp_a[rows] > 0).any(axis=1) & (hp_b[rows] > 0).any(axis=1) & (turns[rows] < max_turns)
+        rows = rows[still]
+
+    wins = int((hp_a > 0).any(axis=1).sum())
+    return Odds(battles, wins, int(turns.sum()), _percentiles(dealt_a),
+                (time.perf_counter() - start) * 1000)
+
+
+def simulate_raid(team, boss_stats, battles=DEFAULT_BATTLES, max_turns=15, gen=None):
+    """Odds of a raid party (all members' cards in one list) beating a boss's `stats`."""
+    start = time.perf_counter()
+    if not team:
+        return Odds(battles, 0, 0, _percentiles([0]), 0.0)
+
+    if np is None:
+        wins = turns = 0
+        damage = []
+        for _ in range(battles):
+            raid = PooledRaid(team, boss_stats, max_turns=max_turns, rng=gen or random)
+            events = raid.run()
+            damage.append(min(boss_stats["health"],
+                              sum(e.amount for e in events if e.kind == "team_attack")))
+            wins += raid.won
+            turns += raid.turn
+        return Odds(battles, wins, turns, _percentiles(damage),
+                    (time.perf_counter() - start) * 1000)
+
+    gen = gen or np.random.default_rng()
+    atk, hp = _arrays(team)
+    boss_atk = boss_stats["attack"]
+    boss_hp = np.full(battles, boss_stats["health"], dtype=np.int64)
+    team_hp = np.full(battles, int(hp.sum()), dtype=np.int64)
+    turns = np.zeros(battles, dtype=np.int64)
+
+    rows = np.arange(battles)
+    while len(rows):
+        m = len(rows)
+        dmg = (atk * (0.6 + gen.random((m, len(atk))) * 0.4)).astype(np.int64)
+        crit = gen.random((m, len(atk))) < 0.15
+        dmg = np.where(crit, (dmg * 1.5).astype(np.int64), dmg)
+        boss_hp[rows] -= dmg.sum(axis=1)
+        turns[rows] += 1
+
+        standing = rows[boss_hp[rows] > 0]
+        team_hp[standing] -= (boss_atk * (0.8 + gen.random(len(standing)) * 0.4)).astype(np.int64)
+        rows = rows[(boss_hp[rows] > 0) & (team_hp[rows] > 0) & (turns[rows] < max_turns)]
+
+    damage = boss_stats["health"] - np.maximum(boss_hp, 0)
+    wins = int((boss_hp <= 0).sum())
+    return Odds(battles, wins, int(turns.sum()), _percentiles(damage),
+                (time.perf_counter() - start) * 1000)
+
+
+def balance_boss(team, boss_stats, target_win_rate=0.5, battles=DEFAULT_BATTLES, max_turns=15):
+    """Copy of `boss_stats` with `health` tuned so `team` wins about `target_win_rate` of raids.
+
+    Attack and speed are left alone. Every probe reuses the same random
+    seed, so win rate only ever goes down as health goes up and the
+    bisection converges.
+    """
+    seed = random.randrange(2 ** 32)
+
+    def win_rate(health):
+        stats = dict(boss_stats, health=int(health))
+        gen = np.random.default_rng(seed) if np is not None else random.Random(seed)
+        return simulate_raid(team, stats, battles, max_turns, gen).win_rate
+
+    lo, hi = 1, max(1, boss_stats["health"])
+    # Grow the bracket until the party loses often enough at `hi`
+    while win_rate(hi) > target_win_rate and hi < 2 ** 40:
+        lo, hi = hi, hi * 2
+    for _ in range(20):
+        if hi - lo <= max(1, hi // 200):
+            break
+        mid = (lo + hi) // 2
+        if win_rate(mid) > target_win_rate:
+            lo = mid
+        else:
+            hi = mid
+    return dict(boss_stats, health=hi)
+
+
+if __name__ == "__main__":
+    # Balancing: how a real party does against a boss, and the health that would hit the target
+    import sys
+
+    from utils.catalog import catalog
+    from utils.teams import team_cache
+
+    args = sys.argv[1:]
+    target = 0.5
+    if "--target" in args:
+        i = args.index("--target")
+        target = float(args[i + 1])
+        del args[i:i + 2]
+    if len(args) < 2:
+        sys.exit('usage: python -m utils.odds "<boss name>" <uid> [<uid> ...] [--target 0.5]')
+
+    boss = catalog.boss(args[0])
+    if not boss:
+        sys.exit(f"Unknown boss: {args[0]}")
+    # Same party as `ls raid`: each member's top 2 cards
+    party = [card for uid in args[1:] for card in team_cache.get(uid, size=2, use_saved=False)]
+    if not party:
+        sys.exit("None of those users have cards.")
+
+    odds = simulate_raid(party, boss["stats"])
+    print(f"{boss['name']} {boss['stats']}: party wins {odds.win_rate:.1%}, "
+          f"{odds.avg_turns:.1f} turns, damage {odds.damage} ({odds.elapsed_ms:.0f} ms)")
+    tuned = balance_boss(party, boss["stats"], target)
+    print(f"health for a {target:.0%} win rate: {tuned['health']}")
@@ -0,0 +1,174 @@
+import bisect
+import time
+
+from utils import inventory
+
+
+def _cards(record):
+    return dict.get(record, "cards") or []
+
+
+def _card_total(record, column, key, default):
+    cards = _cards(record)
+    if isinstance(cards, inventory.PackedCards):
+        return sum(cards.columns[column])
+    return sum(int(c.get(key, default)) for c in cards if isinstance(c, dict))
+
+
+# metric -> (title, unit, score(record)). Records may be live or scanned
+# copies, so fields are read with dict.get: no unpacking, no read tracking.
+METRICS = {
+    "yen": ("Richest Players", "💴 yen", lambda r: dict.get(r, "yen", 0)),
+    "wins": ("Most Wins", "🏆 wins", lambda r: dict.get(r, "wins", 0)),
+    "streak": ("Best Streaks", "🔥 streak", lambda r: dict.get(r, "streak", 0)),
+    # There is no account level; the sum of card levels stands in for it
+    "level": ("Highest Levels", "📊 card levels", lambda r: _card_total(r, "l", "level", 1)),
+    "aura": ("Most Aura", "✨ aura", lambda r: _card_total(r, "a", "aura", 0)),
+    "cards": ("Biggest Collections", "🃏 cards", lambda r: len(_cards(r))),
+}
+ALIASES = {"money": "yen", "bal": "yen", "win": "wins", "lvl": "level", "levels": "level",
+           "collection": "cards", "card": "cards"}
+
+
+def resolve_metric(name):
+    """Metric key for a user-typed name, or None."""
+    if name is None:
+        return "yen"
+    name = name.lower()
+    name = ALIASES.get(name, name)
+    return name if name in METRICS else None
+
+
+class Rankings:
+    """Users ordered by every METRICS score, kept per guild as well as globally.
+
+    Scores are computed for everybody on first use; after that only users
+    passed to `mark_stale()` (subscribe it to `user_store`) are rescored,
+    right before the next query, and moved within each sorted list. A page
+    is a slice and "my rank" is a bisect, so neither sorts anything. Only
+    users with a non-zero score are ranked.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._scores = None  # uid -> {metric: score}
+        self._stale = set()
+        self._boards = {}  # metric -> sorted [(-score, uid)]
+        self._guilds = {}  # (guild id, metric) -> (guild, sorted [(-score, uid)])
+
+    def mark_stale(self, uids):
+        if self._scores is not None:
+            self._stale.update(str(uid) for uid in uids)
+
+    def invalidate(self):
+        self._scores = None
+        self._stale.clear()
+        self._boards.clear()
+        self._guilds.clear()
+
+    def _score(self, record):
+        scores = {}
+        for metric, (_, _, score) in METRICS.items():
+            try:
+                value = score(record)
+            except (TypeError, ValueError):
+                value = 0
+            if value:
+                scores[metric] = value
+        return scores
+
+    def _refresh(self):
+        if self._scores is None:
+            self._scores = {uid: self._score(record) for uid, record in self.store.scan()}
+            self._stale.clear()
+            for metric in METRICS:
+                self._boards[metric] = sorted(
+                    (-scores[metric], uid) for uid, scores in self._scores.items() if metric in scores)
+            return
+
+        stale, self._stale = self._stale, set()
+        for uid in stale:
+            record = self.store.get(uid)
+            old = self._scores.pop(uid, {})
+            new = self._score(record) if record is not None else {}
+            if new:
+                self._scores[uid] = new
+            for metric in METRICS:
+                before, after = old.get(metric), new.get(metric)
+                if before == after:
+                    continue
+                boards = [self._boards[metric]]
+                boards += [entries for (_, m), (guild, entries) in self._guilds.items()
+                           if m == metric and _is_member(guild, uid)]
+                for entries in boards:
+                    if before is not None:
+                        _remove(entries, (-before, uid))
+                    if after is not None:
+                        bisect.insort(entries, (-after, uid))
+
+    def _entries(self, metric, guild=None):
+        self._refresh()
+        if guild is None:
+            return self._boards[metric]
+        hit = self._guilds.get((guild.id, metric))
+        if hit is not None:
+            return hit[1]
+        entries = [entry for entry in self._boards[metric] if _is_member(guild, entry[1])]
+        self._guilds[(guild.id, metric)] = (guild, entries)
+        return entries
+
+    def member_joined(self, member):
+        if self._scores is None or member.bot:
+            return
+        scores = self._scores.get(str(member.id), {})
+        for (guild_id, metric), (_, entries) in self._guilds.items():
+            if guild_id == member.guild.id and metric in scores:
+                entry = (-scores[metric], str(member.id))
+                i = bisect.bisect_left(entries, entry)
+                if i == len(entries) or entries[i] != entry:
+                    entries.insert(i, entry)
+
+    def member_left(self, member):
+        if self._scores is None:
+            return
+        scores = self._scores.get(str(member.id), {})
+        for (guild_id, metric), (_, entries) in self._guilds.items():
+            if guild_id == member.guild.id and metric in scores:
+                _remove(entries, (-scores[metric], str(member.id)))
+
+    def count(self, metric, guild=None):
+        return len(self._entries(metric, guild))
+
+    def page(self, metric, start=0, size=10, guild=None):
+        """[(rank, uid, score)] for ranks start+1 .. start+size."""
+        entries = self._entries(metric, guild)
+        return [(start + i + 1, uid, -neg) for i, (neg, uid) in enumerate(entries[start:start + size])]
+
+    def snapshot(self, size):
+        """The global top `size` of every metric: {"taken": unix time, "boards": {metric: [[uid, score], ...]}}."""
+        return {"taken": time.time(),
+                "boards": {metric: [[uid, score] for _, uid, score in self.page(metric, 0, size)]
+                           for metric in METRICS}}
+
+    def rank(self, metric, uid, guild=None):
+        """(rank, score) for the user, or None if they aren't ranked."""
+        entries = self._entries(metric, guild)
+        uid = str(uid)
+        score = self._scores.get(uid, {}).get(metric)
+        if score is None:
+            return None
+        i = bisect.bisect_left(entries, (-score, uid))
+        if i == len(entries) or entries[i] != (-score, uid):
+            return None
+        return i + 1, score
+
+
+def _is_member(guild, uid):
+    member = guild.get_member(int(uid)) if uid.isdigit() else None
+    return member is not None and not member.bot
+
+
+def _remove(entries, entry):
+    i = bisect.bisect_left(entries, entry)
+    if i < len(entries) and entries[i] == entry:
+        del entries[i]
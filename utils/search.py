@@ -0,0 +1,170 @@
+"""Name search shared by every command that takes a card, fragment or boss name.
+
+One set of ranking rules, best match first:
+    1. exact name or alias (case, spacing and punctuation ignored)
+    2. a word of the name starts with the query ("park" -> "Gun Park")
+    3. the query appears anywhere in the name
+    4. typo match: enough shared trigrams (Dice similarity >= FUZZY_CUTOFF)
+Ties go to the closer spelling (more shared trigrams), then the shorter name.
+
+The catalog indexes are built once per catalog version. Owned cards and
+fragments are searched through the catalog index restricted to the names
+the user has, so no per-request index is built.
+"""
+import bisect
+import re
+
+from utils.catalog import catalog
+
+FUZZY_CUTOFF = 0.45
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+
+def fold(text):
+    """"Daniel Park(SB)" -> "daniel park sb"."""
+    return _NON_WORD.sub(" ", str(text).casefold()).strip()
+
+
+def _grams(folded):
+    padded = f"  {folded} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """Trigram and word-prefix index over named values."""
+
+    def __init__(self, entries=()):
+        """`entries`: (value, name, aliases) triples. Values are returned by `search()`."""
+        self.values = []
+        self.names = []
+        self._folded = []
+        self._exact = {}  # folded name/alias -> [entry ids]
+        self._prefixes = []  # sorted (folded word suffix, entry id)
+        self._grams = {}  # trigram -> set of entry ids
+        self._sizes = []  # trigram count per entry
+        for value, name, aliases in entries:
+            self.add(value, name, aliases)
+        self._prefixes.sort()
+
+    def add(self, value, name, aliases=()):
+        i = len(self.values)
+        self.values.append(value)
+        self.names.append(name)
+        folded = fold(name)
+        self._folded.append(folded)
+        for key in {folded, *(fold(a) for a in aliases)}:
+            if key:
+                self._exact.setdefault(key, []).append(i)
+        # Every word start, so a prefix search finds "park" in "gun park"
+        for m in re.finditer(r"\S+", folded):
+            self._prefixes.append((folded[m.start():], i))
+        grams = _grams(folded)
+        self._sizes.append(len(grams))
+        for gram in grams:
+            self._grams.setdefault(gram, set()).add(i)
+
+    def ranked(self, query, among=None):
+        """[(sort key, value)] for every match, best first; keys compare across indexes."""
+        q = fold(query)
+        if not q:
+            return []
+        allowed = (lambda i: True) if among is None else (lambda i: self.names[i] in among)
+        ranked = {}
+
+        def offer(i, tier):
+            if allowed(i) and (i not in ranked or ranked[i] > tier):
+                ranked[i] = tier
+
+        for i in self._exact.get(q, ()):
+            offer(i, 0)
+        lo = bisect.bisect_left(self._prefixes, (q, -1))
+        while lo < len(self._prefixes) and self._prefixes[lo][0].startswith(q):
+            offer(self._prefixes[lo][1], 1)
+            lo += 1
+
+        q_grams = _grams(q)
+        shared = {}
+        for gram in q_grams:
+            for i in self._grams.get(gram, ()):
+                shared[i] = shared.get(i, 0) + 1
+        similarity = {i: 2 * n / (len(q_grams) + self._sizes[i]) for i, n in shared.items()}
+        for i, score in similarity.items():
+            if i in ranked:
+                continue
+            if q in self._folded[i]:
+                offer(i, 2)
+            elif score >= FUZZY_CUTOFF:
+                offer(i, 3)
+        if len(q) < 3:
+            # Too short to share a trigram with every name that contains it
+            for i, folded in enumerate(self._folded):
+                if i not in ranked and q in folded:
+                    offer(i, 2)
+
+        keys = ((ranked[i], -similarity.get(i, 0), len(self.names[i]), self.names[i], i) for i in ranked)
+        return [(key, self.values[key[-1]]) for key in sorted(keys)]
+
+    def search(self, query, limit=None, among=None):
+        """Values matching `query`, best first. `among`: only names in this set."""
+        return [value for _, value in self.ranked(query, among)[:limit]]
+
+    def best(self, query, among=None):
+        hits = self.search(query, 1, among)
+        return hits[0] if hits else None
+
+    def choices(self, query, limit, among=None):
+        """[(name, value)] best first; every entry, alphabetically, for an empty query."""
+        if not fold(query):
+            entries = sorted((name, value) for name, value in zip(self.names, self.values)
+                             if among is None or name in among)
+            return entries[:limit]
+        return [(self.names[key[-1]], value) for key, value in self.ranked(query, among)[:limit]]
+
+
+_indexes = {}
+
+
+def _cached(kind, build):
+    hit = _indexes.get(kind)
+    if hit is None or hit[0] != catalog.version:
+        hit = _indexes[kind] = (catalog.version, build())
+    return hit[1]
+
+
+def card_index():
+    """Every catalog card, searchable by name or id ("gun_park")."""
+    return _cached("cards", lambda: SearchIndex(
+        (card, card["name"], [card.get("id", ""), *card.get("aliases", ())])
+        for card in catalog.cards.values() if card.get("name")))
+
+
+def boss_index():
+    """Boss keys, searchable by boss name or key."""
+    return _cached("bosses", lambda: SearchIndex(
+        (key, boss["name"], [key, *boss.get("aliases", ())])
+        for key, boss in catalog.bosses.items() if boss.get("name")))
+
+
+def weapon_index():
+    """Weapon ids, searchable by weapon name or id."""
+    return _cached("weapons", lambda: SearchIndex(
+        (wid, weapon["name"], [wid]) for wid, weapon in catalog.weapons.items() if weapon.get("name")))
+
+
+def search_names(names, query, limit=None):
+    """Names from `names` (owned cards, fragments...) matching `query`, best first."""
+    names = set(names)
+    index = card_index()
+    hits = [(key, card["name"]) for key, card in index.ranked(query, among=names)]
+    unknown = names.difference(index.names)
+    if unknown:
+        # Names the catalog no longer has; few enough to index on the spot
+        extra = SearchIndex((name, name, ()) for name in unknown)
+        hits = sorted(hits + extra.ranked(query), key=lambda hit: hit[0][:4])
+    return [name for _, name in hits[:limit]]
+
+
+def find_name(names, query):
+    """Best match for `query` among `names`, or None."""
+    hits = search_names(names, query, 1)
+    return hits[0] if hits else None
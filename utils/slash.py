@@ -0,0 +1,33 @@
+"""Registering the slash versions of hybrid commands with Discord.
+
+A global `tree.sync()` is rate limited and replaces every command on
+Discord's side, so it shouldn't run on each restart. The tree's payload is
+hashed and the hash of the last successful sync is kept in SLASH_SYNC_FILE;
+startup only syncs when they differ. `python main.py --sync` and the admin
+command `ls sync` force a sync anyway.
+"""
+import hashlib
+import json
+
+import config
+from utils.database import load, save
+
+
+def tree_hash(tree):
+    """Hash of the command payload `tree.sync()` would upload."""
+    payload = sorted(json.dumps(command.to_dict(tree), sort_keys=True)
+                     for command in tree.get_commands())
+    return hashlib.sha256("\n".join(payload).encode()).hexdigest()
+
+
+async def sync_commands(tree, force=False):
+    """Sync `tree` globally if it changed since the last sync, or if `force`.
+
+    Returns the number of commands synced, or None when the sync was skipped.
+    """
+    digest = tree_hash(tree)
+    if not force and load(config.SLASH_SYNC_FILE, {}).get("hash") == digest:
+        return None
+    synced = await tree.sync()
+    save(config.SLASH_SYNC_FILE, {"hash": digest})
+    return len(synced)
@@ -0,0 +1,84 @@
+from utils.catalog import catalog
+from utils.database import user_store
+from utils.game_math import compute_stats
+
+
+def build_team(user, mult=1.0, size=4, use_saved=True):
+    """Battle-ready team for a user record: [{name, atk, hp, max_hp}].
+
+    Prefers the saved team (user['team']) when `use_saved`, falling back to
+    the first `size` owned cards. Stats are scaled by `mult` (gang level).
+    """
+    owned_cards = user.get("cards", [])
+    if not owned_cards:
+        return []
+
+    def entry(owned):
+        base = catalog.card_by_name(owned.get("name"))
+        if not base:
+            return None
+        stats = compute_stats(base, owned.get("level", 1), owned.get(
+            "aura", 0), owned.get("equipped_item_id"))
+        atk = int(stats["attack"] * mult)
+        hp = int(stats["health"] * mult)
+        return {"name": owned["name"], "atk": atk, "hp": hp, "max_hp": hp}
+
+    team = []
+    if use_saved:
+        by_name = {}
+        for c in owned_cards:
+            by_name.setdefault(c.get("name"), c)
+        for name in user.get("team", [])[:size]:
+            owned = by_name.get(name)
+            card = entry(owned) if owned else None
+            if card:
+                team.append(card)
+
+    if not team:
+        for c in owned_cards[:size]:
+            card = entry(c)
+            if card:
+                team.append(card)
+    return team
+
+
+# ---- snapshot cache ----
+
+class TeamCache:
+    """Built teams keyed by (user version, multiplier, catalog version).
+
+    Any change to a user's cards, team, equipment or aura bumps the user
+    version (`user_store.mark_dirty()` or a tracked record change); gang EXP changes
+    move the multiplier; catalog reloads bump the catalog version. Any of
+    those makes the next `get()` rebuild, otherwise the snapshot is reused.
+    """
+
+    def __init__(self):
+        self._teams = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, uid, mult=1.0, size=4, use_saved=True):
+        """A fresh copy of the user's team (battles mutate hp), [] for unknown users."""
+        user = user_store.get(uid)
+        if not user:
+            return []
+        slot = (str(uid), size, use_saved)
+        key = (user_store.version(uid), mult, catalog.version)
+        hit = self._teams.get(slot)
+        if hit is not None and hit[0] == key:
+            self.hits += 1
+            team = hit[1]
+        else:
+            self.misses += 1
+            team = build_team(user, mult, size, use_saved)
+            self._teams[slot] = (key, team)
+        return [dict(card) for card in team]
+
+    def discard(self, uid):
+        uid = str(uid)
+        for slot in [s for s in self._teams if s[0] == uid]:
+            del self._teams[slot]
+
+
+team_cache = TeamCache()